@@ -0,0 +1,36 @@
+"""device search_vec generated column and GIN index
+
+Revision ID: 0001_device_search_vec
+Revises: 
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_device_search_vec'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: databases started before this migration already got these from the startup hook
+    op.execute(
+        """
+        ALTER TABLE devices ADD COLUMN IF NOT EXISTS search_vec tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('simple',
+                coalesce(device_name, '') || ' ' || coalesce(device_code, '') || ' ' || coalesce(nup_device, ''))
+        ) STORED
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_devices_search_vec ON devices USING GIN (search_vec)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_devices_search_vec")
+    op.execute("ALTER TABLE devices DROP COLUMN IF EXISTS search_vec")
@@ -0,0 +1,74 @@
+"""by-field device list and per-borrower loan indexes
+
+Replaces the redundant ix_devices_status_condition_created with single-field
+(condition|status, created_at) indexes.
+
+Revision ID: 0002_drop_status_condition_idx
+Revises: 0001_device_search_vec
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_drop_status_condition_idx'
+down_revision: Union[str, None] = '0001_device_search_vec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the tables writable during the build; it can't run in a transaction
+    with op.get_context().autocommit_block():
+        # GET /devices/by/{field} filters on exactly one column and sorts by created_at DESC
+        op.create_index(
+            "ix_devices_condition_created",
+            "devices",
+            ["device_condition", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_devices_status_created",
+            "devices",
+            ["device_status", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # "My loans" list and export: borrower filter + created_at DESC, live rows only
+        op.create_index(
+            "ix_device_loans_borrower_created",
+            "device_loans",
+            ["borrower_user_id", "created_at"],
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Covered by the two devices indexes above
+        op.drop_index(
+            "ix_devices_status_condition_created",
+            table_name="devices",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_devices_status_condition_created",
+            "devices",
+            ["device_status", "device_condition", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name, table in (
+            ("ix_device_loans_borrower_created", "device_loans"),
+            ("ix_devices_status_created", "devices"),
+            ("ix_devices_condition_created", "devices"),
+        ):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,63 @@
+"""device_children filter and trigram search indexes
+
+Revision ID: 0003_device_children_indexes
+Revises: 0002_drop_status_condition_idx
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_device_children_indexes'
+down_revision: Union[str, None] = '0002_drop_status_condition_idx'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# ILIKE '%term%' filters and search on these columns
+TRGM_COLUMNS = ("device_name", "device_code", "nup_device")
+
+
+def upgrade() -> None:
+    # No-op when a superuser has already created it for a role that may not
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY keeps device_children writable during the build; it can't run in a transaction
+    with op.get_context().autocommit_block():
+        # Common list filter combination (parent + status + condition)
+        op.create_index(
+            "ix_device_children_parent_status_condition",
+            "device_children",
+            ["parent_id", "device_status", "device_condition"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for column in TRGM_COLUMNS:
+            op.create_index(
+                f"ix_device_children_{column}_trgm",
+                "device_children",
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in TRGM_COLUMNS:
+            op.drop_index(
+                f"ix_device_children_{column}_trgm",
+                table_name="device_children",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+        op.drop_index(
+            "ix_device_children_parent_status_condition",
+            table_name="device_children",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
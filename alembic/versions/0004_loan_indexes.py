@@ -0,0 +1,57 @@
+"""loan item and live-loan indexes
+
+Revision ID: 0004_loan_indexes
+Revises: 0003_device_children_indexes
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_loan_indexes'
+down_revision: Union[str, None] = '0003_device_children_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the loan tables writable during the build; it can't run in a transaction
+    with op.get_context().autocommit_block():
+        # Loan -> items lookups (eager loads, usage aggregation joins) answered from the index alone
+        op.create_index(
+            "ix_device_loan_items_loan_device",
+            "device_loan_items",
+            ["loan_id"],
+            postgresql_include=["device_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Date-window reports and the default loan list order, live rows only
+        op.create_index(
+            "ix_device_loans_created_live",
+            "device_loans",
+            ["created_at"],
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_device_loans_created_live",
+            table_name="device_loans",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_device_loan_items_loan_device",
+            table_name="device_loan_items",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
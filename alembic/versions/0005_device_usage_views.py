@@ -0,0 +1,87 @@
+"""device usage statistics materialized views
+
+Revision ID: 0005_device_usage_views
+Revises: 0004_loan_indexes
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_device_usage_views'
+down_revision: Union[str, None] = '0004_loan_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Counted loans: not deleted and RETURNED / OVERDUE / ACTIVE
+_COUNTED_LOANS = """
+    FROM device_loan_items dli
+    JOIN device_loans dl ON dli.loan_id = dl.id
+    WHERE dl.deleted_at IS NULL
+        AND dl.status IN ('RETURNED', 'OVERDUE', 'ACTIVE')
+        AND dli.device_id IS NOT NULL
+"""
+
+UPGRADE_DDL = (
+    f"""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS device_usage_stats_mv AS
+    SELECT
+        agg.device_id,
+        agg.total_usage_days,
+        agg.total_loans,
+        agg.last_used_date,
+        last_loan.borrower_name AS last_borrower,
+        last_loan.activity_name AS last_activity
+    FROM (
+        SELECT
+            dli.device_id,
+            SUM(dl.usage_duration_days * dli.quantity)::integer AS total_usage_days,
+            COUNT(DISTINCT dl.id)::integer AS total_loans,
+            MAX(dl.loan_end_date) AS last_used_date
+        {_COUNTED_LOANS}
+        GROUP BY dli.device_id
+    ) agg
+    JOIN (
+        SELECT DISTINCT ON (dli.device_id) dli.device_id, dl.borrower_name, dl.activity_name
+        {_COUNTED_LOANS}
+        ORDER BY dli.device_id, dl.loan_end_date DESC, dl.id DESC
+    ) last_loan ON last_loan.device_id = agg.device_id
+    WITH DATA
+    """,
+    # A unique index is required for REFRESH ... CONCURRENTLY
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_device_usage_stats_mv_device_id ON device_usage_stats_mv (device_id)",
+    "CREATE INDEX IF NOT EXISTS ix_device_usage_stats_mv_total_usage_days ON device_usage_stats_mv (total_usage_days DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_device_usage_stats_mv_last_used_date ON device_usage_stats_mv (last_used_date)",
+    # Every non-deleted loan item, whatever its status, as the usage report has always counted them
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS device_usage_monthly_mv AS
+    SELECT
+        dli.device_id,
+        date_trunc('month', dl.created_at)::date AS bucket,
+        COUNT(dli.id)::integer AS loan_count,
+        SUM(dl.usage_duration_days)::integer AS total_days_used
+    FROM device_loan_items dli
+    JOIN device_loans dl ON dli.loan_id = dl.id
+    WHERE dl.deleted_at IS NULL
+        AND dli.device_id IS NOT NULL
+    GROUP BY 1, 2
+    WITH DATA
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_device_usage_monthly_mv_device_bucket ON device_usage_monthly_mv (device_id, bucket)",
+    "CREATE INDEX IF NOT EXISTS ix_device_usage_monthly_mv_bucket ON device_usage_monthly_mv (bucket)",
+)
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: databases started before this revision already got the views from the startup hook
+    for statement in UPGRADE_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    # Dropping a view drops its indexes
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS device_usage_monthly_mv")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS device_usage_stats_mv")
@@ -0,0 +1,66 @@
+"""Gunicorn configuration for production deployments.
+
+Usage:
+    gunicorn main:app -c gunicorn.conf.py
+"""
+
+import asyncio
+import os
+import sys
+
+# The config file is loaded before gunicorn puts the app directory on the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.core.config import settings
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# One Uvicorn worker per process. Read through Settings so .env applies here too; every
+# worker opens up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so size it against the
+# database's max_connections, not just the CPU count (see _check_connection_budget)
+worker_class = "src.core.workers.UvloopWorker"
+workers = settings.WEB_CONCURRENCY
+
+keepalive = 5
+timeout = 60
+graceful_timeout = 30
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    """Create the schema and refresh usage stats once in the master, before any worker starts."""
+    from src.core.database import engine, init_db
+    from src.services.device_usage_stats import refresh_device_usage_stats
+
+    async def prepare():
+        try:
+            await init_db()
+            await refresh_device_usage_stats()
+            await _check_connection_budget(server, engine)
+        finally:
+            # Forked workers must open their own connections on their own event loop
+            await engine.dispose()
+
+    asyncio.run(prepare())
+    # Inherited by the workers; their lifespan skips the DDL and the initial refresh
+    os.environ["DB_PREPARED"] = "1"
+
+
+async def _check_connection_budget(server, engine):
+    """Warn when the workers' pools can open more connections than Postgres allows."""
+    from sqlalchemy import text
+
+    if settings.DB_PGBOUNCER:
+        return  # PgBouncer caps server connections itself
+    async with engine.connect() as conn:
+        max_connections = int((await conn.execute(text("SHOW max_connections"))).scalar())
+    budget = workers * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    if budget > max_connections:
+        server.log.warning(
+            "%d workers x (DB_POOL_SIZE %d + DB_MAX_OVERFLOW %d) = %d connections exceeds "
+            "Postgres max_connections=%d; lower WEB_CONCURRENCY or the pool sizes",
+            workers, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, budget, max_connections,
+        )
@@ -1,24 +1,43 @@
 """FastAPI application with authentication and session management."""
 
+import asyncio
 import logging
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager, suppress
+import orjson
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from src.core.config import settings
-from src.core.database import init_db
-from src.core.redis import init_redis, close_redis
+from src.core.database import init_db, warm_up_pool
+from src.core.redis import init_redis_with_retry, close_redis
 from src.api.router import api_router
 from src.middleware.error_handler import add_error_handlers
 from src.middleware.rate_limiting import add_rate_limiting
+from src.middleware.health import add_health_check
+from src.middleware.compression import ExportAwareGZipMiddleware
 from src.utils.logging import setup_logging
 from src.services.loan_scheduler import loan_scheduler
+from src.utils.process_pool import shutdown_export_executor
+from src.services.device_usage_stats import schedule_device_usage_refresh
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+
+# Static payloads, serialized once at import time
+_ROOT_BYTES = orjson.dumps({
+    "message": f"Welcome to {settings.PROJECT_NAME}",
+    "version": settings.VERSION,
+    "docs": "/docs" if settings.DEBUG else "Documentation disabled in production"
+})
+_HEALTH_BYTES = orjson.dumps({
+    "status": "healthy",
+    "service": settings.PROJECT_NAME,
+    "version": settings.VERSION
+})
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -26,18 +45,31 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting FastAPI application...")
     
-    # Initialize database
-    await init_db()
+    # Initialize database, unless gunicorn's master already did it once before forking
+    db_prepared = os.getenv("DB_PREPARED") == "1"
+    if not db_prepared:
+        await init_db()
+    await warm_up_pool()
     logger.info("✅ Database initialized")
     
-    # Initialize Redis
-    await init_redis()
-    logger.info("✅ Redis initialized")
+    # Catch up on loan changes made while the app was down
+    if not db_prepared:
+        schedule_device_usage_refresh()
+    
+    # Initialize Redis in the background so a slow Redis doesn't block startup;
+    # /ready reports 503 until this finishes
+    redis_task = asyncio.create_task(init_redis_with_retry())
+    app.state.redis_task = redis_task
+    logger.info("⏳ Redis initialization scheduled")
     
     # ✅ START SCHEDULER
     loan_scheduler.start()
     logger.info("✅ Loan scheduler started")
     
+    # Build the OpenAPI schema now instead of on the first /openapi.json hit
+    if app.openapi_url:
+        app.openapi()
+    
     yield
     
     # Shutdown
@@ -47,7 +79,13 @@ async def lifespan(app: FastAPI):
     loan_scheduler.shutdown()
     logger.info("✅ Loan scheduler stopped")
     
+    # Stop the Excel/PDF export worker processes
+    shutdown_export_executor()
+    
     # Close Redis connection
+    redis_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await redis_task
     await close_redis()
     logger.info("✅ Redis connection closed")
 
@@ -59,8 +97,10 @@ def create_application() -> FastAPI:
         version=settings.VERSION,
         debug=settings.DEBUG,
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
         docs_url="/docs" if settings.DEBUG else None,
         redoc_url="/redoc" if settings.DEBUG else None,
+        openapi_url="/openapi.json" if settings.DEBUG or settings.EXPOSE_OPENAPI else None,
     )
 
     # CORS middleware
@@ -70,8 +110,13 @@ def create_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=settings.CORS_METHODS_LIST,
         allow_headers=settings.CORS_HEADERS_LIST,
+        max_age=settings.CORS_MAX_AGE,
     )
 
+    # Compress larger JSON payloads (session lists, error details); /export and
+    # /{id}/export-pdf downloads go out as-is with their Content-Length
+    app.add_middleware(ExportAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
     # Add rate limiting middleware
     add_rate_limiting(app)
 
@@ -81,27 +126,34 @@ def create_application() -> FastAPI:
     # Include API router
     app.include_router(api_router, prefix=settings.API_V1_STR)
 
-    # Mount static folder (for serving uploaded files)
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    # Mount static folder (for serving uploaded files) in development only;
+    # in production /static is served by the reverse proxy (see nginx.conf.example)
+    if settings.DEBUG:
+        app.mount("/static", StaticFiles(directory="static"), name="static")
 
     @app.get("/")
     async def root():
         """Root endpoint."""
+        return Response(content=_ROOT_BYTES, media_type="application/json")
+
+    @app.get("/ready")
+    async def readiness_check(request: Request):
+        """Readiness endpoint - 503 until background Redis init completes."""
+        redis_task = getattr(request.app.state, "redis_task", None)
+        if redis_task is None or not redis_task.done():
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"status": "starting", "service": settings.PROJECT_NAME}
+            )
         return {
-            "message": f"Welcome to {settings.PROJECT_NAME}",
-            "version": settings.VERSION,
-            "docs": "/docs" if settings.DEBUG else "Documentation disabled in production"
-        }
-
-    @app.get("/health")
-    async def health_check():
-        """Health check endpoint."""
-        return {
-            "status": "healthy",
+            "status": "ready",
             "service": settings.PROJECT_NAME,
             "version": settings.VERSION
         }
 
+    # Health probes are answered before CORS, GZip and rate limiting (must be added last)
+    add_health_check(app, path="/health", body=_HEALTH_BYTES)
+
     return app
 
 
@@ -112,10 +164,14 @@ app = create_application()
 if __name__ == "__main__":
     import uvicorn
     
+    # reload and workers are mutually exclusive in Uvicorn
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
+        workers=None if settings.DEBUG else settings.WEB_CONCURRENCY,
+        loop="auto",  # uvloop when installed (not available on Windows)
+        http="httptools",
         log_level="info"
     )
\ No newline at end of file
@@ -8,14 +8,17 @@ if __name__ == "__main__":
     # Ensure we can import from src
     sys.path.append(os.path.dirname(__file__))
     
-    # Import and run the app
-    from main import app
+    from src.core.config import settings
     
+    # Reload only in DEBUG; otherwise fan out to WEB_CONCURRENCY workers
     uvicorn.run(
-        app,
+        "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=settings.DEBUG,
+        workers=None if settings.DEBUG else settings.WEB_CONCURRENCY,
+        loop="auto",  # uvloop when installed (not available on Windows)
+        http="httptools",
         log_level="info",
         access_log=True
     )
\ No newline at end of file
@@ -7,13 +7,14 @@ If an admin already exists, this script will NOT overwrite anything.
 """
 
 import asyncio
-import bcrypt
 import os
+from sqlalchemy import exists
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from dotenv import load_dotenv
 
 from src.core.database import async_session, create_db_and_tables
+from src.auth.jwt import get_password_hash_async
 from src.models.user import User, Role, UserRole
 
 # Load environment variables (for ADMIN_EMAIL and ADMIN_PASSWORD)
@@ -33,13 +34,19 @@ async def create_basic_roles(session):
         {"name": "user", "description": "Regular user with basic access"},
     ]
 
+    # One IN query for all roles instead of a SELECT per role
+    names = [role_data["name"] for role_data in roles_to_create]
+    result = await session.execute(select(Role.name).where(Role.name.in_(names)))
+    existing = set(result.scalars().all())
+
+    new_roles = [Role(**role_data) for role_data in roles_to_create if role_data["name"] not in existing]
+    session.add_all(new_roles)
+
     for role_data in roles_to_create:
-        result = await session.execute(select(Role).where(Role.name == role_data["name"]))
-        if not result.scalars().first():
-            session.add(Role(**role_data))
-            print(f"✅ Created role: {role_data['name']}")
-        else:
+        if role_data["name"] in existing:
             print(f"ℹ️ Role '{role_data['name']}' already exists")
+        else:
+            print(f"✅ Created role: {role_data['name']}")
 
     await session.commit()
 
@@ -56,21 +63,19 @@ async def create_admin_user(session):
         await session.refresh(admin_role)
         print("✅ Created admin role")
 
-    # Check if any admin user already exists
+    # Check if any admin user already exists (EXISTS - no user row is loaded)
     result = await session.execute(
-        select(User).join(UserRole).join(Role).where(Role.name == "admin")
+        select(exists().where(UserRole.role_id == admin_role.id))
     )
-    existing_admin = result.scalars().first()
+    has_admin = result.scalar()
 
-    if existing_admin:
-        print(f"ℹ️ Admin already exists with email: {existing_admin.email}")
+    if has_admin:
+        print("ℹ️ Admin already exists")
         print("🔒 Seeder will NOT overwrite existing admin credentials.")
         return
 
-    # Create default admin
-    hashed_password = bcrypt.hashpw(
-        DEFAULT_ADMIN_PASSWORD.encode("utf-8"), bcrypt.gensalt()
-    ).decode("utf-8")
+    # Create default admin (hashed off the event loop with the app's argon2 context)
+    hashed_password = await get_password_hash_async(DEFAULT_ADMIN_PASSWORD)
 
     admin_user = User(
         username=DEFAULT_ADMIN_USERNAME,  # 👈 ubah ke username
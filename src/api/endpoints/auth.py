@@ -1,8 +1,10 @@
 """Authentication endpoints with password security features and session management."""
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
 
 from src.core.database import get_db
 from src.repositories.user import UserRepository
@@ -13,18 +15,23 @@ from src.schemas.user import (
     PasswordReset, PasswordResetConfirm, PasswordStrengthCheck, PasswordStrengthResponse
 )
 from src.schemas.common import StatusMessage, SuccessResponse
-from src.auth.permissions import get_current_active_user, require_permission
+from src.auth.permissions import (
+    get_current_active_user, get_current_session_id, require_permission, invalidate_user_cache
+)
 from src.auth.role_permissions import Permission
 from src.utils.sessions import device_session_manager
 
 router = APIRouter()
 
 
-async def get_auth_service(session: AsyncSession = Depends(get_db)) -> AuthService:
-    """Get auth service dependency."""
-    user_repo = UserRepository(session)
-    user_service = UserService(user_repo)
-    return AuthService(user_service, session)
+async def _stream_sessions(sessions: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    """Emit a SuccessResponse-shaped JSON body one session at a time."""
+    yield b'{"success":true,"message":"Sessions retrieved successfully","data":{"sessions":['
+    separator = b""
+    async for session in sessions:
+        yield separator + orjson.dumps(session)
+        separator = b","
+    yield b"]}}"
 
 
 async def get_user_service(session: AsyncSession = Depends(get_db)) -> UserService:
@@ -33,6 +40,14 @@ async def get_user_service(session: AsyncSession = Depends(get_db)) -> UserServi
     return UserService(user_repo)
 
 
+async def get_auth_service(
+    session: AsyncSession = Depends(get_db),
+    user_service: UserService = Depends(get_user_service)
+) -> AuthService:
+    """Get auth service dependency (shares the request's cached UserService)."""
+    return AuthService(user_service, session)
+
+
 # ============================================================================
 # PUBLIC ENDPOINTS - No authentication required
 # ============================================================================
@@ -143,15 +158,21 @@ async def change_password(
 
 @router.post("/logout", response_model=SuccessResponse)
 async def logout(
-    session_id: str,
+    session_id: Optional[str] = Depends(get_current_session_id),
     auth_service: AuthService = Depends(get_auth_service)
 ):
     """
-    Logout from current session.
+    Logout from current session (taken from the access token's `sid` claim).
     
     **Permission Required:** Authenticated user
     **Roles:** admin, manager, user
     """
+    if not session_id:
+        return SuccessResponse(
+            success=True,
+            message="Session not found or already expired"
+        )
+    
     result = await auth_service.logout(session_id)
     return SuccessResponse(
         success=True,
@@ -182,15 +203,25 @@ async def logout_all_devices(
 async def revoke_session(
     session_id: str,
     current_user: dict = Depends(get_current_active_user),
+    current_session_id: Optional[str] = Depends(get_current_session_id),
     auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     Revoke a specific session.
     
-    **Permission Required:** Authenticated user
+    **Permission Required:** Authenticated user (own sessions), admin (any session)
     **Roles:** admin, manager, user
     """
+    is_own_session = session_id == current_session_id
+    if not is_own_session and "admin" not in current_user.get("roles", []):
+        if not await auth_service.user_owns_session(current_user["id"], session_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+    
     result = await auth_service.revoke_session(session_id)
+    await invalidate_user_cache(current_user["id"])
     return SuccessResponse(
         success=True,
         message=result["message"]
@@ -207,12 +238,8 @@ async def get_user_sessions(
     **Permission Required:** Authenticated user
     **Roles:** admin, manager, user
     """
-    sessions = await device_session_manager.get_user_session_details(current_user["id"])
-    return SuccessResponse(
-        success=True,
-        message="Sessions retrieved successfully",
-        data={"sessions": sessions}
-    )
+    sessions = device_session_manager.iter_user_session_details(current_user["id"])
+    return StreamingResponse(_stream_sessions(sessions), media_type="application/json")
 
 
 # ============================================================================
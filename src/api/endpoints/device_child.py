@@ -1,7 +1,7 @@
 """Endpoints for managing child devices with permission-based authorization."""
 
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
@@ -9,7 +9,8 @@ from src.repositories.device import DeviceRepository
 from src.repositories.device_child import DeviceChildRepository
 from src.services.device_child import DeviceChildService
 from src.schemas.device_child import (
-    DeviceChildResponse, DeviceChildCreate, DeviceChildUpdate, DeviceChildListResponse
+    DeviceChildResponse, DeviceChildCreate, DeviceChildUpdate, DeviceChildListResponse,
+    DeviceChildFilters
 )
 
 from src.auth.permissions import (
@@ -19,29 +20,35 @@ from src.auth.permissions import (
     require_roles
 )
 from src.auth.role_permissions import Permission
+from src.utils.etag import etag_matches, make_etag, not_modified
 
 router = APIRouter()
 
+# Permission guards, built once and shared by the routes below
+_DEP_VIEW = Depends(require_permission(Permission.DEVICE_CHILD_VIEW))
+_DEP_CREATE = Depends(require_permission(Permission.DEVICE_CHILD_CREATE))
+_DEP_UPDATE = Depends(require_permission(Permission.DEVICE_CHILD_UPDATE))
+_DEP_DELETE = Depends(require_permission(Permission.DEVICE_CHILD_DELETE))
+
 
 async def get_device_child_service(session: AsyncSession = Depends(get_db)) -> DeviceChildService:
-    """Get device child service dependency."""
-    device_child_repo = DeviceChildRepository(session)
-    device_repo = DeviceRepository(session)
-    return DeviceChildService(device_child_repo, device_repo)
+    """Get device child service dependency (one instance per request session)."""
+    service = session.info.get("device_child_service")
+    if service is None:
+        device_child_repo = DeviceChildRepository(session)
+        device_repo = DeviceRepository(session)
+        service = DeviceChildService(device_child_repo, device_repo)
+        session.info["device_child_service"] = service
+    return service
 
 
 # ============================================================================
 # READ OPERATIONS - All authenticated users
 # ============================================================================
 
-@router.get("/", response_model=DeviceChildListResponse, dependencies=[Depends(require_permission(Permission.DEVICE_CHILD_VIEW))])
+@router.get("/", response_model=DeviceChildListResponse, dependencies=[_DEP_VIEW])
 async def get_all_children(
-    parent_id: Optional[int] = Query(None, description="Filter by parent device ID"),
-    device_name: Optional[str] = Query(None, description="Filter by device name"),
-    device_code: Optional[str] = Query(None, description="Filter by device code"),
-    nup_device: Optional[str] = Query(None, description="Filter by NUP device"),
-    device_status: Optional[str] = Query(None, description="Filter by device status"),
-    device_condition: Optional[str] = Query(None, description="Filter by device condition"),
+    filters: DeviceChildFilters = Depends(),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     service: DeviceChildService = Depends(get_device_child_service)
@@ -52,25 +59,11 @@ async def get_all_children(
     **Permission Required:** DEVICE_CHILD_VIEW
     **Roles:** admin, manager, user
     """
-    filters = {}
-    if parent_id is not None:
-        filters["parent_id"] = parent_id
-    if device_name:
-        filters["device_name"] = device_name
-    if device_code:
-        filters["device_code"] = device_code
-    if nup_device:
-        filters["nup_device"] = nup_device
-    if device_status:
-        filters["device_status"] = device_status
-    if device_condition:
-        filters["device_condition"] = device_condition
-
     skip = (page - 1) * page_size
-    return await service.get_all_children(skip, page_size, filters)
+    return await service.get_all_children(skip, page_size, filters.model_dump(exclude_none=True))
 
 
-@router.get("/search", response_model=DeviceChildListResponse, dependencies=[Depends(require_permission(Permission.DEVICE_CHILD_VIEW))])
+@router.get("/search", response_model=DeviceChildListResponse, dependencies=[_DEP_VIEW])
 async def search_children(
     q: str = Query(..., description="Search term (name, code, NUP)"),
     limit: int = Query(10, ge=1, le=50),
@@ -85,9 +78,11 @@ async def search_children(
     return await service.search_children(q, limit)
 
 
-@router.get("/{child_id}", response_model=DeviceChildResponse, dependencies=[Depends(require_permission(Permission.DEVICE_CHILD_VIEW))])
+@router.get("/{child_id}", response_model=DeviceChildResponse, dependencies=[_DEP_VIEW])
 async def get_child_by_id(
     child_id: int,
+    request: Request,
+    response: Response,
     service: DeviceChildService = Depends(get_device_child_service)
 ):
     """
@@ -95,14 +90,21 @@ async def get_child_by_id(
     
     **Permission Required:** DEVICE_CHILD_VIEW
     **Roles:** admin, manager, user
+    
+    Supports `If-None-Match`: returns 304 when the child is unchanged.
     """
     child = await service.get_child(child_id)
     if not child:
         raise HTTPException(status_code=404, detail="Child device not found")
+    
+    etag = make_etag(child.id, child.updated_at.timestamp())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return child
 
 
-@router.get("/{child_id}/photos", response_model=List[str], dependencies=[Depends(require_permission(Permission.DEVICE_CHILD_VIEW))])
+@router.get("/{child_id}/photos", response_model=List[str], dependencies=[_DEP_VIEW])
 async def get_child_photos(
     child_id: int,
     service: DeviceChildService = Depends(get_device_child_service)
@@ -120,7 +122,7 @@ async def get_child_photos(
 # CREATE OPERATIONS - Admin only
 # ============================================================================
 
-@router.post("/", response_model=DeviceChildResponse, dependencies=[Depends(require_permission(Permission.DEVICE_CHILD_CREATE))])
+@router.post("/", response_model=DeviceChildResponse, dependencies=[_DEP_CREATE])
 async def create_child(
     child_data: DeviceChildCreate,
     service: DeviceChildService = Depends(get_device_child_service)
@@ -134,7 +136,7 @@ async def create_child(
     return await service.create_child(child_data)
 
 
-@router.post("/{child_id}/photos", response_model=DeviceChildResponse, dependencies=[Depends(require_permission(Permission.DEVICE_CHILD_UPDATE))])
+@router.post("/{child_id}/photos", response_model=DeviceChildResponse, dependencies=[_DEP_UPDATE])
 async def upload_child_photo(
     child_id: int,
     file: UploadFile = File(...),
@@ -153,7 +155,7 @@ async def upload_child_photo(
 # UPDATE OPERATIONS - Admin only
 # ============================================================================
 
-@router.put("/{child_id}", response_model=DeviceChildResponse, dependencies=[Depends(require_permission(Permission.DEVICE_CHILD_UPDATE))])
+@router.put("/{child_id}", response_model=DeviceChildResponse, dependencies=[_DEP_UPDATE])
 async def update_child(
     child_id: int,
     update_data: DeviceChildUpdate,
@@ -175,7 +177,7 @@ async def update_child(
 # DELETE OPERATIONS - Admin only
 # ============================================================================
 
-@router.delete("/{child_id}", dependencies=[Depends(require_permission(Permission.DEVICE_CHILD_DELETE))])
+@router.delete("/{child_id}", dependencies=[_DEP_DELETE])
 async def delete_child(
     child_id: int,
     service: DeviceChildService = Depends(get_device_child_service)
@@ -192,7 +194,7 @@ async def delete_child(
     return {"message": "Child device deleted successfully"}
 
 
-@router.delete("/{child_id}/photos/{filename}", response_model=DeviceChildResponse, dependencies=[Depends(require_permission(Permission.DEVICE_CHILD_UPDATE))])
+@router.delete("/{child_id}/photos/{filename}", response_model=DeviceChildResponse, dependencies=[_DEP_UPDATE])
 async def delete_child_photo(
     child_id: int,
     filename: str,
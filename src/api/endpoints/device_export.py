@@ -4,33 +4,66 @@ Device Export Endpoints with permission-based authorization.
 from fastapi import APIRouter, Depends, Query, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, Dict, Any, Union
+from typing import Optional, List
 from datetime import datetime
 import logging
-import traceback
+import re
 
 from src.core.database import get_db
 from src.services.device_export_service import DeviceExportService
-from src.auth.permissions import get_current_active_user, require_permission
+from src.auth.permissions import get_current_username, require_permission
 from src.auth.role_permissions import Permission
-from src.models.user import User
+from src.utils.files import iter_buffer
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Permission guards, built once and shared by the routes below
+_DEP_EXPORT_USAGE = Depends(require_permission(Permission.EXPORT_DEVICE_USAGE))
+_DEP_EXPORT_EXCEL = Depends(require_permission(Permission.EXPORT_EXCEL))
+
+# "1,2, 3" - validated in one C-level match before converting
+_DEVICE_IDS_RE = re.compile(r"\s*\d+\s*(?:,\s*\d+\s*)*")
+
+
+_FILENAME_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+
+def _build_filename(prefix: str, year: Optional[int], month: Optional[int], filtered: bool) -> str:
+    """Build the download filename, e.g. device_usage_report_2024_03_filtered_20240301_120000.xlsx."""
+    return (
+        f"{prefix}"
+        f"{f'_{year}' if year else ''}"
+        f"{f'_{month:02d}' if month else ''}"
+        f"{'_filtered' if filtered else ''}"
+        f"_{datetime.now().strftime(_FILENAME_TIMESTAMP_FORMAT)}.xlsx"
+    )
+
+
+def _parse_device_ids(device_ids: Optional[str]) -> Optional[List[int]]:
+    """Parse a comma-separated device ID filter, raising 400 on bad input."""
+    if not device_ids:
+        return None
+    if not _DEVICE_IDS_RE.fullmatch(device_ids):
+        raise HTTPException(
+            status_code=400, 
+            detail="Invalid device_ids format. Must be comma-separated integers."
+        )
+    return list(map(int, device_ids.split(",")))
+
 
 # ============================================================================
 # DEVICE EXPORT - Admin and Manager
 # ============================================================================
 
-@router.get("/excel", dependencies=[Depends(require_permission(Permission.EXPORT_DEVICE_USAGE))])
+@router.get("/excel", dependencies=[_DEP_EXPORT_USAGE])
 async def export_devices_to_excel(
     year: Optional[int] = Query(None, description="Filter by specific year"),
     month: Optional[int] = Query(None, ge=1, le=12, description="Filter by specific month (1-12)"),
     device_ids: Optional[str] = Query(None, description="Comma-separated device IDs to filter"),
-    current_user: Union[User, Dict[str, Any]] = Depends(get_current_active_user),
+    username: str = Depends(get_current_username),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -47,25 +80,14 @@ async def export_devices_to_excel(
     **Response:**
     - Excel file (.xlsx) with device usage statistics
     """
-    # Handle both User object and dict
-    username = current_user.username if hasattr(current_user, 'username') else current_user.get('username', 'Unknown')
-    
-    logger.info(f"📥 Export request from user: {username}")
-    logger.info(f"   Filters - year: {year}, month: {month}, device_ids: {device_ids}")
+    logger.info("📥 Export request from user: %s", username)
+    logger.info("   Filters - year: %s, month: %s, device_ids: %s", year, month, device_ids)
     
     try:
         # Parse device IDs if provided
-        parsed_device_ids = None
-        if device_ids:
-            try:
-                parsed_device_ids = [int(id.strip()) for id in device_ids.split(",")]
-                logger.info(f"   Parsed device IDs: {parsed_device_ids}")
-            except ValueError as ve:
-                logger.error(f"❌ Invalid device_ids format: {ve}")
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Invalid device_ids format. Must be comma-separated integers."
-                )
+        parsed_device_ids = _parse_device_ids(device_ids)
+        if parsed_device_ids:
+            logger.info("   Parsed device IDs: %s", parsed_device_ids)
         
         # Validate month requires year
         if month and not year:
@@ -87,36 +109,27 @@ async def export_devices_to_excel(
                 month=month,
                 device_ids=parsed_device_ids
             )
-            logger.info(f"✅ Excel generated successfully: {excel_buffer.getbuffer().nbytes} bytes")
+            logger.info("✅ Excel generated successfully: %d bytes", excel_buffer.getbuffer().nbytes)
             
         except Exception as e:
-            logger.error(f"❌ Error during Excel generation: {str(e)}")
-            logger.error(f"   Exception type: {type(e).__name__}")
-            logger.error(f"   Traceback:\n{traceback.format_exc()}")
+            logger.error("❌ Error during Excel generation (%s): %s", type(e).__name__, e, exc_info=True)
             raise HTTPException(
                 status_code=500, 
                 detail=f"Failed to generate Excel file: {str(e)}"
             )
         
         # Generate filename
-        filename_parts = ["device_usage_report"]
-        if year:
-            filename_parts.append(f"{year}")
-        if month:
-            filename_parts.append(f"{month:02d}")
-        if parsed_device_ids:
-            filename_parts.append("filtered")
-        filename_parts.append(datetime.now().strftime("%Y%m%d_%H%M%S"))
-        filename = "_".join(filename_parts) + ".xlsx"
+        filename = _build_filename("device_usage_report", year, month, bool(parsed_device_ids))
         
-        logger.info(f"📤 Sending file: {filename}")
+        logger.info("📤 Sending file: %s", filename)
         
         # Return as downloadable file
         return StreamingResponse(
-            excel_buffer,
+            iter_buffer(excel_buffer),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={
-                "Content-Disposition": f"attachment; filename={filename}"
+                "Content-Disposition": f"attachment; filename={filename}",
+                "Content-Length": str(excel_buffer.getbuffer().nbytes)
             }
         )
         
@@ -125,9 +138,7 @@ async def export_devices_to_excel(
         raise
     except Exception as e:
         # Catch any unexpected errors
-        logger.error(f"💥 Unexpected error in export endpoint: {str(e)}")
-        logger.error(f"   Exception type: {type(e).__name__}")
-        logger.error(f"   Traceback:\n{traceback.format_exc()}")
+        logger.error("💥 Unexpected error in export endpoint (%s): %s", type(e).__name__, e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
@@ -138,12 +149,12 @@ async def export_devices_to_excel(
 # ADMIN-ONLY EXPORT - Admin Only
 # ============================================================================
 
-@router.get("/excel/admin", dependencies=[Depends(require_permission(Permission.EXPORT_EXCEL))])
+@router.get("/excel/admin", dependencies=[_DEP_EXPORT_EXCEL])
 async def export_devices_to_excel_admin(
     year: Optional[int] = Query(None, description="Filter by specific year"),
     month: Optional[int] = Query(None, ge=1, le=12, description="Filter by specific month (1-12)"),
     device_ids: Optional[str] = Query(None, description="Comma-separated device IDs to filter"),
-    current_user: Union[User, Dict[str, Any]] = Depends(get_current_active_user),
+    username: str = Depends(get_current_username),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -160,22 +171,11 @@ async def export_devices_to_excel_admin(
     **Response:**
     - Excel file (.xlsx) with device usage statistics (admin version with additional data)
     """
-    # Handle both User object and dict
-    username = current_user.username if hasattr(current_user, 'username') else current_user.get('username', 'Unknown')
-    
-    logger.info(f"📥 Admin export request from user: {username}")
+    logger.info("📥 Admin export request from user: %s", username)
     
     try:
         # Parse device IDs if provided
-        parsed_device_ids = None
-        if device_ids:
-            try:
-                parsed_device_ids = [int(id.strip()) for id in device_ids.split(",")]
-            except ValueError:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Invalid device_ids format. Must be comma-separated integers."
-                )
+        parsed_device_ids = _parse_device_ids(device_ids)
         
         # Validate month requires year
         if month and not year:
@@ -195,38 +195,29 @@ async def export_devices_to_excel_admin(
                 device_ids=parsed_device_ids
             )
         except Exception as e:
-            logger.error(f"❌ Admin export error: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.error("❌ Admin export error: %s", e, exc_info=True)
             raise HTTPException(
                 status_code=500, 
                 detail=f"Failed to generate Excel file: {str(e)}"
             )
         
         # Generate filename
-        filename_parts = ["device_usage_report_admin"]
-        if year:
-            filename_parts.append(f"{year}")
-        if month:
-            filename_parts.append(f"{month:02d}")
-        if parsed_device_ids:
-            filename_parts.append("filtered")
-        filename_parts.append(datetime.now().strftime("%Y%m%d_%H%M%S"))
-        filename = "_".join(filename_parts) + ".xlsx"
+        filename = _build_filename("device_usage_report_admin", year, month, bool(parsed_device_ids))
         
         # Return as downloadable file
         return StreamingResponse(
-            excel_buffer,
+            iter_buffer(excel_buffer),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={
-                "Content-Disposition": f"attachment; filename={filename}"
+                "Content-Disposition": f"attachment; filename={filename}",
+                "Content-Length": str(excel_buffer.getbuffer().nbytes)
             }
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"💥 Unexpected admin export error: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.error("💥 Unexpected admin export error: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
@@ -1,7 +1,7 @@
 """Device Group API endpoints with permission-based authorization."""
 
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
@@ -15,18 +15,23 @@ from src.schemas.device_group import (
     DeviceGroupAddDevices, DeviceGroupRemoveDevices,
     DeviceGroupBorrowRequest, DeviceGroupBorrowResponse
 )
-from src.auth.permissions import get_current_active_user, require_permission
+from src.auth.permissions import get_current_user_id, require_permission
 from src.auth.role_permissions import Permission
+from src.utils.etag import checksum, etag_matches, make_etag, not_modified
 
 router = APIRouter()
 
 
 async def get_device_group_service(session: AsyncSession = Depends(get_db)) -> DeviceGroupService:
-    """Get device group service dependency."""
-    device_group_repo = DeviceGroupRepository(session)
-    loan_repo = LoanRepository(session)
-    device_repo = DeviceRepository(session)
-    return DeviceGroupService(device_group_repo, loan_repo, device_repo)
+    """Get device group service dependency (one instance per request session)."""
+    service = session.info.get("device_group_service")
+    if service is None:
+        device_group_repo = DeviceGroupRepository(session)
+        loan_repo = LoanRepository(session)
+        device_repo = DeviceRepository(session)
+        service = DeviceGroupService(device_group_repo, loan_repo, device_repo)
+        session.info["device_group_service"] = service
+    return service
 
 
 # ============================================================================
@@ -38,7 +43,7 @@ async def get_user_device_groups(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     name: Optional[str] = Query(None, description="Filter by group name"),
-    current_user: dict = Depends(get_current_active_user),
+    user_id: int = Depends(get_current_user_id),
     service: DeviceGroupService = Depends(get_device_group_service)
 ):
     """
@@ -52,7 +57,7 @@ async def get_user_device_groups(
     - **name**: Filter by group name (optional)
     """
     return await service.get_user_groups(
-        current_user["id"], 
+        user_id, 
         page, 
         page_size, 
         name
@@ -62,7 +67,9 @@ async def get_user_device_groups(
 @router.get("/{group_id}", response_model=DeviceGroupDetailResponse, dependencies=[Depends(require_permission(Permission.DEVICE_GROUP_VIEW))])
 async def get_device_group(
     group_id: int,
-    current_user: dict = Depends(get_current_active_user),
+    request: Request,
+    response: Response,
+    user_id: int = Depends(get_current_user_id),
     service: DeviceGroupService = Depends(get_device_group_service)
 ):
     """
@@ -76,14 +83,28 @@ async def get_device_group(
     - All devices in the group
     - Availability status of each device
     - Overall availability status
+    
+    Supports `If-None-Match`: returns 304 when neither the group nor its devices changed.
     """
-    return await service.get_group(group_id, current_user["id"])
+    group = await service.get_group(group_id, user_id)
+    
+    # group.updated_at doesn't move when members change or a member is borrowed,
+    # so the member rows are folded into the tag as well
+    etag = make_etag(
+        group.id,
+        group.updated_at.timestamp(),
+        checksum(*[(d.id, d.device_name, d.device_code, d.device_status, d.device_condition) for d in group.devices])
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return group
 
 
 @router.get("/{group_id}/check-availability", dependencies=[Depends(require_permission(Permission.DEVICE_GROUP_VIEW))])
 async def check_group_availability(
     group_id: int,
-    current_user: dict = Depends(get_current_active_user),
+    user_id: int = Depends(get_current_user_id),
     service: DeviceGroupService = Depends(get_device_group_service)
 ):
     """
@@ -98,7 +119,7 @@ async def check_group_availability(
     - **total_devices**: Total number of devices in the group
     - **available_count**: Number of available devices
     """
-    group = await service.get_group(group_id, current_user["id"])
+    group = await service.get_group(group_id, user_id)
     
     return {
         "group_id": group_id,
@@ -117,7 +138,7 @@ async def check_group_availability(
 @router.post("/", response_model=DeviceGroupDetailResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permission(Permission.DEVICE_GROUP_CREATE))])
 async def create_device_group(
     group_data: DeviceGroupCreate,
-    current_user: dict = Depends(get_current_active_user),
+    user_id: int = Depends(get_current_user_id),
     service: DeviceGroupService = Depends(get_device_group_service)
 ):
     """
@@ -131,7 +152,7 @@ async def create_device_group(
     - **device_ids**: List of parent device IDs to add (optional)
     - **child_device_ids**: List of child device IDs to add (optional)
     """
-    return await service.create_group(group_data, current_user["id"])
+    return await service.create_group(group_data, user_id)
 
 
 # ============================================================================
@@ -142,7 +163,7 @@ async def create_device_group(
 async def update_device_group(
     group_id: int,
     update_data: DeviceGroupUpdate,
-    current_user: dict = Depends(get_current_active_user),
+    user_id: int = Depends(get_current_user_id),
     service: DeviceGroupService = Depends(get_device_group_service)
 ):
     """
@@ -154,14 +175,14 @@ async def update_device_group(
     - **name**: New group name (optional)
     - **description**: New group description (optional)
     """
-    return await service.update_group(group_id, update_data, current_user["id"])
+    return await service.update_group(group_id, update_data, user_id)
 
 
 @router.post("/{group_id}/devices", response_model=DeviceGroupDetailResponse, dependencies=[Depends(require_permission(Permission.DEVICE_GROUP_UPDATE))])
 async def add_devices_to_group(
     group_id: int,
     devices_data: DeviceGroupAddDevices,
-    current_user: dict = Depends(get_current_active_user),
+    user_id: int = Depends(get_current_user_id),
     service: DeviceGroupService = Depends(get_device_group_service)
 ):
     """
@@ -175,14 +196,14 @@ async def add_devices_to_group(
     
     Devices that are already in the group will be skipped.
     """
-    return await service.add_devices_to_group(group_id, devices_data, current_user["id"])
+    return await service.add_devices_to_group(group_id, devices_data, user_id)
 
 
 @router.delete("/{group_id}/devices", response_model=DeviceGroupDetailResponse, dependencies=[Depends(require_permission(Permission.DEVICE_GROUP_UPDATE))])
 async def remove_devices_from_group(
     group_id: int,
     devices_data: DeviceGroupRemoveDevices,
-    current_user: dict = Depends(get_current_active_user),
+    user_id: int = Depends(get_current_user_id),
     service: DeviceGroupService = Depends(get_device_group_service)
 ):
     """
@@ -194,7 +215,7 @@ async def remove_devices_from_group(
     - **device_ids**: List of parent device IDs to remove
     - **child_device_ids**: List of child device IDs to remove
     """
-    return await service.remove_devices_from_group(group_id, devices_data, current_user["id"])
+    return await service.remove_devices_from_group(group_id, devices_data, user_id)
 
 
 # ============================================================================
@@ -204,7 +225,7 @@ async def remove_devices_from_group(
 @router.delete("/{group_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_permission(Permission.DEVICE_GROUP_DELETE))])
 async def delete_device_group(
     group_id: int,
-    current_user: dict = Depends(get_current_active_user),
+    user_id: int = Depends(get_current_user_id),
     service: DeviceGroupService = Depends(get_device_group_service)
 ):
     """
@@ -216,7 +237,7 @@ async def delete_device_group(
     This will remove the group and all device associations.
     The devices themselves will not be deleted.
     """
-    success = await service.delete_group(group_id, current_user["id"])
+    success = await service.delete_group(group_id, user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -233,7 +254,7 @@ async def delete_device_group(
 async def borrow_group_devices(
     group_id: int,
     borrow_data: DeviceGroupBorrowRequest,
-    current_user: dict = Depends(get_current_active_user),
+    user_id: int = Depends(get_current_user_id),
     service: DeviceGroupService = Depends(get_device_group_service)
 ):
     """
@@ -267,4 +288,4 @@ async def borrow_group_devices(
     - **pihak_1_id**: Responsible party ID (optional)
     - **pihak_2_id**: Acknowledging party ID (optional)
     """
-    return await service.borrow_group_devices(group_id, borrow_data, current_user["id"])
\ No newline at end of file
+    return await service.borrow_group_devices(group_id, borrow_data, user_id)
\ No newline at end of file
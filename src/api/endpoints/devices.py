@@ -1,12 +1,16 @@
 """Comprehensive device management endpoints with permission-based authorization."""
 
-from typing import Optional, List, Dict
-from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile
+import time
+from datetime import date
+from typing import Optional, List, Dict, Literal
+from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.config import settings
 from src.core.database import get_db
 from src.repositories.device import DeviceRepository
-from src.services.device import DeviceService
+from src.services.device import DeviceService, STATS_CACHE_TTL
 from src.schemas.device import (
     DeviceResponse, DeviceCreate, DeviceUpdate, DeviceListResponse,
     DeviceStats, DeviceConditionUpdate, DeviceStatusUpdate,
@@ -20,21 +24,77 @@ from src.auth.permissions import (
     require_roles
 )
 from src.auth.role_permissions import Permission
+from src.utils.etag import checksum, etag_matches, make_etag, not_modified
 
 router = APIRouter()
 
+# Permission guards, built once and shared by the routes below
+_DEP_VIEW = Depends(require_permission(Permission.DEVICE_VIEW))
+_DEP_CREATE = Depends(require_permission(Permission.DEVICE_CREATE))
+_DEP_UPDATE = Depends(require_permission(Permission.DEVICE_UPDATE))
+_DEP_DELETE = Depends(require_permission(Permission.DEVICE_DELETE))
+_DEP_STATS = Depends(require_permission(Permission.DEVICE_STATS))
+_DEP_USAGE = Depends(require_permission(Permission.DEVICE_USAGE_STATS))
+
+# Upper bound for /batch so one request cannot build an unbounded IN list
+BATCH_MAX_IDS = 100
+
+# Order matches the filter parameters of get_devices
+_DEVICE_FILTER_FIELDS = (
+    "device_name", "device_code", "nup_device", "bmn_brand", "sample_brand", "device_year",
+    "device_type", "device_station", "device_condition", "device_status", "device_room",
+)
+
+# Order matches the filter parameters of get_device_usage_statistics
+_USAGE_FILTER_FIELDS = (
+    "device_name", "nup_device", "device_brand", "device_year", "device_condition", "device_status",
+    "min_usage_days", "max_usage_days", "min_loans", "last_used_from", "last_used_to",
+)
+
+
 async def get_device_service(session: AsyncSession = Depends(get_db)) -> DeviceService:
-    """Get device service dependency."""
-    device_repo = DeviceRepository(session)
-    return DeviceService(device_repo)
+    """Get device service dependency (one instance per request session)."""
+    service = session.info.get("device_service")
+    if service is None:
+        device_repo = DeviceRepository(session)
+        service = DeviceService(device_repo)
+        session.info["device_service"] = service
+    return service
+
+
+async def _device_etag(device_service: DeviceService, *parts) -> str:
+    """
+    Weak ETag for device reads: device change counter, cache TTL window, request parts.
+    
+    The window bounds staleness for changes that don't bump the version
+    (e.g. child status updates) to the same TTL the Redis caches use.
+    """
+    version = await device_service.get_cache_version()
+    return make_etag(version, int(time.time()) // STATS_CACHE_TTL, checksum(*parts))
+
+
+def _cache_privately(response: Response) -> Response:
+    """Let the browser (and nothing shared) reuse a dashboard response for USAGE_HTTP_MAX_AGE."""
+    response.headers["Cache-Control"] = f"private, max-age={settings.USAGE_HTTP_MAX_AGE}"
+    response.headers["Vary"] = "Authorization"
+    return response
+
+
+def _single_device_etag(device: DeviceResponse) -> str:
+    """ETag for one device; children count too since editing one doesn't touch the parent's updated_at."""
+    children = checksum(*((child.id, child.updated_at.timestamp()) for child in device.children or ()))
+    return make_etag(device.id, device.updated_at.timestamp(), children)
 
 
 # ============================================================================
 # READ OPERATIONS - All authenticated users
 # ============================================================================
 
-@router.get("/", response_model=DeviceListResponse, dependencies=[Depends(require_permission(Permission.DEVICE_VIEW))])
+@router.get("/", response_model=DeviceListResponse, response_class=ORJSONResponse,
+            response_model_exclude_none=True, dependencies=[_DEP_VIEW])
 async def get_devices(
+    request: Request,
+    response: Response,
     device_name: Optional[str] = Query(None, description="Filter by device name"),
     device_code: Optional[str] = Query(None, description="Filter by device code"),
     nup_device: Optional[str] = Query(None, description="Filter by NUP device"),
@@ -58,36 +118,25 @@ async def get_devices(
     **Permission Required:** DEVICE_VIEW
     **Roles:** admin, manager, user
     """
-    filters = {}
-    if device_name:
-        filters["device_name"] = device_name
-    if device_code:
-        filters["device_code"] = device_code
-    if nup_device:
-        filters["nup_device"] = nup_device
-    if bmn_brand:
-        filters["bmn_brand"] = bmn_brand
-    if sample_brand:
-        filters["sample_brand"] = sample_brand
-    if device_year:
-        filters["device_year"] = device_year
-    if device_type:
-        filters["device_type"] = device_type
-    if device_station:
-        filters["device_station"] = device_station
-    if device_condition:
-        filters["device_condition"] = device_condition
-    if device_status:
-        filters["device_status"] = device_status
-    if device_room:
-        filters["device_room"] = device_room
+    values = (
+        device_name, device_code, nup_device, bmn_brand, sample_brand, device_year,
+        device_type, device_station, device_condition, device_status, device_room
+    )
+    filters = {field: value for field, value in zip(_DEVICE_FILTER_FIELDS, values) if value}
+    
+    etag = await _device_etag(device_service, sorted(filters.items()), page, page_size, sort_by, sort_order)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     
     skip = (page - 1) * page_size
     return await device_service.get_all_devices(skip, page_size, filters, sort_by, sort_order)
 
 
-@router.get("/stats", response_model=DeviceStats, dependencies=[Depends(require_permission(Permission.DEVICE_STATS))])
+@router.get("/stats", response_model=DeviceStats, dependencies=[_DEP_STATS])
 async def get_device_statistics(
+    request: Request,
+    response: Response,
     device_service: DeviceService = Depends(get_device_service)
 ):
     """
@@ -96,11 +145,16 @@ async def get_device_statistics(
     **Permission Required:** DEVICE_STATS
     **Roles:** admin, manager
     """
+    etag = await _device_etag(device_service, "stats")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    
     stats = await device_service.get_device_stats()
     return DeviceStats(**stats)
 
 
-@router.get("/search", dependencies=[Depends(require_permission(Permission.DEVICE_VIEW))])
+@router.get("/search", dependencies=[_DEP_VIEW])
 async def search_devices(
     q: str = Query(..., description="Search term"),
     limit: int = Query(10, ge=1, le=50, description="Maximum results"),
@@ -115,7 +169,46 @@ async def search_devices(
     return await device_service.search_devices(q, limit)
 
 
-@router.get("/condition/{condition}", dependencies=[Depends(require_permission(Permission.DEVICE_VIEW))])
+@router.get("/batch", response_model=List[DeviceResponse], dependencies=[_DEP_VIEW])
+async def get_devices_batch(
+    ids: List[int] = Query(..., description="Device IDs, e.g. ?ids=1&ids=2&ids=3"),
+    device_service: DeviceService = Depends(get_device_service)
+):
+    """
+    Get several devices by ID in one request, returned in the order requested.
+    
+    IDs that don't exist are left out of the result.
+    
+    **Permission Required:** DEVICE_VIEW
+    **Roles:** admin, manager, user
+    """
+    if len(ids) > BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BATCH_MAX_IDS} ids per request"
+        )
+    return await device_service.get_devices_by_ids(ids)
+
+
+@router.get("/by/{field}", dependencies=[_DEP_VIEW])
+async def get_devices_by_field(
+    field: Literal["condition", "status", "room", "type"],
+    value: str = Query(..., description="Value to match"),
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(10, ge=1, le=100, description="Items per page"),
+    device_service: DeviceService = Depends(get_device_service)
+):
+    """
+    Get devices by a single field (condition, status, room or type).
+    
+    **Permission Required:** DEVICE_VIEW
+    **Roles:** admin, manager, user
+    """
+    skip = (page - 1) * page_size
+    return await device_service.get_devices_by_field(f"device_{field}", value, skip, page_size)
+
+
+@router.get("/condition/{condition}", dependencies=[_DEP_VIEW])
 async def get_devices_by_condition(
     condition: str,
     page: int = Query(1, ge=1, description="Page number"),
@@ -129,10 +222,10 @@ async def get_devices_by_condition(
     **Roles:** admin, manager, user
     """
     skip = (page - 1) * page_size
-    return await device_service.get_devices_by_condition(condition, skip, page_size)
+    return await device_service.get_devices_by_field("device_condition", condition, skip, page_size)
 
 
-@router.get("/status/{status}", dependencies=[Depends(require_permission(Permission.DEVICE_VIEW))])
+@router.get("/status/{status}", dependencies=[_DEP_VIEW])
 async def get_devices_by_status(
     status: str,
     page: int = Query(1, ge=1, description="Page number"),
@@ -146,10 +239,10 @@ async def get_devices_by_status(
     **Roles:** admin, manager, user
     """
     skip = (page - 1) * page_size
-    return await device_service.get_devices_by_status(status, skip, page_size)
+    return await device_service.get_devices_by_field("device_status", status, skip, page_size)
 
 
-@router.get("/room/{room}", dependencies=[Depends(require_permission(Permission.DEVICE_VIEW))])
+@router.get("/room/{room}", dependencies=[_DEP_VIEW])
 async def get_devices_by_room(
     room: str,
     page: int = Query(1, ge=1, description="Page number"),
@@ -163,10 +256,10 @@ async def get_devices_by_room(
     **Roles:** admin, manager, user
     """
     skip = (page - 1) * page_size
-    return await device_service.get_devices_by_room(room, skip, page_size)
+    return await device_service.get_devices_by_field("device_room", room, skip, page_size)
 
 
-@router.get("/type/{device_type}", dependencies=[Depends(require_permission(Permission.DEVICE_VIEW))])
+@router.get("/type/{device_type}", dependencies=[_DEP_VIEW])
 async def get_devices_by_type(
     device_type: str,
     page: int = Query(1, ge=1, description="Page number"),
@@ -180,12 +273,14 @@ async def get_devices_by_type(
     **Roles:** admin, manager, user
     """
     skip = (page - 1) * page_size
-    return await device_service.get_devices_by_type(device_type, skip, page_size)
+    return await device_service.get_devices_by_field("device_type", device_type, skip, page_size)
 
 
-@router.get("/code/{device_code}", response_model=DeviceResponse, dependencies=[Depends(require_permission(Permission.DEVICE_VIEW))])
+@router.get("/code/{device_code}", response_model=DeviceResponse, dependencies=[_DEP_VIEW])
 async def get_device_by_code(
     device_code: str,
+    request: Request,
+    response: Response,
     device_service: DeviceService = Depends(get_device_service)
 ):
     """
@@ -197,12 +292,19 @@ async def get_device_by_code(
     device = await device_service.get_device_by_code(device_code)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
+    
+    etag = _single_device_etag(device)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return device
 
 
-@router.get("/nup/{nup_device}", response_model=DeviceResponse, dependencies=[Depends(require_permission(Permission.DEVICE_VIEW))])
+@router.get("/nup/{nup_device}", response_model=DeviceResponse, dependencies=[_DEP_VIEW])
 async def get_device_by_nup(
     nup_device: str,
+    request: Request,
+    response: Response,
     device_service: DeviceService = Depends(get_device_service)
 ):
     """
@@ -214,12 +316,19 @@ async def get_device_by_nup(
     device = await device_service.get_device_by_nup(nup_device)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
+    
+    etag = _single_device_etag(device)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return device
 
 
-@router.get("/{device_id}", response_model=DeviceResponse, dependencies=[Depends(require_permission(Permission.DEVICE_VIEW))])
+@router.get("/{device_id}", response_model=DeviceResponse, dependencies=[_DEP_VIEW])
 async def get_device_by_id(
     device_id: int,
+    request: Request,
+    response: Response,
     device_service: DeviceService = Depends(get_device_service)
 ):
     """
@@ -231,10 +340,15 @@ async def get_device_by_id(
     device = await device_service.get_device(device_id)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
-    return DeviceResponse.model_validate(device)
+    
+    etag = _single_device_etag(device)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return device
 
 
-@router.get("/{device_id}/photos", response_model=List[str], dependencies=[Depends(require_permission(Permission.DEVICE_VIEW))])
+@router.get("/{device_id}/photos", response_model=List[str], dependencies=[_DEP_VIEW])
 async def get_device_photos(
     device_id: int,
     device_service: DeviceService = Depends(get_device_service)
@@ -252,7 +366,7 @@ async def get_device_photos(
 # CREATE OPERATIONS - Admin only
 # ============================================================================
 
-@router.post("/", response_model=DeviceResponse, dependencies=[Depends(require_permission(Permission.DEVICE_CREATE))])
+@router.post("/", response_model=DeviceResponse, dependencies=[_DEP_CREATE])
 async def create_device(
     device_data: DeviceCreate,
     device_service: DeviceService = Depends(get_device_service)
@@ -266,7 +380,7 @@ async def create_device(
     return await device_service.create_device(device_data)
 
 
-@router.post("/{device_id}/photos", response_model=DeviceResponse, dependencies=[Depends(require_permission(Permission.DEVICE_UPDATE))])
+@router.post("/{device_id}/photos", response_model=DeviceResponse, dependencies=[_DEP_UPDATE])
 async def upload_device_photo(
     device_id: int,
     file: UploadFile = File(...),
@@ -286,7 +400,7 @@ async def upload_device_photo(
 # UPDATE OPERATIONS - Admin only
 # ============================================================================
 
-@router.put("/{device_id}", response_model=DeviceResponse, dependencies=[Depends(require_permission(Permission.DEVICE_UPDATE))])
+@router.put("/{device_id}", response_model=DeviceResponse, dependencies=[_DEP_UPDATE])
 async def update_device(
     device_id: int,
     device_data: DeviceUpdate,
@@ -301,7 +415,7 @@ async def update_device(
     return await device_service.update_device(device_id, device_data)
 
 
-@router.put("/{device_id}/condition", response_model=DeviceResponse, dependencies=[Depends(require_permission(Permission.DEVICE_UPDATE))])
+@router.put("/{device_id}/condition", response_model=DeviceResponse, dependencies=[_DEP_UPDATE])
 async def update_device_condition(
     device_id: int,
     condition_data: DeviceConditionUpdate,
@@ -316,7 +430,7 @@ async def update_device_condition(
     return await device_service.update_device_condition(device_id, condition_data)
 
 
-@router.put("/{device_id}/status", response_model=DeviceResponse, dependencies=[Depends(require_permission(Permission.DEVICE_UPDATE))])
+@router.put("/{device_id}/status", response_model=DeviceResponse, dependencies=[_DEP_UPDATE])
 async def update_device_status(
     device_id: int,
     status_data: DeviceStatusUpdate,
@@ -335,7 +449,7 @@ async def update_device_status(
 # DELETE OPERATIONS - Admin only
 # ============================================================================
 
-@router.delete("/{device_id}", dependencies=[Depends(require_permission(Permission.DEVICE_DELETE))])
+@router.delete("/{device_id}", dependencies=[_DEP_DELETE])
 async def delete_device(
     device_id: int,
     device_service: DeviceService = Depends(get_device_service)
@@ -350,7 +464,7 @@ async def delete_device(
     return {"message": "Device deleted successfully"}
 
 
-@router.delete("/{device_id}/photos/{filename}", response_model=DeviceResponse, dependencies=[Depends(require_permission(Permission.DEVICE_UPDATE))])
+@router.delete("/{device_id}/photos/{filename}", response_model=DeviceResponse, dependencies=[_DEP_UPDATE])
 async def delete_device_photo(
     device_id: int,
     filename: str,
@@ -370,7 +484,8 @@ async def delete_device_photo(
 # DEVICE USAGE STATISTICS - Admin and Manager
 # ============================================================================
 
-@router.get("/usage/statistics", response_model=DeviceUsageListResponse, dependencies=[Depends(require_permission(Permission.DEVICE_USAGE_STATS))])
+@router.get("/usage/statistics", response_model=DeviceUsageListResponse, response_class=ORJSONResponse,
+            response_model_exclude_none=True, dependencies=[_DEP_USAGE])
 async def get_device_usage_statistics(
     device_name: Optional[str] = Query(None, description="Filter by device name"),
     nup_device: Optional[str] = Query(None, description="Filter by NUP device"),
@@ -381,8 +496,8 @@ async def get_device_usage_statistics(
     min_usage_days: Optional[int] = Query(None, ge=0, description="Minimum total usage days"),
     max_usage_days: Optional[int] = Query(None, ge=0, description="Maximum total usage days"),
     min_loans: Optional[int] = Query(None, ge=0, description="Minimum total loans"),
-    last_used_from: Optional[str] = Query(None, description="Last used date from (YYYY-MM-DD)"),
-    last_used_to: Optional[str] = Query(None, description="Last used date to (YYYY-MM-DD)"),
+    last_used_from: Optional[date] = Query(None, description="Last used date from (YYYY-MM-DD)"),
+    last_used_to: Optional[date] = Query(None, description="Last used date to (YYYY-MM-DD)"),
     sort_by: str = Query("total_usage_days", description="Field to sort by"),
     sort_order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -395,41 +510,13 @@ async def get_device_usage_statistics(
     **Permission Required:** DEVICE_USAGE_STATS
     **Roles:** admin, manager
     """
-    from datetime import date as date_type
-    
-    last_used_from_date = None
-    last_used_to_date = None
-    
-    if last_used_from:
-        try:
-            last_used_from_date = date_type.fromisoformat(last_used_from)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid last_used_from date format. Use YYYY-MM-DD"
-            )
-    
-    if last_used_to:
-        try:
-            last_used_to_date = date_type.fromisoformat(last_used_to)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid last_used_to date format. Use YYYY-MM-DD"
-            )
-    
+    values = (
+        device_name, nup_device, device_brand, device_year, device_condition, device_status,
+        min_usage_days, max_usage_days, min_loans, last_used_from, last_used_to
+    )
+    # Unset filters are left to the schema defaults instead of being validated as None
     usage_filter = DeviceUsageFilter(
-        device_name=device_name,
-        nup_device=nup_device,
-        device_brand=device_brand,
-        device_year=device_year,
-        device_condition=device_condition,
-        device_status=device_status,
-        min_usage_days=min_usage_days,
-        max_usage_days=max_usage_days,
-        min_loans=min_loans,
-        last_used_from=last_used_from_date,
-        last_used_to=last_used_to_date,
+        **{field: value for field, value in zip(_USAGE_FILTER_FIELDS, values) if value is not None},
         sort_by=sort_by,
         sort_order=sort_order,
         page=page,
@@ -439,8 +526,10 @@ async def get_device_usage_statistics(
     return await device_service.get_device_usage_statistics(usage_filter)
 
 
-@router.get("/usage/summary", response_model=DeviceUsageSummary, dependencies=[Depends(require_permission(Permission.DEVICE_USAGE_STATS))])
+@router.get("/usage/summary", response_model=DeviceUsageSummary, dependencies=[_DEP_USAGE])
 async def get_device_usage_summary(
+    request: Request,
+    response: Response,
     device_service: DeviceService = Depends(get_device_service)
 ):
     """
@@ -449,10 +538,16 @@ async def get_device_usage_summary(
     **Permission Required:** DEVICE_USAGE_STATS
     **Roles:** admin, manager
     """
+    etag = await _device_etag(device_service, "usage:summary")
+    if etag_matches(request, etag):
+        return _cache_privately(not_modified(etag))
+    response.headers["ETag"] = etag
+    _cache_privately(response)
+    
     return await device_service.get_device_usage_summary()
 
 
-@router.get("/usage/never-used", response_model=List[DeviceResponse], dependencies=[Depends(require_permission(Permission.DEVICE_USAGE_STATS))])
+@router.get("/usage/never-used", response_model=List[DeviceResponse], dependencies=[_DEP_USAGE])
 async def get_never_used_devices(
     device_service: DeviceService = Depends(get_device_service)
 ):
@@ -465,8 +560,9 @@ async def get_never_used_devices(
     return await device_service.get_never_used_devices()
 
 
-@router.get("/usage/most-used", response_model=List[DeviceUsageStatistics], dependencies=[Depends(require_permission(Permission.DEVICE_USAGE_STATS))])
+@router.get("/usage/most-used", response_model=List[DeviceUsageStatistics], dependencies=[_DEP_USAGE])
 async def get_most_used_devices(
+    response: Response,
     limit: int = Query(10, ge=1, le=50, description="Number of devices to return"),
     device_service: DeviceService = Depends(get_device_service)
 ):
@@ -476,10 +572,11 @@ async def get_most_used_devices(
     **Permission Required:** DEVICE_USAGE_STATS
     **Roles:** admin, manager
     """
+    _cache_privately(response)
     return await device_service.get_most_used_devices(limit)
 
 
-@router.get("/usage/{device_id}/history", response_model=Dict, dependencies=[Depends(require_permission(Permission.DEVICE_USAGE_STATS))])
+@router.get("/usage/{device_id}/history", response_model=Dict, dependencies=[_DEP_USAGE])
 async def get_device_usage_history(
     device_id: int,
     device_service: DeviceService = Depends(get_device_service)
@@ -490,40 +587,13 @@ async def get_device_usage_history(
     **Permission Required:** DEVICE_USAGE_STATS
     **Roles:** admin, manager
     """
-    device = await device_service.get_device(device_id)
+    device, device_stats = await device_service.get_device_with_usage(device_id)
     if not device:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device not found"
         )
     
-    usage_filter = DeviceUsageFilter(page=1, page_size=1)
-    usage_stats = await device_service.get_device_usage_statistics(usage_filter)
-    
-    device_stats = None
-    for device_stat in usage_stats.devices:
-        if device_stat.device_id == device_id:
-            device_stats = device_stat
-            break
-    
-    if not device_stats:
-        device_stats = DeviceUsageStatistics(
-            device_id=device.id,
-            nup_device=device.nup_device,
-            device_name=device.device_name,
-            device_brand=device.bmn_brand or device.sample_brand,
-            device_year=device.device_year,
-            device_condition=device.device_condition,
-            device_status=device.device_status,
-            total_usage_days=0,
-            total_loans=0,
-            last_used_date=None,
-            last_borrower=None,
-            last_activity=None,
-            average_usage_per_loan=0.0,
-            usage_frequency_score=0.0
-        )
-    
     return {
         "device_info": device,
         "usage_statistics": device_stats,
@@ -1,6 +1,7 @@
 """Employee management endpoints with permission-based authorization."""
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -13,17 +14,28 @@ from src.auth.role_permissions import Permission
 
 router = APIRouter()
 
+# Permission guards, built once and shared by the routes below
+_DEP_VIEW = Depends(require_permission(Permission.EMPLOYEE_VIEW))
+_DEP_CREATE = Depends(require_permission(Permission.EMPLOYEE_CREATE))
+_DEP_UPDATE = Depends(require_permission(Permission.EMPLOYEE_UPDATE))
+_DEP_DELETE = Depends(require_permission(Permission.EMPLOYEE_DELETE))
+
 
 async def get_employee_service(session: AsyncSession = Depends(get_db)) -> EmployeeService:
-    """Get employee service dependency."""
-    return EmployeeService(EmployeeRepository(session))
+    """Get employee service dependency (one instance per request session)."""
+    service = session.info.get("employee_service")
+    if service is None:
+        service = EmployeeService(EmployeeRepository(session))
+        session.info["employee_service"] = service
+    return service
 
 
 # ============================================================================
 # READ OPERATIONS - All authenticated users
 # ============================================================================
 
-@router.get("/", response_model=List[EmployeeResponse], dependencies=[Depends(require_permission(Permission.EMPLOYEE_VIEW))])
+@router.get("/", response_model=List[EmployeeResponse], response_class=ORJSONResponse,
+            response_model_exclude_none=True, dependencies=[_DEP_VIEW])
 async def list_employees(
     service: EmployeeService = Depends(get_employee_service)
 ):
@@ -36,7 +48,7 @@ async def list_employees(
     return await service.get_employees()
 
 
-@router.get("/{employee_id}", response_model=EmployeeResponse, dependencies=[Depends(require_permission(Permission.EMPLOYEE_VIEW))])
+@router.get("/{employee_id}", response_model=EmployeeResponse, dependencies=[_DEP_VIEW])
 async def get_employee(
     employee_id: int,
     service: EmployeeService = Depends(get_employee_service)
@@ -57,7 +69,7 @@ async def get_employee(
 # CREATE OPERATIONS - Admin only
 # ============================================================================
 
-@router.post("/", response_model=EmployeeResponse, dependencies=[Depends(require_permission(Permission.EMPLOYEE_CREATE))])
+@router.post("/", response_model=EmployeeResponse, dependencies=[_DEP_CREATE])
 async def create_employee(
     data: EmployeeCreate,
     service: EmployeeService = Depends(get_employee_service)
@@ -75,7 +87,7 @@ async def create_employee(
 # UPDATE OPERATIONS - Admin only
 # ============================================================================
 
-@router.put("/{employee_id}", response_model=EmployeeResponse, dependencies=[Depends(require_permission(Permission.EMPLOYEE_UPDATE))])
+@router.put("/{employee_id}", response_model=EmployeeResponse, dependencies=[_DEP_UPDATE])
 async def update_employee(
     employee_id: int,
     data: EmployeeUpdate,
@@ -97,7 +109,7 @@ async def update_employee(
 # DELETE OPERATIONS - Admin only
 # ============================================================================
 
-@router.delete("/{employee_id}", dependencies=[Depends(require_permission(Permission.EMPLOYEE_DELETE))])
+@router.delete("/{employee_id}", dependencies=[_DEP_DELETE])
 async def delete_employee(
     employee_id: int,
     service: EmployeeService = Depends(get_employee_service)
@@ -1,8 +1,12 @@
 """Export endpoints for loan documents and reports with permission-based authorization."""
 
-from typing import Optional, List
-from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+import hashlib
+import time
+from calendar import monthrange
+from io import BytesIO
+from typing import Dict, Optional, List, Tuple
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -10,36 +14,95 @@ from ...core.database import get_db
 from ...repositories.loan import LoanRepository
 from ...repositories.device import DeviceRepository
 from ...services.loan import LoanService
-from ...utils.pdf_generator import PDFGenerator
+from ...services.device import DeviceService
+from ...utils.pdf_generator import render_pdf
+from ...utils.files import iter_buffer
+from ...utils.etag import etag_matches, not_modified
 from ...schemas.loan import DeviceLoanFilter, LoanStatus
+from ...schemas.device import DeviceUsageFilter
 from ...auth.permissions import get_current_active_user, require_permission
 from ...auth.role_permissions import Permission
 
 router = APIRouter()
 
+# Permission guards, built once and shared by the routes below
+_DEP_PDF = Depends(require_permission(Permission.EXPORT_PDF))
+_DEP_LOAN_REPORT = Depends(require_permission(Permission.EXPORT_LOAN_REPORT))
+_DEP_DEVICE_USAGE = Depends(require_permission(Permission.EXPORT_DEVICE_USAGE))
+_DEP_LOAN_STATS = Depends(require_permission(Permission.LOAN_STATS))
 
-async def get_loan_service(session: AsyncSession = Depends(get_db)) -> LoanService:
-    """Get loan service dependency."""
-    loan_repo = LoanRepository(session)
-    device_repo = DeviceRepository(session)
-    return LoanService(loan_repo, device_repo)
+
+# Indonesian month names, indexed by month number
+_MONTH_NAMES_ID = (
+    "", "Januari", "Februari", "Maret", "April", "Mei", "Juni",
+    "Juli", "Agustus", "September", "Oktober", "November", "Desember"
+)
+
+# Characters that can't appear as-is in a download filename
+_FILENAME_SLUG = str.maketrans({" ": "_", "/": "_"})
+
+
+# Rendered PDFs keyed by a digest of their input data. Per process and in memory: Redis here
+# is configured for text values, and a worker re-rendering once per TTL is cheap enough
+PDF_CACHE_TTL = 60  # seconds
+PDF_CACHE_MAX_ENTRIES = 32
+_pdf_cache: Dict[str, Tuple[float, bytes]] = {}
+
+
+def _report_key(*parts) -> str:
+    """Digest of a report's input data; doubles as its strong ETag value."""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def _usage_window_start(today: date, period_months: int) -> date:
+    """First day of the oldest of the period_months calendar months ending with today's month."""
+    start_month = today.year * 12 + today.month - 1 - (period_months - 1)
+    return date(start_month // 12, start_month % 12 + 1, 1)
 
 
-def get_pdf_generator() -> PDFGenerator:
-    """Get PDF generator dependency."""
-    return PDFGenerator()
+async def _render_pdf_cached(key: str, report: str, *args) -> BytesIO:
+    """Like render_pdf, but reuse the bytes rendered for the same _report_key within PDF_CACHE_TTL."""
+    now = time.monotonic()
+    hit = _pdf_cache.get(key)
+    if hit is not None and now - hit[0] < PDF_CACHE_TTL:
+        return BytesIO(hit[1])
+    
+    buffer = await render_pdf(report, *args)
+    for stale in [k for k, (stored_at, _) in _pdf_cache.items() if now - stored_at >= PDF_CACHE_TTL]:
+        del _pdf_cache[stale]
+    if len(_pdf_cache) >= PDF_CACHE_MAX_ENTRIES:
+        del _pdf_cache[next(iter(_pdf_cache))]
+    _pdf_cache[key] = (now, buffer.getvalue())
+    return buffer
+
+
+async def get_device_service(session: AsyncSession = Depends(get_db)) -> DeviceService:
+    """Get device service dependency (one instance per request session)."""
+    service = session.info.get("device_service")
+    if service is None:
+        service = DeviceService(DeviceRepository(session))
+        session.info["device_service"] = service
+    return service
+
+
+async def get_loan_service(session: AsyncSession = Depends(get_db)) -> LoanService:
+    """Get loan service dependency (one instance per request session)."""
+    service = session.info.get("loan_service")
+    if service is None:
+        service = LoanService(LoanRepository(session), DeviceRepository(session))
+        session.info["loan_service"] = service
+    return service
 
 
 # ============================================================================
 # INDIVIDUAL LOAN DOCUMENT EXPORT - User can export own loans, Admin can export any
 # ============================================================================
 
-@router.get("/loans/{loan_id}/document", dependencies=[Depends(require_permission(Permission.EXPORT_PDF))])
+@router.get("/loans/{loan_id}/document", dependencies=[_DEP_PDF])
 async def export_loan_document(
     loan_id: int,
     current_user: dict = Depends(get_current_active_user),
-    loan_service: LoanService = Depends(get_loan_service),
-    pdf_generator: PDFGenerator = Depends(get_pdf_generator)
+    loan_service: LoanService = Depends(get_loan_service)
 ):
     """
     Export individual loan document (BA peminjaman) as PDF.
@@ -63,23 +126,25 @@ async def export_loan_document(
         )
     
     # Generate PDF
-    pdf_buffer = pdf_generator.generate_loan_document(loan)
+    pdf_buffer = await render_pdf("generate_loan_document", loan)
     
     # Create filename
-    filename = f"BA_Peminjaman_{loan.loan_number}_{loan.assignment_letter_number.replace('/', '_')}.pdf"
+    filename = f"BA_Peminjaman_{loan.loan_number.translate(_FILENAME_SLUG)}_{loan.assignment_letter_number.translate(_FILENAME_SLUG)}.pdf"
     
     return StreamingResponse(
-        iter([pdf_buffer.getvalue()]),
+        iter_buffer(pdf_buffer),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(pdf_buffer.getbuffer().nbytes)
+        }
     )
 
 
-@router.get("/my-loans", dependencies=[Depends(require_permission(Permission.EXPORT_PDF))])
+@router.get("/my-loans", dependencies=[_DEP_PDF])
 async def export_my_loans(
     current_user: dict = Depends(get_current_active_user),
-    loan_service: LoanService = Depends(get_loan_service),
-    pdf_generator: PDFGenerator = Depends(get_pdf_generator)
+    loan_service: LoanService = Depends(get_loan_service)
 ):
     """
     Export user's loan history as PDF.
@@ -90,8 +155,6 @@ async def export_my_loans(
     # Get all user's loans
     filters = DeviceLoanFilter(
         borrower_user_id=current_user["id"],
-        page=1,
-        page_size=1000,  # Large number to get all records
         sort_by="created_at",
         sort_order="desc"
     )
@@ -99,17 +162,19 @@ async def export_my_loans(
     loan_summaries = await loan_service.get_loans_summary_for_export(filters)
     
     # Generate PDF
-    user_name = current_user.get("name", f"{current_user.get('first_name', '')} {current_user.get('last_name', '')}")
-    pdf_buffer = pdf_generator.generate_user_loan_history(loan_summaries, user_name)
+    user_name = current_user.get("name") or f"{current_user.get('first_name', '')} {current_user.get('last_name', '')}".strip()
+    pdf_buffer = await render_pdf("generate_user_loan_history", loan_summaries, user_name)
     
     # Create filename
-    from datetime import datetime
-    filename = f"Riwayat_Peminjaman_{user_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.pdf"
+    filename = f"Riwayat_Peminjaman_{user_name.translate(_FILENAME_SLUG)}_{datetime.now().strftime('%Y%m%d')}.pdf"
     
     return StreamingResponse(
-        iter([pdf_buffer.getvalue()]),
+        iter_buffer(pdf_buffer),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(pdf_buffer.getbuffer().nbytes)
+        }
     )
 
 
@@ -117,7 +182,7 @@ async def export_my_loans(
 # LOAN REPORTS - Admin and Manager only
 # ============================================================================
 
-@router.get("/loans/report", dependencies=[Depends(require_permission(Permission.EXPORT_LOAN_REPORT))])
+@router.get("/loans/report", dependencies=[_DEP_LOAN_REPORT])
 async def export_loan_report(
     status: Optional[LoanStatus] = Query(None, description="Filter by loan status"),
     borrower_name: Optional[str] = Query(None, description="Filter by borrower name"),
@@ -131,8 +196,7 @@ async def export_loan_report(
     device_id: Optional[int] = Query(None, description="Filter by device ID"),
     sort_by: str = Query("created_at", description="Field to sort by"),
     sort_order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order"),
-    loan_service: LoanService = Depends(get_loan_service),
-    pdf_generator: PDFGenerator = Depends(get_pdf_generator)
+    loan_service: LoanService = Depends(get_loan_service)
 ):
     """
     Export loan report PDF.
@@ -140,7 +204,7 @@ async def export_loan_report(
     **Permission Required:** EXPORT_LOAN_REPORT
     **Roles:** admin, manager
     """
-    # Create filter with large page size to get all matching records
+    # Export covers every matching record; pagination fields are ignored
     filters = DeviceLoanFilter(
         status=status,
         borrower_name=borrower_name,
@@ -152,8 +216,6 @@ async def export_loan_report(
         loan_end_date_to=loan_end_date_to,
         borrower_user_id=borrower_user_id,
         device_id=device_id,
-        page=1,
-        page_size=1000,  # Large number to get all records
         sort_by=sort_by,
         sort_order=sort_order
     )
@@ -162,23 +224,24 @@ async def export_loan_report(
     loan_summaries = await loan_service.get_loans_summary_for_export(filters)
     
     # Generate PDF
-    pdf_buffer = pdf_generator.generate_loan_report(loan_summaries)
+    pdf_buffer = await render_pdf("generate_loan_report", loan_summaries)
     
     # Create filename with current date
-    from datetime import datetime
     filename = f"Laporan_Peminjaman_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     
     return StreamingResponse(
-        iter([pdf_buffer.getvalue()]),
+        iter_buffer(pdf_buffer),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(pdf_buffer.getbuffer().nbytes)
+        }
     )
 
 
-@router.get("/overdue-report", dependencies=[Depends(require_permission(Permission.EXPORT_LOAN_REPORT))])
+@router.get("/overdue-report", dependencies=[_DEP_LOAN_REPORT])
 async def export_overdue_report(
-    loan_service: LoanService = Depends(get_loan_service),
-    pdf_generator: PDFGenerator = Depends(get_pdf_generator)
+    loan_service: LoanService = Depends(get_loan_service)
 ):
     """
     Export overdue loans report as PDF.
@@ -189,8 +252,6 @@ async def export_overdue_report(
     # Get overdue loan summaries
     filters = DeviceLoanFilter(
         status=LoanStatus.OVERDUE,
-        page=1,
-        page_size=1000,  # Large number to get all records
         sort_by="loan_end_date",
         sort_order="asc"
     )
@@ -198,25 +259,27 @@ async def export_overdue_report(
     loan_summaries = await loan_service.get_loans_summary_for_export(filters)
     
     # Generate PDF
-    pdf_buffer = pdf_generator.generate_overdue_report(loan_summaries)
+    pdf_buffer = await render_pdf("generate_overdue_report", loan_summaries)
     
     # Create filename
-    from datetime import datetime
     filename = f"Laporan_Terlambat_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     
     return StreamingResponse(
-        iter([pdf_buffer.getvalue()]),
+        iter_buffer(pdf_buffer),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(pdf_buffer.getbuffer().nbytes)
+        }
     )
 
 
-@router.get("/monthly-summary/{year}/{month}", dependencies=[Depends(require_permission(Permission.EXPORT_LOAN_REPORT))])
+@router.get("/monthly-summary/{year}/{month}", dependencies=[_DEP_LOAN_REPORT])
 async def export_monthly_summary(
     year: int,
     month: int,
-    loan_service: LoanService = Depends(get_loan_service),
-    pdf_generator: PDFGenerator = Depends(get_pdf_generator)
+    request: Request,
+    loan_service: LoanService = Depends(get_loan_service)
 ):
     """
     Export monthly loan summary report as PDF.
@@ -224,9 +287,6 @@ async def export_monthly_summary(
     **Permission Required:** EXPORT_LOAN_REPORT
     **Roles:** admin, manager
     """
-    from datetime import datetime
-    from calendar import monthrange
-    
     # Validate month and year
     if month < 1 or month > 12:
         raise HTTPException(
@@ -249,8 +309,6 @@ async def export_monthly_summary(
     filters = DeviceLoanFilter(
         loan_start_date_from=start_date,
         loan_start_date_to=end_date,
-        page=1,
-        page_size=1000,
         sort_by="loan_start_date",
         sort_order="asc"
     )
@@ -258,20 +316,26 @@ async def export_monthly_summary(
     loan_summaries = await loan_service.get_loans_summary_for_export(filters)
     
     # Generate PDF with custom title
-    month_names = [
-        "", "Januari", "Februari", "Maret", "April", "Mei", "Juni",
-        "Juli", "Agustus", "September", "Oktober", "November", "Desember"
-    ]
-    title = f"LAPORAN PEMINJAMAN BULANAN - {month_names[month].upper()} {year}"
-    pdf_buffer = pdf_generator.generate_loan_report(loan_summaries, title)
+    title = f"LAPORAN PEMINJAMAN BULANAN - {_MONTH_NAMES_ID[month].upper()} {year}"
+    key = _report_key("monthly-summary", title, loan_summaries)
+    etag = f'"{key}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    pdf_buffer = await _render_pdf_cached(
+        key, "generate_loan_report", loan_summaries, title
+    )
     
     # Create filename
     filename = f"Laporan_Bulanan_{year}_{month:02d}.pdf"
     
     return StreamingResponse(
-        iter([pdf_buffer.getvalue()]),
+        iter_buffer(pdf_buffer),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(pdf_buffer.getbuffer().nbytes),
+            "ETag": etag
+        }
     )
 
 
@@ -279,11 +343,11 @@ async def export_monthly_summary(
 # DEVICE USAGE REPORTS - Admin and Manager only
 # ============================================================================
 
-@router.get("/device-usage-report", dependencies=[Depends(require_permission(Permission.EXPORT_DEVICE_USAGE))])
+@router.get("/device-usage-report", dependencies=[_DEP_DEVICE_USAGE])
 async def export_device_usage_report(
+    request: Request,
     period_months: int = Query(1, ge=1, le=12, description="Period in months"),
-    session: AsyncSession = Depends(get_db),
-    pdf_generator: PDFGenerator = Depends(get_pdf_generator)
+    session: AsyncSession = Depends(get_db)
 ):
     """
     Export device usage statistics report as PDF.
@@ -291,37 +355,12 @@ async def export_device_usage_report(
     **Permission Required:** EXPORT_DEVICE_USAGE
     **Roles:** admin, manager
     """
-    from datetime import datetime, timedelta
-    from sqlalchemy import select, func, and_
-    from ...models.loan import DeviceLoan, DeviceLoanItem
-    from ...models.perangkat import Device
-    
-    # Calculate date range
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=period_months * 30)
-    
-    # Query device usage statistics
-    query = (
-        select(
-            Device.device_name,
-            Device.device_code,
-            func.count(DeviceLoanItem.id).label('loan_count'),
-            func.sum(DeviceLoan.usage_duration_days).label('total_days_used')
-        )
-        .join(DeviceLoanItem, Device.id == DeviceLoanItem.device_id)
-        .join(DeviceLoan, DeviceLoanItem.loan_id == DeviceLoan.id)
-        .where(
-            and_(
-                DeviceLoan.created_at >= start_date,
-                DeviceLoan.created_at <= end_date,
-                DeviceLoan.deleted_at.is_(None)
-            )
-        )
-        .group_by(Device.id, Device.device_name, Device.device_code)
-        .order_by(func.count(DeviceLoanItem.id).desc())
-    )
+    # UTC, like created_at and the view's buckets, so the same request always maps to the same buckets
+    today = datetime.utcnow().date()
+    start_date = _usage_window_start(today, period_months)
     
-    result = await session.execute(query)
+    # Per-month pre-aggregates: one index range scan instead of joining every loan in the window
+    rows = await DeviceRepository(session).get_usage_by_device_since(start_date)
     device_usage_data = [
         {
             'device_name': row[0],
@@ -329,25 +368,34 @@ async def export_device_usage_report(
             'loan_count': row[2],
             'total_days_used': row[3] or 0
         }
-        for row in result.fetchall()
+        for row in rows
     ]
     
     # Generate PDF
     period_text = f"{period_months} Bulan Terakhir"
-    pdf_buffer = pdf_generator.generate_device_usage_report(device_usage_data, period_text)
+    key = _report_key("device-usage-report", today, period_text, device_usage_data)
+    etag = f'"{key}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    pdf_buffer = await _render_pdf_cached(
+        key, "generate_device_usage_report", device_usage_data, period_text
+    )
     
     # Create filename
-    from datetime import datetime
-    filename = f"Laporan_Penggunaan_Perangkat_{period_months}bulan_{datetime.now().strftime('%Y%m%d')}.pdf"
+    filename = f"Laporan_Penggunaan_Perangkat_{period_months}bulan_{today.strftime('%Y%m%d')}.pdf"
     
     return StreamingResponse(
-        iter([pdf_buffer.getvalue()]),
+        iter_buffer(pdf_buffer),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(pdf_buffer.getbuffer().nbytes),
+            "ETag": etag
+        }
     )
 
 
-@router.get("/device-usage-statistics", dependencies=[Depends(require_permission(Permission.EXPORT_DEVICE_USAGE))])
+@router.get("/device-usage-statistics", dependencies=[_DEP_DEVICE_USAGE])
 async def export_device_usage_statistics(
     device_name: Optional[str] = Query(None, description="Filter by device name"),
     nup_device: Optional[str] = Query(None, description="Filter by NUP device"),
@@ -358,12 +406,11 @@ async def export_device_usage_statistics(
     min_usage_days: Optional[int] = Query(None, ge=0, description="Minimum total usage days"),
     max_usage_days: Optional[int] = Query(None, ge=0, description="Maximum total usage days"),
     min_loans: Optional[int] = Query(None, ge=0, description="Minimum total loans"),
-    last_used_from: Optional[str] = Query(None, description="Last used date from (YYYY-MM-DD)"),
-    last_used_to: Optional[str] = Query(None, description="Last used date to (YYYY-MM-DD)"),
+    last_used_from: Optional[date] = Query(None, description="Last used date from (YYYY-MM-DD)"),
+    last_used_to: Optional[date] = Query(None, description="Last used date to (YYYY-MM-DD)"),
     sort_by: str = Query("total_usage_days", description="Field to sort by"),
     sort_order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order"),
-    session: AsyncSession = Depends(get_db),
-    pdf_generator: PDFGenerator = Depends(get_pdf_generator)
+    device_service: DeviceService = Depends(get_device_service)
 ):
     """
     Export device usage statistics as PDF.
@@ -371,37 +418,6 @@ async def export_device_usage_statistics(
     **Permission Required:** EXPORT_DEVICE_USAGE
     **Roles:** admin, manager
     """
-    from datetime import date as date_type
-    from ...repositories.device import DeviceRepository
-    from ...services.device import DeviceService
-    from ...schemas.device import DeviceUsageFilter
-    
-    # Parse date strings if provided
-    last_used_from_date = None
-    last_used_to_date = None
-    
-    if last_used_from:
-        try:
-            last_used_from_date = date_type.fromisoformat(last_used_from)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid last_used_from date format. Use YYYY-MM-DD"
-            )
-    
-    if last_used_to:
-        try:
-            last_used_to_date = date_type.fromisoformat(last_used_to)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid last_used_to date format. Use YYYY-MM-DD"
-            )
-    
-    # Create service instances
-    device_repo = DeviceRepository(session)
-    device_service = DeviceService(device_repo)
-    
     # Create filter
     usage_filter = DeviceUsageFilter(
         device_name=device_name,
@@ -413,20 +429,17 @@ async def export_device_usage_statistics(
         min_usage_days=min_usage_days,
         max_usage_days=max_usage_days,
         min_loans=min_loans,
-        last_used_from=last_used_from_date,
-        last_used_to=last_used_to_date,
+        last_used_from=last_used_from,
+        last_used_to=last_used_to,
         sort_by=sort_by,
-        sort_order=sort_order,
-        page=1,
-        page_size=1000  # Large number to get all records
+        sort_order=sort_order
     )
     
-    # Get usage statistics
-    usage_stats = await device_service.get_device_usage_statistics(usage_filter)
+    summary = await device_service.get_device_usage_summary()
     
-    # Convert to dict format for PDF generator
+    # Convert to dict format for PDF generator, one streamed batch at a time
     devices_stats_dict = []
-    for device_stat in usage_stats.devices:
+    async for device_stat in device_service.iter_device_usage_statistics(usage_filter):
         device_dict = {
             "device_id": device_stat.device_id,
             "nup_device": device_stat.nup_device,
@@ -447,28 +460,31 @@ async def export_device_usage_statistics(
     
     # Generate PDF
     period = "Semua Periode"
-    if last_used_from_date or last_used_to_date:
+    if last_used_from or last_used_to:
         period_parts = []
-        if last_used_from_date:
-            period_parts.append(f"dari {last_used_from_date.strftime('%d/%m/%Y')}")
-        if last_used_to_date:
-            period_parts.append(f"sampai {last_used_to_date.strftime('%d/%m/%Y')}")
+        if last_used_from:
+            period_parts.append(f"dari {last_used_from.strftime('%d/%m/%Y')}")
+        if last_used_to:
+            period_parts.append(f"sampai {last_used_to.strftime('%d/%m/%Y')}")
         period = " ".join(period_parts)
     
-    pdf_buffer = pdf_generator.generate_device_usage_statistics_report(
-        devices_stats_dict, 
-        usage_stats.summary, 
+    pdf_buffer = await render_pdf(
+        "generate_device_usage_statistics_report",
+        devices_stats_dict,
+        summary,
         period
     )
     
     # Create filename
-    from datetime import datetime
     filename = f"Statistik_Penggunaan_Perangkat_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     
     return StreamingResponse(
-        iter([pdf_buffer.getvalue()]),
+        iter_buffer(pdf_buffer),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(pdf_buffer.getbuffer().nbytes)
+        }
     )
 
 
@@ -476,10 +492,10 @@ async def export_device_usage_statistics(
 # LOAN STATISTICS - Admin and Manager only
 # ============================================================================
 
-@router.get("/loan-statistics", dependencies=[Depends(require_permission(Permission.LOAN_STATS))])
+@router.get("/loan-statistics", dependencies=[_DEP_LOAN_STATS])
 async def export_loan_statistics(
-    loan_service: LoanService = Depends(get_loan_service),
-    pdf_generator: PDFGenerator = Depends(get_pdf_generator)
+    request: Request,
+    loan_service: LoanService = Depends(get_loan_service)
 ):
     """
     Export loan statistics as PDF.
@@ -487,118 +503,27 @@ async def export_loan_statistics(
     **Permission Required:** LOAN_STATS
     **Roles:** admin, manager
     """
-    from datetime import datetime
-    from io import BytesIO
-    from reportlab.lib.pagesizes import A4
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib import colors
-    from reportlab.lib.units import cm
-    
     # Get loan statistics
     stats = await loan_service.get_loan_stats()
     
-    # Create PDF buffer
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2*cm,
-        bottomMargin=2*cm
+    now = datetime.now()
+    key = _report_key("loan-statistics", now.date(), stats)
+    etag = f'"{key}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    buffer = await _render_pdf_cached(
+        key, "generate_loan_statistics_report", stats
     )
     
-    story = []
-    pdf_gen = pdf_generator
-    
-    # Header
-    story.append(Paragraph("STATISTIK PEMINJAMAN PERANGKAT", pdf_gen.styles['CustomTitle']))
-    story.append(Paragraph(f"Per Tanggal: {datetime.now().strftime('%d %B %Y')}", pdf_gen.styles['SubHeader']))
-    story.append(Spacer(1, 20))
-    
-    # Overall statistics
-    overall_stats = [
-        ["Metrik", "Jumlah"],
-        ["Total Peminjaman", stats.total_loans],
-        ["Peminjaman Aktif", stats.active_loans],
-        ["Peminjaman Selesai", stats.returned_loans],
-        ["Peminjaman Terlambat", stats.overdue_loans],
-        ["Peminjaman Dibatalkan", stats.cancelled_loans],
-        ["Peminjaman Bulan Ini", stats.loans_this_month],
-        ["Peminjaman Minggu Ini", stats.loans_this_week]
-    ]
-    
-    stats_table = Table(overall_stats, colWidths=[8*cm, 4*cm])
-    stats_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    
-    story.append(stats_table)
-    story.append(Spacer(1, 20))
-    
-    # Most borrowed devices
-    if stats.most_borrowed_devices:
-        story.append(Paragraph("PERANGKAT PALING SERING DIPINJAM", pdf_gen.styles['Header']))
-        
-        devices_data = [["No", "Nama Perangkat", "Jumlah Peminjaman"]]
-        for i, device in enumerate(stats.most_borrowed_devices, 1):
-            devices_data.append([str(i), device['device_name'], str(device['loan_count'])])
-        
-        devices_table = Table(devices_data, colWidths=[2*cm, 8*cm, 4*cm])
-        devices_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        
-        story.append(devices_table)
-        story.append(Spacer(1, 20))
-    
-    # Top borrowers
-    if stats.top_borrowers:
-        story.append(Paragraph("PEMINJAM PALING AKTIF", pdf_gen.styles['Header']))
-        
-        borrowers_data = [["No", "Nama Peminjam", "Jumlah Peminjaman"]]
-        for i, borrower in enumerate(stats.top_borrowers, 1):
-            borrowers_data.append([str(i), borrower['borrower_name'], str(borrower['loan_count'])])
-        
-        borrowers_table = Table(borrowers_data, colWidths=[2*cm, 8*cm, 4*cm])
-        borrowers_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        
-        story.append(borrowers_table)
-    
-    story.append(Spacer(1, 30))
-    
-    # Footer
-    footer_text = f"Laporan statistik dibuat pada {datetime.now().strftime('%d %B %Y, %H:%M:%S')}"
-    story.append(Paragraph(footer_text, pdf_gen.styles['RightAlign']))
-    
-    doc.build(story)
-    buffer.seek(0)
-    
     # Create filename
-    filename = f"Statistik_Peminjaman_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    filename = f"Statistik_Peminjaman_{now.strftime('%Y%m%d_%H%M%S')}.pdf"
     
     return StreamingResponse(
-        iter([buffer.getvalue()]),
+        iter_buffer(buffer),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(buffer.getbuffer().nbytes),
+            "ETag": etag
+        }
     )
\ No newline at end of file
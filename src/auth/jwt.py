@@ -1,7 +1,10 @@
 """JWT token handling with blacklist support using existing Redis infrastructure."""
 
+import asyncio
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple
+from cachetools import TTLCache
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
@@ -10,7 +13,20 @@ from src.core.config import settings
 from src.core.redis import redis_set, redis_exists, redis_delete
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes use argon2id; bcrypt stays verifiable and is marked deprecated so
+# existing hashes are upgraded on the next successful login.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=64 * 1024,
+    argon2__parallelism=1,
+)
+
+
+# Decoded token payloads keyed by (token, type), so the signature is checked
+# once per token per minute; "exp" is still re-checked on every cache hit
+_decoded_token_cache: TTLCache = TTLCache(maxsize=10000, ttl=60)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -23,6 +39,26 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in a worker thread so the event loop is not blocked."""
+    return await asyncio.to_thread(pwd_context.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in a worker thread so the event loop is not blocked."""
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password in a worker thread.
+    
+    Returns (verified, new_hash); new_hash is set when the stored hash uses
+    a deprecated scheme or parameters and should be replaced.
+    """
+    return await asyncio.to_thread(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -68,6 +104,28 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     return encoded_jwt
 
 
+def _decode_token(token: str, token_type: str) -> Dict[str, Any]:
+    """Decode and verify a JWT, reusing a cached payload when available."""
+    cache_key = (token, token_type)
+    payload = _decoded_token_cache.get(cache_key)
+    
+    if payload is None:
+        # Choose secret key based on token type
+        secret_key = settings.JWT_REFRESH_SECRET_KEY if token_type == "refresh" else settings.JWT_SECRET_KEY
+        
+        payload = jwt.decode(
+            token, 
+            secret_key, 
+            algorithms=[settings.ALGORITHM]
+        )
+        _decoded_token_cache[cache_key] = payload
+    elif payload.get("exp", 0) <= time.time():
+        _decoded_token_cache.pop(cache_key, None)
+        raise JWTError("Signature has expired.")
+    
+    return payload
+
+
 async def verify_token(token: str, token_type: str = "access") -> Dict[str, Any]:
     """
     Verify and decode a JWT token with blacklist check.
@@ -83,14 +141,7 @@ async def verify_token(token: str, token_type: str = "access") -> Dict[str, Any]
                 detail="Token has been revoked"
             )
         
-        # Choose secret key based on token type
-        secret_key = settings.JWT_REFRESH_SECRET_KEY if token_type == "refresh" else settings.JWT_SECRET_KEY
-        
-        payload = jwt.decode(
-            token, 
-            secret_key, 
-            algorithms=[settings.ALGORITHM]
-        )
+        payload = _decode_token(token, token_type)
         
         # Verify token type
         if payload.get("type") != token_type:
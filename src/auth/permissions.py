@@ -1,6 +1,8 @@
 """Enhanced authorization and permission checking with JWT Bearer."""
 
-from typing import List, Dict, Union
+from functools import lru_cache
+from typing import List, Dict, Optional, Union
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError
@@ -10,6 +12,7 @@ from src.auth.jwt import verify_token, is_user_blacklisted
 from src.core.database import get_db
 from src.repositories.user import UserRepository
 from src.auth.role_permissions import Permission, has_permission, get_user_permissions
+from src.utils.cache import CacheManager
 
 
 class JWTBearer(HTTPBearer):
@@ -38,9 +41,26 @@ class JWTBearer(HTTPBearer):
 
 jwt_bearer = JWTBearer()
 
+# Per-process cache of user dicts (profile + roles + permissions) keyed by user ID, each
+# stamped with the user's auth version in Redis. invalidate_user_cache() bumps that version,
+# so every worker reloads the user on its next request, not just the one that made the change.
+_user_cache: TTLCache = TTLCache(maxsize=10000, ttl=30)
+user_auth_cache = CacheManager(prefix="user-auth")
+
+
+async def invalidate_user_cache(user_id: int) -> None:
+    """Drop the cached user dict in every worker so the next request reloads it from the DB."""
+    _user_cache.pop(int(user_id), None)
+    await user_auth_cache.increment(f"version:{int(user_id)}")
+
+
+async def get_token_payload(token: str = Depends(jwt_bearer)) -> Dict:
+    """Verify the bearer token and return its claims (resolved once per request)."""
+    return await verify_token(token)
+
 
 async def get_current_user(
-    token: str = Depends(jwt_bearer), 
+    payload: Dict = Depends(get_token_payload), 
     session: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
@@ -55,9 +75,6 @@ async def get_current_user(
     )
 
     try:
-        # Verify JWT token
-        payload = await verify_token(token)
-        
         user_id = payload.get("sub")
         if not user_id:
             raise credentials_exception
@@ -69,16 +86,19 @@ async def get_current_user(
                 detail="Session has been terminated. Please login again."
             )
 
-        # Get user from database
+        version = await user_auth_cache.get(f"version:{int(user_id)}")
+        cached = _user_cache.get(int(user_id))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        # Get user and roles from database in one query
         user_repo = UserRepository(session)
-        user = await user_repo.get_by_id(int(user_id))
+        user = await user_repo.get_by_id_with_roles(int(user_id))
 
         if not user:
             raise credentials_exception
 
-        # Get user roles
-        user_roles = await user_repo.get_user_roles(user.id)
-        roles = [role.name for role in user_roles]
+        roles = [user_role.role.name for user_role in user.roles if user_role.role]
 
         # Get user permissions based on roles
         permissions = get_user_permissions(roles)
@@ -92,6 +112,7 @@ async def get_current_user(
             "is_active": user.is_active,
         }
 
+        _user_cache[user.id] = (version, user_data)
         return user_data
 
     except JWTError:
@@ -112,6 +133,28 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_user_id(
+    current_user: Dict = Depends(get_current_active_user),
+) -> int:
+    """ID of the current active user, for endpoints that need nothing else."""
+    return current_user["id"]
+
+
+async def get_current_username(
+    current_user: Dict = Depends(get_current_active_user),
+) -> str:
+    """Username of the current active user (used for audit logging)."""
+    return current_user.get("username") or "Unknown"
+
+
+async def get_current_session_id(
+    payload: Dict = Depends(get_token_payload),
+    current_user: Dict = Depends(get_current_active_user),
+) -> Optional[str]:
+    """Session ID bound to the access token at login (None for tokens issued without one)."""
+    return payload.get("sid")
+
+
 # ============================================================================
 # ROLE-BASED AUTHORIZATION
 # ============================================================================
@@ -171,10 +214,14 @@ async def require_admin(
 # PERMISSION-BASED AUTHORIZATION (NEW)
 # ============================================================================
 
+@lru_cache(maxsize=None)
 def require_permission(required_permission: Permission):
     """
     Dependency to require specific permission.
     
+    Memoized per permission, so every route guarded by the same permission
+    shares one checker and FastAPI runs it at most once per request.
+    
     Usage:
         @router.post("/", dependencies=[Depends(require_permission(Permission.DEVICE_CREATE))])
     
@@ -1,7 +1,8 @@
 """Role-based permissions configuration."""
 
 from enum import Enum
-from typing import Set, Dict
+from functools import lru_cache
+from typing import FrozenSet, Set, Dict, Tuple
 
 class Permission(str, Enum):
     """Permission types for the application."""
@@ -85,11 +86,12 @@ class Permission(str, Enum):
 # ROLE PERMISSIONS MAPPING
 # ============================================================================
 
-ROLE_PERMISSIONS: Dict[str, Set[Permission]] = {
+# Frozen at import time; per-request checks are plain set lookups.
+ROLE_PERMISSIONS: Dict[str, FrozenSet[Permission]] = {
     # ========================================================================
     # ADMIN - Full access to everything
     # ========================================================================
-    "admin": {
+    "admin": frozenset({
         # Users
         Permission.USER_VIEW,
         Permission.USER_VIEW_ALL,
@@ -147,12 +149,12 @@ ROLE_PERMISSIONS: Dict[str, Set[Permission]] = {
         # MFA
         Permission.MFA_MANAGE,
         Permission.MFA_ADMIN,
-    },
+    }),
     
     # ========================================================================
     # MANAGER - Read access + limited actions (NO create/update/delete)
     # ========================================================================
-    "manager": {
+    "manager": frozenset({
         # Users - View only + approve
         Permission.USER_VIEW,
         Permission.USER_VIEW_ALL,
@@ -189,12 +191,12 @@ ROLE_PERMISSIONS: Dict[str, Set[Permission]] = {
         
         # MFA - Can manage own MFA
         Permission.MFA_MANAGE,
-    },
+    }),
     
     # ========================================================================
     # USER - Limited access (own data + basic operations)
     # ========================================================================
-    "user": {
+    "user": frozenset({
         # Users - Can only view and update self
         Permission.USER_VIEW,  # View own profile
         
@@ -225,7 +227,7 @@ ROLE_PERMISSIONS: Dict[str, Set[Permission]] = {
         
         # MFA - Can manage own MFA
         Permission.MFA_MANAGE,
-    }
+    }),
 }
 
 
@@ -233,6 +235,16 @@ ROLE_PERMISSIONS: Dict[str, Set[Permission]] = {
 # PERMISSION CHECKING FUNCTIONS
 # ============================================================================
 
+_NO_PERMISSIONS: FrozenSet[Permission] = frozenset()
+
+
+@lru_cache(maxsize=128)
+def _permissions_for_roles(roles: Tuple[str, ...]) -> FrozenSet[Permission]:
+    """Union of the permissions of the given roles, memoized per role combination."""
+    if len(roles) == 1:
+        return ROLE_PERMISSIONS.get(roles[0], _NO_PERMISSIONS)
+    return frozenset().union(*(ROLE_PERMISSIONS.get(role, _NO_PERMISSIONS) for role in roles))
+
 def has_permission(user_roles: list[str], required_permission: Permission) -> bool:
     """
     Check if user has required permission based on their roles.
@@ -250,14 +262,10 @@ def has_permission(user_roles: list[str], required_permission: Permission) -> bo
         >>> has_permission(["manager"], Permission.DEVICE_CREATE)
         False
     """
-    for role in user_roles:
-        role_perms = ROLE_PERMISSIONS.get(role, set())
-        if required_permission in role_perms:
-            return True
-    return False
+    return required_permission in _permissions_for_roles(tuple(user_roles))
 
 
-def get_user_permissions(user_roles: list[str]) -> Set[Permission]:
+def get_user_permissions(user_roles: list[str]) -> FrozenSet[Permission]:
     """
     Get all permissions for given user roles.
     
@@ -272,13 +280,10 @@ def get_user_permissions(user_roles: list[str]) -> Set[Permission]:
         >>> Permission.DEVICE_VIEW in perms
         True
     """
-    permissions = set()
-    for role in user_roles:
-        permissions.update(ROLE_PERMISSIONS.get(role, set()))
-    return permissions
+    return _permissions_for_roles(tuple(user_roles))
 
 
-def get_role_permissions(role_name: str) -> Set[Permission]:
+def get_role_permissions(role_name: str) -> FrozenSet[Permission]:
     """
     Get all permissions for a specific role.
     
@@ -293,7 +298,7 @@ def get_role_permissions(role_name: str) -> Set[Permission]:
         >>> len(perms)
         15
     """
-    return ROLE_PERMISSIONS.get(role_name, set())
+    return ROLE_PERMISSIONS.get(role_name, _NO_PERMISSIONS)
 
 
 def can_user_perform_action(user_roles: list[str], action: str) -> bool:
@@ -1,5 +1,6 @@
 """Application settings and configuration."""
 
+from functools import cached_property
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import PostgresDsn, field_validator
 from typing import Any, Dict, Optional, List
@@ -13,11 +14,19 @@ class Settings(BaseSettings):
     VERSION: str = "1.0.0"
     DEBUG: bool = False
     API_V1_STR: str = "/api/v1"
+    EXPOSE_OPENAPI: bool = False  # Serve /openapi.json even when DEBUG is off
+
+    # Server
+    # Number of Uvicorn worker processes (ignored when DEBUG enables reload); also read by
+    # gunicorn.conf.py. Keep WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) within
+    # Postgres max_connections (default 100)
+    WEB_CONCURRENCY: int = 1
 
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://127.0.0.1:3000"
     CORS_HEADERS: str = "*"
     CORS_METHODS: str = "*"
+    CORS_MAX_AGE: int = 600  # seconds browsers may cache preflight responses
 
     # Database
     POSTGRES_SERVER: str
@@ -28,9 +37,15 @@ class Settings(BaseSettings):
     DATABASE_URI: Optional[PostgresDsn] = None
     SQL_ECHO: bool = False
 
-    # Database connection pool settings
-    DB_POOL_SIZE: int = 10
+    # Database connection pool settings (per worker process)
+    DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    # Behind PgBouncer (transaction pooling): no app-side pool, no asyncpg statement cache
+    DB_PGBOUNCER: bool = False
+    # Apply Alembic revisions at startup; turn off when deploys run `alembic upgrade head` themselves
+    DB_MIGRATE_ON_STARTUP: bool = True
 
     # JWT Settings
     # ============================================
@@ -84,6 +99,14 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: Optional[str] = None
     REDIS_DB: int = 0
     REDIS_TTL: int = 3600
+    REDIS_MAX_CONNECTIONS: int = 50
+
+    # Excel/PDF export render processes per web worker (one shared pool); keep it low,
+    # it multiplies with WEB_CONCURRENCY
+    EXPORT_POOL_WORKERS: int = 1
+
+    # HTTP caching - max-age for admin dashboard endpoints (private: per-user, never shared caches)
+    USAGE_HTTP_MAX_AGE: int = 120
 
     # File handling
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
@@ -137,21 +160,21 @@ class Settings(BaseSettings):
             return f"/{v}"
         return v
 
-    @property
+    @cached_property
     def CORS_ORIGINS_LIST(self) -> List[str]:
         """Convert CORS_ORIGINS string to list."""
         if self.CORS_ORIGINS == "*":
             return ["*"]
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
-    @property
+    @cached_property
     def CORS_METHODS_LIST(self) -> List[str]:
         """Convert CORS_METHODS string to list."""
         if self.CORS_METHODS == "*":
             return ["*"]
         return [method.strip() for method in self.CORS_METHODS.split(",")]
 
-    @property
+    @cached_property
     def CORS_HEADERS_LIST(self) -> List[str]:
         """Convert CORS_HEADERS string to list."""
         if self.CORS_HEADERS == "*":
@@ -1,8 +1,14 @@
 """Database setup and session management."""
 
+import asyncio
+import os
 from typing import AsyncGenerator
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel
 
 from src.core.config import settings
@@ -10,13 +16,24 @@ from src.core.config import settings
 # Create async database engine
 ASYNC_DATABASE_URI = str(settings.DATABASE_URI).replace("postgresql://", "postgresql+asyncpg://")
 
-engine = create_async_engine(
-    ASYNC_DATABASE_URI,
-    echo=settings.SQL_ECHO,
-    pool_pre_ping=True,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW
-)
+if settings.DB_PGBOUNCER:
+    # PgBouncer owns pooling; prepared statements don't survive transaction pooling
+    engine = create_async_engine(
+        ASYNC_DATABASE_URI,
+        echo=settings.SQL_ECHO,
+        poolclass=NullPool,
+        connect_args={"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    )
+else:
+    engine = create_async_engine(
+        ASYNC_DATABASE_URI,
+        echo=settings.SQL_ECHO,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE
+    )
 
 # Create async session factory
 async_session = sessionmaker(
@@ -37,12 +54,50 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
 
 
+# Arbitrary app-wide key for the advisory lock that serializes startup DDL
+SCHEMA_LOCK_KEY = 727_410_001
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic")
+
+
+def _upgrade_to_head(sync_conn) -> None:
+    """Apply pending Alembic revisions (indexes, search vector, read models) on this connection."""
+    config = AlembicConfig()
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    config.attributes["connection"] = sync_conn
+    command.upgrade(config, "head")
+
+
 async def create_db_and_tables() -> None:
-    """Create database tables from SQLModel models."""
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+    """Create database tables from SQLModel models, then apply Alembic revisions."""
+    async with engine.connect() as conn:
+        # Concurrent starters (workers, replicas) run the DDL one at a time. Session-level,
+        # so it stays held across the revisions' own commits and autocommit blocks
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            await conn.run_sync(SQLModel.metadata.create_all)
+            await conn.commit()
+            # Revisions build on the tables created above; off when a deploy step runs `alembic upgrade head`
+            if settings.DB_MIGRATE_ON_STARTUP:
+                await conn.run_sync(_upgrade_to_head)
+        finally:
+            await conn.rollback()
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            await conn.commit()
 
 
 async def init_db() -> None:
     """Initialize the database with required tables."""
     await create_db_and_tables()
+
+
+async def warm_up_pool(connections: int = settings.DB_POOL_SIZE) -> None:
+    """Open pooled connections up front so early requests skip connection setup."""
+    if settings.DB_PGBOUNCER:
+        return  # NullPool keeps nothing open
+
+    async def _ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(_ping() for _ in range(connections)))
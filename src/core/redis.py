@@ -1,7 +1,10 @@
 """Redis connection and utilities."""
 
 import redis.asyncio as redis
-from typing import Optional, Any
+from redis.exceptions import LockError
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Any
+import asyncio
 import json
 import logging
 from src.core.config import settings
@@ -12,14 +15,24 @@ logger = logging.getLogger(__name__)
 redis_pool: Optional[redis.ConnectionPool] = None
 redis_client: Optional[redis.Redis] = None
 
+# Atomic fixed-window counter: INCR, and set the TTL only on the first hit
+INCR_WITH_EXPIRE_LUA = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return current
+"""
+_incr_with_expire_script = None
 
-async def init_redis() -> None:
-    """Initialize Redis connection pool."""
+
+async def init_redis() -> bool:
+    """Initialize Redis connection pool. Returns True when connected."""
     global redis_pool, redis_client
     
     if not settings.REDIS_HOST:
         logger.warning("Redis not configured, skipping Redis initialization")
-        return
+        return False
     
     try:
         redis_pool = redis.ConnectionPool(
@@ -28,7 +41,7 @@ async def init_redis() -> None:
             password=settings.REDIS_PASSWORD,
             db=settings.REDIS_DB,
             decode_responses=True,
-            max_connections=20
+            max_connections=settings.REDIS_MAX_CONNECTIONS
         )
         
         redis_client = redis.Redis(connection_pool=redis_pool)
@@ -36,11 +49,30 @@ async def init_redis() -> None:
         # Test connection
         await redis_client.ping()
         logger.info("✅ Redis connected successfully")
+        return True
         
     except Exception as e:
         logger.error(f"❌ Redis connection failed: {e}")
+        if redis_pool:
+            await redis_pool.disconnect()
         redis_pool = None
         redis_client = None
+        return False
+
+
+async def init_redis_with_retry(max_delay: float = 30.0) -> None:
+    """Connect to Redis, retrying with exponential backoff until it succeeds."""
+    if not settings.REDIS_HOST:
+        await init_redis()
+        return
+    
+    delay = 1.0
+    attempt = 1
+    while not await init_redis():
+        logger.warning(f"Redis not ready (attempt {attempt}), retrying in {delay:.0f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+        attempt += 1
 
 
 async def close_redis() -> None:
@@ -59,7 +91,7 @@ async def close_redis() -> None:
 
 
 def get_redis() -> Optional[redis.Redis]:
-    """Get Redis client instance."""
+    """Get the shared Redis client (backed by the global connection pool)."""
     return redis_client
 
 
@@ -107,6 +139,29 @@ async def redis_get(key: str) -> Optional[Any]:
         return None
 
 
+async def redis_mget(keys: list) -> list:
+    """Get many values in one round-trip; missing keys come back as None."""
+    if not redis_client or not keys:
+        return [None] * len(keys)
+    
+    try:
+        values = await redis_client.mget(keys)
+        results = []
+        for value in values:
+            if value is None:
+                results.append(None)
+                continue
+            try:
+                results.append(json.loads(value))
+            except json.JSONDecodeError:
+                results.append(value)
+        return results
+        
+    except Exception as e:
+        logger.error(f"Redis MGET error for {len(keys)} keys: {e}")
+        return [None] * len(keys)
+
+
 async def redis_delete(key: str) -> bool:
     """Delete a key from Redis."""
     if not redis_client:
@@ -122,6 +177,29 @@ async def redis_delete(key: str) -> bool:
         return False
 
 
+async def redis_unlink(*keys: str, patterns: tuple = ()) -> int:
+    """
+    Drop keys and every key matching patterns with a single UNLINK.
+    
+    Patterns are expanded with incremental SCAN rather than KEYS, and UNLINK
+    frees memory off Redis' main thread, so neither call blocks other clients.
+    """
+    if not redis_client:
+        return 0
+    
+    try:
+        targets = list(keys)
+        for pattern in patterns:
+            targets.extend([key async for key in redis_client.scan_iter(match=pattern, count=500)])
+        if not targets:
+            return 0
+        return await redis_client.unlink(*targets)
+        
+    except Exception as e:
+        logger.error(f"Redis UNLINK error for {len(keys)} keys / patterns {patterns}: {e}")
+        return 0
+
+
 async def redis_exists(key: str) -> bool:
     """Check if a key exists in Redis."""
     if not redis_client:
@@ -156,6 +234,49 @@ async def redis_increment(key: str, amount: int = 1, expire: Optional[int] = Non
         return None
 
 
+async def redis_incr_with_expire(key: str, expire: int) -> Optional[int]:
+    """Increment a fixed-window counter in one atomic round-trip (Lua script)."""
+    global _incr_with_expire_script
+    
+    if not redis_client:
+        return None
+    
+    try:
+        if _incr_with_expire_script is None:
+            _incr_with_expire_script = redis_client.register_script(INCR_WITH_EXPIRE_LUA)
+        return await _incr_with_expire_script(keys=[key], args=[expire], client=redis_client)
+        
+    except Exception as e:
+        logger.error(f"Redis INCR_WITH_EXPIRE error for key {key}: {e}")
+        return None
+
+
+@asynccontextmanager
+async def redis_lock(name: str, timeout: float = 10, blocking_timeout: float = 5) -> AsyncIterator[bool]:
+    """
+    Hold a short-lived Redis lock (SET NX PX) for a critical section.
+    
+    Yields True when the lock is held, False when Redis is unavailable and the
+    section runs unlocked. Raises LockError if the lock isn't acquired within
+    blocking_timeout seconds.
+    """
+    if not redis_client:
+        yield False
+        return
+    
+    lock = redis_client.lock(name, timeout=timeout, blocking_timeout=blocking_timeout)
+    if not await lock.acquire():
+        raise LockError(f"Could not acquire lock {name}")
+    try:
+        yield True
+    finally:
+        try:
+            await lock.release()
+        except LockError:
+            # Expired (timeout) before release; nothing left to unlock
+            logger.warning(f"Redis lock {name} expired before release")
+
+
 async def redis_get_pattern(pattern: str) -> list:
     """Get all keys matching a pattern."""
     if not redis_client:
@@ -169,20 +290,3 @@ async def redis_get_pattern(pattern: str) -> list:
         logger.error(f"Redis KEYS error for pattern {pattern}: {e}")
         return []
 
-
-async def redis_flush_pattern(pattern: str) -> int:
-    """Delete all keys matching a pattern."""
-    if not redis_client:
-        return 0
-    
-    try:
-        keys = await redis_get_pattern(pattern)
-        if not keys:
-            return 0
-        
-        result = await redis_client.delete(*keys)
-        return result
-        
-    except Exception as e:
-        logger.error(f"Redis FLUSH error for pattern {pattern}: {e}")
-        return 0
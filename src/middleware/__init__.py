@@ -1,7 +1,8 @@
 """Middleware package."""
 
 from .error_handler import add_error_handlers
+from .health import add_health_check
 from .logging import setup_logging_middleware
 from .rate_limiting import add_rate_limiting
 
-__all__ = ["add_error_handlers", "setup_logging_middleware", "add_rate_limiting"]
+__all__ = ["add_error_handlers", "add_health_check", "setup_logging_middleware", "add_rate_limiting"]
@@ -0,0 +1,38 @@
+"""Response compression middleware."""
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class ExportAwareGZipMiddleware:
+    """GZip API responses except file exports.
+
+    PDF and XLSX bodies are already compressed, so gzipping them burns CPU for
+    nothing, and GZip drops Content-Length, which breaks download progress.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        compresslevel: int = 9,
+        exclude: tuple = ("/export",),
+    ):
+        """Initialize the compression middleware.
+
+        Args:
+            app: ASGI application to wrap
+            minimum_size: Smallest body (bytes) worth compressing
+            compresslevel: GZip level 1-9
+            exclude: Path fragments whose responses are sent uncompressed
+        """
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.exclude = exclude
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and not any(part in scope["path"] for part in self.exclude):
+            await self.gzip(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
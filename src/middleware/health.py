@@ -0,0 +1,40 @@
+"""Health probe short-circuit middleware."""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class HealthCheckMiddleware:
+    """Answer liveness probes before any other middleware runs.
+
+    Load balancers and orchestrators hit the health path several times per
+    second; serving it here skips CORS, GZip, rate limiting and routing.
+    """
+
+    def __init__(self, app: ASGIApp, path: str, body: bytes):
+        """Initialize health check middleware.
+
+        Args:
+            app: ASGI application to wrap
+            path: Probe path to answer (e.g. "/health")
+            body: Pre-serialized JSON response body
+        """
+        self.app = app
+        self.path = path
+        self.body = body
+        self.headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] == self.path and scope["method"] in ("GET", "HEAD"):
+            await send({"type": "http.response.start", "status": 200, "headers": self.headers})
+            await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else self.body})
+            return
+
+        await self.app(scope, receive, send)
+
+
+def add_health_check(app, path: str, body: bytes):
+    """Add the health probe middleware; call last so it is the outermost layer."""
+    app.add_middleware(HealthCheckMiddleware, path=path, body=body)
@@ -3,19 +3,15 @@
 from fastapi import Request, HTTPException, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
-import time
 import logging
-import json
-from typing import Dict, Tuple, Optional
-import asyncio
 
-from src.core.redis import get_redis
+from src.core.redis import get_redis, redis_incr_with_expire
 
 logger = logging.getLogger(__name__)
 
 
 class RateLimitingMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware with Redis-based tracking."""
+    """Rate limiting middleware with Redis-based fixed-window counters."""
     
     def __init__(self, app, calls: int = 100, period: int = 60):
         """Initialize rate limiting middleware.
@@ -28,13 +24,13 @@ class RateLimitingMiddleware(BaseHTTPMiddleware):
         super().__init__(app)
         self.calls = calls
         self.period = period
-        self.redis_prefix = "rate_limit"
+        self.redis_prefix = "api"
     
     async def dispatch(self, request: Request, call_next):
         client_ip = self._get_client_ip(request)
         
-        # Check if request should be rate limited
-        if await self._is_rate_limited(request, client_ip):
+        # Count this request and check the limit in one atomic Redis call
+        if await self._is_rate_limited(client_ip):
             return JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
@@ -44,9 +40,6 @@ class RateLimitingMiddleware(BaseHTTPMiddleware):
                 headers={"Retry-After": str(self.period)}
             )
         
-        # Update request count
-        await self._update_request_count(client_ip)
-        
         response = await call_next(request)
         return response
     
@@ -64,85 +57,25 @@ class RateLimitingMiddleware(BaseHTTPMiddleware):
         # Fallback to direct client IP
         return request.client.host if request.client else "unknown"
     
-    async def _is_rate_limited(self, request: Request, client_ip: str) -> bool:
-        """Check if the client IP is rate limited using Redis."""
-        redis = await get_redis()
-        if not redis:
+    def _redis_key(self, client_ip: str) -> str:
+        """Generate rate limit key for a client."""
+        return f"rl:{client_ip}:{self.redis_prefix}"
+    
+    async def _is_rate_limited(self, client_ip: str) -> bool:
+        """Increment the client's window counter and check it against the limit."""
+        if not get_redis():
             logger.warning("Redis not available, skipping rate limiting")
             return False
-            
-        current_time = time.time()
-        redis_key = f"{self.redis_prefix}:{client_ip}"
         
-        try:
-            # Get client data from Redis
-            client_data_str = await redis.get(redis_key)
-            if client_data_str:
-                client_data = json.loads(client_data_str)
-            else:
-                client_data = {"requests": [], "blocked_until": 0}
-            
-            # Check if client is currently blocked
-            if current_time < client_data["blocked_until"]:
-                return True
-            
-            # Clean old requests (outside the time window)
-            client_data["requests"] = [
-                req_time for req_time in client_data["requests"]
-                if current_time - req_time < self.period
-            ]
-            
-            # Check if limit exceeded
-            if len(client_data["requests"]) >= self.calls:
-                # Block for the remaining time window
-                oldest_request = min(client_data["requests"]) if client_data["requests"] else current_time
-                client_data["blocked_until"] = oldest_request + self.period
-                
-                # Save updated data to Redis
-                await redis.setex(
-                    redis_key, 
-                    self.period * 2,  # TTL longer than period
-                    json.dumps(client_data)
-                )
-                
-                logger.warning(f"Rate limit exceeded for IP {client_ip}. Blocked until {client_data['blocked_until']}")
-                return True
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"Redis error in rate limiting: {e}")
+        count = await redis_incr_with_expire(self._redis_key(client_ip), self.period)
+        if count is None:
             return False
-    
-    async def _update_request_count(self, client_ip: str) -> None:
-        """Update request count for the client IP in Redis."""
-        redis = await get_redis()
-        if not redis:
-            return
-            
-        current_time = time.time()
-        redis_key = f"{self.redis_prefix}:{client_ip}"
         
-        try:
-            # Get current data
-            client_data_str = await redis.get(redis_key)
-            if client_data_str:
-                client_data = json.loads(client_data_str)
-            else:
-                client_data = {"requests": [], "blocked_until": 0}
-            
-            # Add current request
-            client_data["requests"].append(current_time)
-            
-            # Save to Redis with TTL
-            await redis.setex(
-                redis_key, 
-                self.period * 2,  # TTL longer than period
-                json.dumps(client_data)
-            )
-            
-        except Exception as e:
-            logger.error(f"Redis error updating request count: {e}")
+        if count > self.calls:
+            logger.warning(f"Rate limit exceeded for IP {client_ip} ({count}/{self.calls} in {self.period}s)")
+            return True
+        
+        return False
 
 
 class AuthRateLimitingMiddleware(BaseHTTPMiddleware):
@@ -152,7 +85,7 @@ class AuthRateLimitingMiddleware(BaseHTTPMiddleware):
         super().__init__(app)
         self.calls = calls
         self.period = period
-        self.redis_prefix = "auth_rate_limit"
+        self.redis_prefix = "auth"
     
     async def dispatch(self, request: Request, call_next):
         # Only apply to auth endpoints
@@ -200,86 +133,41 @@ class AuthRateLimitingMiddleware(BaseHTTPMiddleware):
         
         return request.client.host if request.client else "unknown"
     
+    def _redis_key(self, client_ip: str) -> str:
+        """Generate auth attempt key for a client."""
+        return f"rl:{client_ip}:{self.redis_prefix}"
+    
     async def _is_auth_rate_limited(self, client_ip: str) -> bool:
-        """Check if auth attempts are rate limited using Redis."""
-        redis = await get_redis()
+        """Check if failed auth attempts in the current window reached the limit."""
+        redis = get_redis()
         if not redis:
             logger.warning("Redis not available, skipping auth rate limiting")
             return False
-            
-        current_time = time.time()
-        redis_key = f"{self.redis_prefix}:{client_ip}"
         
         try:
-            # Get client data from Redis
-            client_data_str = await redis.get(redis_key)
-            if client_data_str:
-                client_data = json.loads(client_data_str)
-            else:
-                client_data = {"attempts": [], "blocked_until": 0}
-            
-            # Check if blocked
-            if current_time < client_data["blocked_until"]:
-                return True
-            
-            # Clean old attempts
-            client_data["attempts"] = [
-                attempt_time for attempt_time in client_data["attempts"]
-                if current_time - attempt_time < self.period
-            ]
-            
-            return len(client_data["attempts"]) >= self.calls
+            attempts = await redis.get(self._redis_key(client_ip))
+            return int(attempts or 0) >= self.calls
             
         except Exception as e:
             logger.error(f"Redis error checking auth rate limit: {e}")
             return False
     
     async def _update_auth_attempt_count(self, client_ip: str) -> None:
-        """Update failed auth attempt count in Redis."""
-        redis = await get_redis()
-        if not redis:
-            return
-            
-        current_time = time.time()
-        redis_key = f"{self.redis_prefix}:{client_ip}"
+        """Record a failed auth attempt (atomic INCR + EXPIRE)."""
+        attempts = await redis_incr_with_expire(self._redis_key(client_ip), self.period)
         
-        try:
-            # Get current data
-            client_data_str = await redis.get(redis_key)
-            if client_data_str:
-                client_data = json.loads(client_data_str)
-            else:
-                client_data = {"attempts": [], "blocked_until": 0}
-            
-            # Add failed attempt
-            client_data["attempts"].append(current_time)
-            
-            # If limit reached, block for the period
-            if len(client_data["attempts"]) >= self.calls:
-                client_data["blocked_until"] = current_time + self.period
-                logger.warning(f"Auth rate limit exceeded for IP {client_ip}")
-            
-            # Save to Redis with TTL
-            await redis.setex(
-                redis_key, 
-                self.period * 2,  # TTL longer than period
-                json.dumps(client_data)
-            )
-            
-        except Exception as e:
-            logger.error(f"Redis error updating auth attempt count: {e}")
+        if attempts is not None and attempts >= self.calls:
+            logger.warning(f"Auth rate limit exceeded for IP {client_ip}")
     
     async def _reset_auth_attempts(self, client_ip: str) -> None:
         """Reset auth attempts on successful login in Redis."""
-        redis = await get_redis()
+        redis = get_redis()
         if not redis:
             return
-            
-        redis_key = f"{self.redis_prefix}:{client_ip}"
         
         try:
             # Delete the key to reset attempts
-            await redis.delete(redis_key)
+            await redis.delete(self._redis_key(client_ip))
             
         except Exception as e:
             logger.error(f"Redis error resetting auth attempts: {e}")
@@ -309,4 +197,4 @@ def add_rate_limiting(app):
         AuthRateLimitingMiddleware, 
         calls=settings.AUTH_RATE_LIMIT_CALLS, 
         period=settings.AUTH_RATE_LIMIT_PERIOD
-    )
+    )
\ No newline at end of file
@@ -11,6 +11,7 @@ if TYPE_CHECKING:
 
 class DeviceChild(SQLModel, table=True):
     __tablename__ = "device_children"
+    # Filter and trigram search indexes live in alembic revision 0003_device_children_indexes
 
     id: Optional[int] = Field(default=None, primary_key=True)
     parent_id: int = Field(sa_column=Column(ForeignKey("devices.id", ondelete="CASCADE"), index=True))
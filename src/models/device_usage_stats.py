@@ -0,0 +1,33 @@
+"""Precomputed per-device loan usage (materialized views, read-only)."""
+
+from sqlalchemy import Column, Date, Integer, MetaData, String, Table
+
+# Kept off SQLModel.metadata so create_all never creates it as a plain table
+usage_stats_metadata = MetaData()
+
+device_usage_stats = Table(
+    "device_usage_stats_mv",
+    usage_stats_metadata,
+    Column("device_id", Integer, primary_key=True),
+    Column("total_usage_days", Integer),
+    Column("total_loans", Integer),
+    Column("last_used_date", Date),
+    Column("last_borrower", String),
+    Column("last_activity", String),
+)
+
+# Per device and calendar month of loan creation; backs the rolling "last N months" usage report
+device_usage_monthly = Table(
+    "device_usage_monthly_mv",
+    usage_stats_metadata,
+    Column("device_id", Integer, primary_key=True),
+    Column("bucket", Date, primary_key=True),
+    Column("loan_count", Integer),
+    Column("total_days_used", Integer),
+)
+
+# The views and their indexes are defined in alembic revision 0005_device_usage_views;
+# change them with a new revision, not here
+
+REFRESH_DEVICE_USAGE_STATS = "REFRESH MATERIALIZED VIEW CONCURRENTLY device_usage_stats_mv"
+REFRESH_DEVICE_USAGE_MONTHLY = "REFRESH MATERIALIZED VIEW CONCURRENTLY device_usage_monthly_mv"
@@ -39,6 +39,8 @@ class ConditionChangeStatus(str, Enum):
 class DeviceLoan(BaseModel, SQLModel, table=True):
     """Main device loan table."""
     __tablename__ = "device_loans"
+    # Live-row indexes: ix_device_loans_borrower_created ("my loans") in alembic revision
+    # 0002_drop_status_condition_idx, ix_device_loans_created_live (date windows) in 0004_loan_indexes
 
     id: Optional[int] = Field(default=None, primary_key=True)
     loan_number: str = Field(unique=True, index=True, description="Auto-generated loan number (BA-YYYY-MM-XXX)")
@@ -106,6 +108,7 @@ class DeviceLoan(BaseModel, SQLModel, table=True):
 
 class DeviceLoanItem(BaseModel, SQLModel, table=True):
     __tablename__ = "device_loan_items"
+    # ix_device_loan_items_loan_device (loan_id INCLUDE device_id): alembic revision 0004_loan_indexes
 
     id: Optional[int] = Field(default=None, primary_key=True)
     loan_id: int = Field(foreign_key="device_loans.id", description="ID peminjaman")
@@ -10,8 +10,14 @@ class DeviceStatus(str, Enum):
     MAINTENANCE = "MAINTENANCE"
     NONAKTIF = "NONAKTIF"
 
+# Full-text search vector over name/code/NUP. Added by the 0001_device_search_vec
+# alembic migration rather than mapped on Device, so ORM inserts never write to
+# the generated column and device selects don't carry it.
+DEVICE_SEARCH_VECTOR = "devices.search_vec"
+
 class Device(SQLModel, table=True):
     __tablename__ = "devices"
+    # By-field list indexes (condition|status, created_at): alembic revision 0002_drop_status_condition_idx
 
     id: Optional[int] = Field(default=None, primary_key=True)
     device_name: str = Field(index=True)
@@ -1,17 +1,38 @@
 """Device repository for database operations."""
 
-from typing import List, Optional
-from datetime import datetime, timedelta
-from sqlalchemy import select, and_, update, func
-from sqlalchemy.orm import selectinload
+from typing import AsyncIterator, List, Optional
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, and_, or_, update, func, case, cast, literal_column, Numeric, bindparam
+from sqlalchemy.orm import selectinload, raiseload
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.attributes import flag_modified
 
-from src.models.perangkat import Device, DeviceStatus
+from src.models.perangkat import Device, DeviceStatus, DEVICE_SEARCH_VECTOR
 from src.models.device_child import DeviceChild
+from src.models.device_usage_stats import device_usage_monthly, device_usage_stats
 from src.models.loan import DeviceCondition
 from src.schemas.device import DeviceCreate, DeviceUpdate
 import os
+import re
+
+# Loader options for list/search queries: DeviceResponse serializes only
+# Device.children, so that is loaded explicitly and any other lazy load
+# raises instead of silently issuing one SELECT per row
+_LIST_LOADER_OPTIONS = (
+    selectinload(Device.children).raiseload("*"),
+    raiseload("*"),
+)
+
+_SEARCH_WORD_RE = re.compile(r"\w+")
+
+# Scanner lookups by code/NUP are hot and never change shape: build them once so each call only
+# binds the value (asyncpg already keeps the server-side prepared statement per connection)
+_DEVICE_BY_CODE = (
+    select(Device).options(*_LIST_LOADER_OPTIONS).where(Device.device_code == bindparam("device_code"))
+)
+_DEVICE_BY_NUP = (
+    select(Device).options(*_LIST_LOADER_OPTIONS).where(Device.nup_device == bindparam("nup_device"))
+)
 
 def no_deleted_filter(query):
     """Remove any deleted_at filter safely (for hard delete mode)."""
@@ -46,16 +67,22 @@ class DeviceRepository:
         print("❌ [DeviceRepo] tidak ditemukan di devices maupun device_children")
         return None
 
+    async def get_many(self, device_ids: List[int]) -> List[Device]:
+        """Get several devices by ID in one IN query (order not guaranteed)."""
+        if not device_ids:
+            return []
+        query = select(Device).options(*_LIST_LOADER_OPTIONS).where(Device.id.in_(device_ids))
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
     async def get_by_code(self, device_code: str) -> Optional[Device]:
         """Get device by code."""
-        query = select(Device).where(Device.device_code == device_code)
-        result = await self.session.execute(query)
+        result = await self.session.execute(_DEVICE_BY_CODE, {"device_code": device_code})
         return result.scalar_one_or_none()
 
     async def get_by_nup(self, nup_device: str) -> Optional[Device]:
         """Get device by NUP."""
-        query = select(Device).where(Device.nup_device == nup_device)
-        result = await self.session.execute(query)
+        result = await self.session.execute(_DEVICE_BY_NUP, {"nup_device": nup_device})
         return result.scalar_one_or_none()
 
     async def create(self, device_data: DeviceCreate) -> Device:
@@ -141,7 +168,7 @@ class DeviceRepository:
 
     async def get_all(self, skip: int = 0, limit: int = 10, filters: dict = None, sort_by: str = "created_at", sort_order: str = "desc") -> List[Device]:
         """Get all devices with pagination and filtering."""
-        query = select(Device).options(selectinload(Device.children))
+        query = select(Device).options(*_LIST_LOADER_OPTIONS)
         
         # Apply filters
         if filters:
@@ -502,254 +529,249 @@ class DeviceRepository:
         return device
 
     async def search_devices(self, search_term: str, limit: int = 10) -> List[Device]:
-        """Search devices by name, code, or NUP."""
+        """Search devices by name, code, or NUP (word-prefix match on the GIN-indexed search vector, then code/NUP substrings)."""
+        # "lap 12" -> "lap:* & 12:*"; punctuation is dropped so user input can't break the tsquery syntax
+        words = _SEARCH_WORD_RE.findall(search_term)
+        if not words:
+            return []
+        tsquery = " & ".join(f"{word}:*" for word in words)
         query = (
             select(Device)
-            .where(
-                (
-                    Device.device_name.ilike(f"%{search_term}%")
-                    | Device.device_code.ilike(f"%{search_term}%")
-                    | Device.nup_device.ilike(f"%{search_term}%")
-                )
-            )
+            .options(*_LIST_LOADER_OPTIONS)
+            .where(literal_column(DEVICE_SEARCH_VECTOR).op("@@")(func.to_tsquery("simple", tsquery)))
             .limit(limit)
         )
 
         result = await self.session.execute(query)
-        return result.scalars().all()
+        devices = list(result.scalars().all())
+
+        if len(devices) < limit:
+            # Prefix search misses matches inside codes/NUPs ("0123" -> "NUP-20240123"),
+            # which the old ILIKE search found; top up with those
+            pattern = f"%{search_term.strip()}%"
+            query = (
+                select(Device)
+                .options(*_LIST_LOADER_OPTIONS)
+                .where(or_(Device.device_code.ilike(pattern), Device.nup_device.ilike(pattern)))
+                .where(Device.id.notin_([device.id for device in devices]))
+                .limit(limit - len(devices))
+            )
+            result = await self.session.execute(query)
+            devices.extend(result.scalars().all())
 
-    async def get_device_usage_statistics(self, filters: dict = None, skip: int = 0, limit: int = 20) -> tuple:
-        """Get detailed device usage statistics."""
-        from ..models.loan import DeviceLoan, DeviceLoanItem, LoanStatus
+        return devices
+
+    @staticmethod
+    def _usage_statistics_select():
+        """Devices LEFT JOIN the precomputed usage view, with the derived usage columns."""
+        usage_stats = device_usage_stats
         
-        # Base query for device usage statistics
-        base_query = """
-        SELECT 
-            d.id as device_id,
-            d.nup_device,
-            d.device_name,
-            COALESCE(d.bmn_brand, d.sample_brand) as device_brand,
-            d.device_year,
-            d.device_condition,
-            d.device_status,
-            COALESCE(usage_stats.total_usage_days, 0) as total_usage_days,
-            COALESCE(usage_stats.total_loans, 0) as total_loans,
-            usage_stats.last_used_date,
-            usage_stats.last_borrower,
-            usage_stats.last_activity,
-            CASE 
-                WHEN usage_stats.total_loans > 0 
-                THEN ROUND(usage_stats.total_usage_days::numeric / usage_stats.total_loans::numeric, 2)
-                ELSE 0 
-            END as average_usage_per_loan,
-            CASE 
-                WHEN usage_stats.total_loans = 0 THEN 0
-                WHEN usage_stats.total_loans >= 20 THEN 100
-                ELSE ROUND((usage_stats.total_loans::numeric / 20::numeric) * 100, 1)
-            END as usage_frequency_score
-        FROM devices d
-        LEFT JOIN (
-            SELECT 
-                dli.device_id,
-                SUM(dl.usage_duration_days * dli.quantity) as total_usage_days,
-                COUNT(DISTINCT dl.id) as total_loans,
-                MAX(dl.loan_end_date) as last_used_date,
-                MAX(dl.borrower_name) FILTER (WHERE dl.loan_end_date = MAX(dl.loan_end_date) OVER (PARTITION BY dli.device_id)) as last_borrower,
-                MAX(dl.activity_name) FILTER (WHERE dl.loan_end_date = MAX(dl.loan_end_date) OVER (PARTITION BY dli.device_id)) as last_activity
-            FROM device_loan_items dli
-            JOIN device_loans dl ON dli.loan_id = dl.id
-            WHERE dl.deleted_at IS NULL 
-                AND dl.status IN ('RETURNED', 'OVERDUE', 'ACTIVE')
-            GROUP BY dli.device_id
-        ) usage_stats ON d.id = usage_stats.device_id
-        WHERE d.deleted_at IS NULL
-        """
+        total_usage_days = func.coalesce(usage_stats.c.total_usage_days, 0)
+        total_loans = func.coalesce(usage_stats.c.total_loans, 0)
+        average_usage_per_loan = case(
+            (total_loans > 0, func.round(cast(usage_stats.c.total_usage_days, Numeric) / total_loans, 2)),
+            else_=0,
+        )
+        usage_frequency_score = case(
+            (total_loans == 0, 0),
+            (total_loans >= 20, 100),
+            else_=func.round(cast(total_loans, Numeric) / 20 * 100, 1),
+        )
         
-        # Add filters
-        filter_conditions = []
-        params = {}
+        # Column order is relied on by DeviceService (row[0]..row[13])
+        query = (
+            select(
+                Device.id.label("device_id"),
+                Device.nup_device,
+                Device.device_name,
+                func.coalesce(Device.bmn_brand, Device.sample_brand).label("device_brand"),
+                Device.device_year,
+                Device.device_condition,
+                Device.device_status,
+                total_usage_days.label("total_usage_days"),
+                total_loans.label("total_loans"),
+                usage_stats.c.last_used_date,
+                usage_stats.c.last_borrower,
+                usage_stats.c.last_activity,
+                average_usage_per_loan.label("average_usage_per_loan"),
+                usage_frequency_score.label("usage_frequency_score"),
+            )
+            .outerjoin(usage_stats, usage_stats.c.device_id == Device.id)
+        )
+        return query
+
+    async def get_never_used(self, limit: int = 1000) -> List[Device]:
+        """Get devices with no counted loans (absent from the usage view), children loaded in one query."""
+        query = (
+            select(Device)
+            .options(*_LIST_LOADER_OPTIONS)
+            .outerjoin(device_usage_stats, device_usage_stats.c.device_id == Device.id)
+            .where(device_usage_stats.c.device_id.is_(None))
+            .order_by(Device.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return result.scalars().all()
+
+    async def get_device_usage_for(self, device_id: int):
+        """Get one device's usage statistics row (primary-key lookups on both sides)."""
+        result = await self.session.execute(
+            self._usage_statistics_select().where(Device.id == device_id)
+        )
+        return result.first()
+
+    @classmethod
+    def _filtered_usage_statistics(cls, filters: dict = None) -> tuple:
+        """Usage statistics select with filters applied, plus its ORDER BY (sort_by/sort_order)."""
+        query = cls._usage_statistics_select()
+        columns = query.selected_columns
+        total_usage_days = columns.total_usage_days
+        total_loans = columns.total_loans
+        last_used_date = columns.last_used_date
         
+        # Add filters
         if filters:
             if filters.get("device_name"):
-                filter_conditions.append("d.device_name ILIKE :device_name")
-                params["device_name"] = f"%{filters['device_name']}%"
-            
+                query = query.where(Device.device_name.ilike(f"%{filters['device_name']}%"))
             if filters.get("nup_device"):
-                filter_conditions.append("d.nup_device ILIKE :nup_device")
-                params["nup_device"] = f"%{filters['nup_device']}%"
-            
+                query = query.where(Device.nup_device.ilike(f"%{filters['nup_device']}%"))
             if filters.get("device_brand"):
-                filter_conditions.append("(d.bmn_brand ILIKE :device_brand OR d.sample_brand ILIKE :device_brand)")
-                params["device_brand"] = f"%{filters['device_brand']}%"
-            
+                brand = f"%{filters['device_brand']}%"
+                query = query.where(Device.bmn_brand.ilike(brand) | Device.sample_brand.ilike(brand))
             if filters.get("device_year"):
-                filter_conditions.append("d.device_year = :device_year")
-                params["device_year"] = filters["device_year"]
-            
+                query = query.where(Device.device_year == filters["device_year"])
             if filters.get("device_condition"):
-                filter_conditions.append("d.device_condition = :device_condition")
-                params["device_condition"] = filters["device_condition"]
-            
+                query = query.where(Device.device_condition == filters["device_condition"])
             if filters.get("device_status"):
-                filter_conditions.append("d.device_status = :device_status")
-                params["device_status"] = filters["device_status"]
-            
+                query = query.where(Device.device_status == filters["device_status"])
             if filters.get("min_usage_days") is not None:
-                filter_conditions.append("COALESCE(usage_stats.total_usage_days, 0) >= :min_usage_days")
-                params["min_usage_days"] = filters["min_usage_days"]
-            
+                query = query.where(total_usage_days >= filters["min_usage_days"])
             if filters.get("max_usage_days") is not None:
-                filter_conditions.append("COALESCE(usage_stats.total_usage_days, 0) <= :max_usage_days")
-                params["max_usage_days"] = filters["max_usage_days"]
-            
+                query = query.where(total_usage_days <= filters["max_usage_days"])
             if filters.get("min_loans") is not None:
-                filter_conditions.append("COALESCE(usage_stats.total_loans, 0) >= :min_loans")
-                params["min_loans"] = filters["min_loans"]
-            
+                query = query.where(total_loans >= filters["min_loans"])
+            if filters.get("max_loans") is not None:
+                query = query.where(total_loans <= filters["max_loans"])
             if filters.get("last_used_from"):
-                filter_conditions.append("usage_stats.last_used_date >= :last_used_from")
-                params["last_used_from"] = filters["last_used_from"]
-            
+                query = query.where(last_used_date >= filters["last_used_from"])
             if filters.get("last_used_to"):
-                filter_conditions.append("usage_stats.last_used_date <= :last_used_to")
-                params["last_used_to"] = filters["last_used_to"]
+                query = query.where(last_used_date <= filters["last_used_to"])
         
-        if filter_conditions:
-            base_query += " AND " + " AND ".join(filter_conditions)
-        
-        # Count query
-        count_query = f"SELECT COUNT(*) FROM ({base_query}) as counted"
-        count_result = await self.session.execute(count_query, params)
-        total = count_result.scalar()
-        
-        # Add sorting and pagination
         sort_by = filters.get("sort_by", "total_usage_days") if filters else "total_usage_days"
         sort_order = filters.get("sort_order", "desc") if filters else "desc"
         
-        # Map sort fields to actual column names
+        # Map sort fields to actual columns
         sort_mapping = {
-            "total_usage_days": "total_usage_days",
-            "total_loans": "total_loans",
-            "last_used_date": "last_used_date",
-            "device_name": "d.device_name",
-            "nup_device": "d.nup_device",
-            "device_year": "d.device_year",
-            "usage_frequency_score": "usage_frequency_score"
+            "total_usage_days": total_usage_days,
+            "total_loans": total_loans,
+            "last_used_date": last_used_date,
+            "device_name": Device.device_name,
+            "nup_device": Device.nup_device,
+            "device_year": Device.device_year,
+            "usage_frequency_score": columns.usage_frequency_score,
         }
+        sort_column = sort_mapping.get(sort_by, total_usage_days)
+        sort_column = sort_column.asc() if sort_order == "asc" else sort_column.desc()
         
-        actual_sort_field = sort_mapping.get(sort_by, "total_usage_days")
+        return query, (sort_column, Device.id)
+
+    async def get_device_usage_statistics(self, filters: dict = None, skip: int = 0, limit: int = 20) -> tuple:
+        """Get detailed device usage statistics from the precomputed usage view (one page per query)."""
+        query, order_by = self._filtered_usage_statistics(filters)
         
-        base_query += f" ORDER BY {actual_sort_field} {sort_order.upper()}"
-        base_query += f" LIMIT {limit} OFFSET {skip}"
+        # Count query
+        count_result = await self.session.execute(select(func.count()).select_from(query.subquery()))
+        total = count_result.scalar_one()
         
         # Execute main query
-        result = await self.session.execute(base_query, params)
+        result = await self.session.execute(query.order_by(*order_by).offset(skip).limit(limit))
         devices_data = result.fetchall()
         
         return devices_data, total
 
+    async def stream_device_usage_statistics(self, filters: dict = None, batch_size: int = 200) -> AsyncIterator:
+        """Yield every matching usage statistics row (no pagination), fetched batch_size at a time."""
+        query, order_by = self._filtered_usage_statistics(filters)
+        result = await self.session.stream(query.order_by(*order_by).execution_options(yield_per=batch_size))
+        async for row in result:
+            yield row
+
+    async def get_usage_by_device_since(self, since: date) -> list:
+        """Loan count and days used per device over the monthly buckets from since's month on, busiest first."""
+        usage = device_usage_monthly
+        loan_count = func.sum(usage.c.loan_count)
+        query = (
+            select(
+                Device.device_name,
+                Device.device_code,
+                loan_count.label("loan_count"),
+                func.sum(usage.c.total_days_used).label("total_days_used"),
+            )
+            .join(usage, usage.c.device_id == Device.id)
+            .where(usage.c.bucket >= since.replace(day=1))
+            .group_by(Device.id, Device.device_name, Device.device_code)
+            .order_by(loan_count.desc())
+        )
+        result = await self.session.execute(query)
+        return result.fetchall()
+
     async def get_device_usage_summary(self) -> dict:
-        """Get device usage summary statistics."""
-        from ..models.loan import DeviceLoan, DeviceLoanItem
-        
-        summary_query = """
-        SELECT 
-            COUNT(DISTINCT d.id) as total_devices,
-            COUNT(DISTINCT CASE WHEN usage_stats.total_loans > 0 THEN d.id END) as devices_with_usage,
-            COUNT(DISTINCT CASE WHEN usage_stats.total_loans = 0 OR usage_stats.total_loans IS NULL THEN d.id END) as devices_never_used,
-            COALESCE(SUM(usage_stats.total_usage_days), 0) as total_usage_days_all,
-            ROUND(AVG(COALESCE(usage_stats.total_usage_days, 0)), 2) as average_usage_per_device
-        FROM devices d
-        LEFT JOIN (
-            SELECT 
-                dli.device_id,
-                SUM(dl.usage_duration_days * dli.quantity) as total_usage_days,
-                COUNT(DISTINCT dl.id) as total_loans
-            FROM device_loan_items dli
-            JOIN device_loans dl ON dli.loan_id = dl.id
-            WHERE dl.deleted_at IS NULL 
-                AND dl.status IN ('RETURNED', 'OVERDUE', 'ACTIVE')
-            GROUP BY dli.device_id
-        ) usage_stats ON d.id = usage_stats.device_id
-        WHERE d.deleted_at IS NULL
-        """
+        """Get device usage summary statistics from the precomputed usage view."""
+        usage_stats = device_usage_stats
+        total_usage_days = func.coalesce(usage_stats.c.total_usage_days, 0)
+        with_usage = Device.__table__.outerjoin(usage_stats, usage_stats.c.device_id == Device.id)
         
-        result = await self.session.execute(summary_query)
-        summary_data = result.fetchone()
-        
-        # Get most and least used devices
-        most_used_query = """
-        SELECT d.device_name, d.nup_device, usage_stats.total_usage_days, usage_stats.total_loans
-        FROM devices d
-        JOIN (
-            SELECT 
-                dli.device_id,
-                SUM(dl.usage_duration_days * dli.quantity) as total_usage_days,
-                COUNT(DISTINCT dl.id) as total_loans
-            FROM device_loan_items dli
-            JOIN device_loans dl ON dli.loan_id = dl.id
-            WHERE dl.deleted_at IS NULL 
-                AND dl.status IN ('RETURNED', 'OVERDUE', 'ACTIVE')
-            GROUP BY dli.device_id
-        ) usage_stats ON d.id = usage_stats.device_id
-        WHERE d.deleted_at IS NULL
-        ORDER BY usage_stats.total_usage_days DESC
-        LIMIT 1
-        """
-        
-        most_used_result = await self.session.execute(most_used_query)
-        most_used = most_used_result.fetchone()
-        
-        # Get devices by condition
-        condition_query = """
-        SELECT device_condition, COUNT(*) as count
-        FROM devices 
-        WHERE deleted_at IS NULL
-        GROUP BY device_condition
-        """
-        
-        condition_result = await self.session.execute(condition_query)
-        devices_by_condition = {row[0] or "Unknown": row[1] for row in condition_result.fetchall()}
+        summary_result = await self.session.execute(
+            select(
+                func.count(Device.id),
+                func.count(usage_stats.c.device_id),
+                func.coalesce(func.sum(usage_stats.c.total_usage_days), 0),
+                func.coalesce(func.round(func.avg(total_usage_days), 2), 0),
+            ).select_from(with_usage)
+        )
+        summary_data = summary_result.one()
         
-        # Get devices by status
-        status_query = """
-        SELECT device_status, COUNT(*) as count
-        FROM devices 
-        WHERE deleted_at IS NULL
-        GROUP BY device_status
-        """
+        # Most used device: top of the total_usage_days index
+        most_used_result = await self.session.execute(
+            select(
+                Device.device_name, Device.nup_device,
+                usage_stats.c.total_usage_days, usage_stats.c.total_loans,
+            )
+            .join(usage_stats, usage_stats.c.device_id == Device.id)
+            .order_by(usage_stats.c.total_usage_days.desc(), Device.id)
+            .limit(1)
+        )
+        most_used = most_used_result.first()
         
-        status_result = await self.session.execute(status_query)
-        devices_by_status = {row[0] or "Unknown": row[1] for row in status_result.fetchall()}
+        condition_result = await self.session.execute(
+            select(Device.device_condition, func.count()).group_by(Device.device_condition)
+        )
+        devices_by_condition = {
+            getattr(row[0], "value", row[0]) or "Unknown": row[1] for row in condition_result.all()
+        }
         
-        # Get usage by year
-        year_query = """
-        SELECT d.device_year, COALESCE(SUM(usage_stats.total_usage_days), 0) as total_usage
-        FROM devices d
-        LEFT JOIN (
-            SELECT 
-                dli.device_id,
-                SUM(dl.usage_duration_days * dli.quantity) as total_usage_days
-            FROM device_loan_items dli
-            JOIN device_loans dl ON dli.loan_id = dl.id
-            WHERE dl.deleted_at IS NULL 
-                AND dl.status IN ('RETURNED', 'OVERDUE', 'ACTIVE')
-            GROUP BY dli.device_id
-        ) usage_stats ON d.id = usage_stats.device_id
-        WHERE d.deleted_at IS NULL AND d.device_year IS NOT NULL
-        GROUP BY d.device_year
-        ORDER BY d.device_year DESC
-        """
+        status_result = await self.session.execute(
+            select(Device.device_status, func.count()).group_by(Device.device_status)
+        )
+        devices_by_status = {
+            getattr(row[0], "value", row[0]) or "Unknown": row[1] for row in status_result.all()
+        }
         
-        year_result = await self.session.execute(year_query)
-        usage_by_year = {str(row[0]): int(row[1]) for row in year_result.fetchall()}
+        year_result = await self.session.execute(
+            select(Device.device_year, func.coalesce(func.sum(usage_stats.c.total_usage_days), 0))
+            .select_from(with_usage)
+            .where(Device.device_year.is_not(None))
+            .group_by(Device.device_year)
+            .order_by(Device.device_year.desc())
+        )
+        usage_by_year = {str(row[0]): int(row[1]) for row in year_result.all()}
         
         return {
             "total_devices": summary_data[0],
             "devices_with_usage": summary_data[1],
-            "devices_never_used": summary_data[2],
-            "total_usage_days_all": int(summary_data[3]),
-            "average_usage_per_device": float(summary_data[4]),
+            "devices_never_used": summary_data[0] - summary_data[1],
+            "total_usage_days_all": int(summary_data[2]),
+            "average_usage_per_device": float(summary_data[3]),
             "most_used_device": {
                 "device_name": most_used[0],
                 "nup_device": most_used[1],
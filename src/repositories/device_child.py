@@ -1,8 +1,9 @@
 """Repository layer for DeviceChild."""
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, func, or_
 from sqlalchemy.future import select
 from src.models.device_child import DeviceChild
 
@@ -11,19 +12,61 @@ class DeviceChildRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_all(self, skip: int = 0, limit: int = 10, parent_id: Optional[int] = None):
-        """Ambil semua child (bisa difilter berdasarkan parent_id)."""
+    async def get_all(self, skip: int = 0, limit: int = 10, filters: Optional[Dict[str, Any]] = None):
+        """Ambil semua child (bisa difilter berdasarkan parent_id, nama, kode, NUP, status, kondisi)."""
         query = select(DeviceChild)
-        if parent_id:
-            query = query.where(DeviceChild.parent_id == parent_id)
+        if filters:
+            if filters.get("parent_id") is not None:
+                query = query.where(DeviceChild.parent_id == filters["parent_id"])
+            if filters.get("device_name"):
+                query = query.where(DeviceChild.device_name.ilike(f"%{filters['device_name']}%"))
+            if filters.get("device_code"):
+                query = query.where(DeviceChild.device_code.ilike(f"%{filters['device_code']}%"))
+            if filters.get("nup_device"):
+                query = query.where(DeviceChild.nup_device.ilike(f"%{filters['nup_device']}%"))
+            if filters.get("device_status"):
+                query = query.where(DeviceChild.device_status == filters["device_status"])
+            if filters.get("device_condition"):
+                query = query.where(DeviceChild.device_condition == filters["device_condition"])
 
-        result = await self.session.execute(query.offset(skip).limit(limit))
+        # LIMIT/OFFSET and COUNT(*) both run in Postgres with the same filters
+        result = await self.session.execute(query.order_by(DeviceChild.id).offset(skip).limit(limit))
         items = result.scalars().all()
 
-        total_result = await self.session.execute(select(DeviceChild))
-        total = len(total_result.scalars().all())
+        total_result = await self.session.execute(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+        total = total_result.scalar_one()
         return items, total
 
+    async def search(self, search_term: str, limit: int = 10) -> List[DeviceChild]:
+        """Cari child berdasarkan nama, kode, atau NUP; yang diawali kata kunci tampil lebih dulu."""
+        contains = f"%{search_term}%"
+        prefix = f"{search_term}%"
+        # Tiga ILIKE di-OR agar Postgres bisa menggabungkan bitmap scan dari index trigram
+        query = (
+            select(DeviceChild)
+            .where(or_(
+                DeviceChild.device_name.ilike(contains),
+                DeviceChild.device_code.ilike(contains),
+                DeviceChild.nup_device.ilike(contains),
+            ))
+            .order_by(
+                case(
+                    (or_(
+                        DeviceChild.device_name.ilike(prefix),
+                        DeviceChild.device_code.ilike(prefix),
+                        DeviceChild.nup_device.ilike(prefix),
+                    ), 0),
+                    else_=1,
+                ),
+                DeviceChild.id,
+            )
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
     async def get_by_id(self, child_id: int) -> Optional[DeviceChild]:
         """Ambil satu child berdasarkan ID."""
         result = await self.session.execute(select(DeviceChild).where(DeviceChild.id == child_id))
@@ -1,7 +1,7 @@
 """Device Group repository for database operations."""
 
 from typing import Optional, List, Dict, Any
-from sqlalchemy import select, func, delete, or_
+from sqlalchemy import select, func, delete, or_, literal, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -16,6 +16,22 @@ class DeviceGroupRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
     
+    @staticmethod
+    def _item_device_loaders(path=None) -> tuple:
+        """
+        Eager-load a group item's device and child device in one IN query each.
+        
+        Device.children and DeviceChild.parent are lazy="selectin" on the models,
+        which would otherwise cascade into loading every sibling of every member;
+        group responses never read them, so they are blocked here.
+        """
+        device = path.selectinload(DeviceGroupItem.device) if path else selectinload(DeviceGroupItem.device)
+        child = path.selectinload(DeviceGroupItem.child_device) if path else selectinload(DeviceGroupItem.child_device)
+        return (
+            device.raiseload(Device.children),
+            child.raiseload(DeviceChild.parent),
+        )
+    
     async def create_group(self, group_data: Dict[str, Any]) -> DeviceGroup:
         """Create a new device group."""
         group = DeviceGroup(**group_data)
@@ -25,20 +41,25 @@ class DeviceGroupRepository:
         return group
     
     async def get_group(self, group_id: int) -> Optional[DeviceGroup]:
-        """Get device group by ID with relationships."""
+        """Get device group by ID with its items and their devices (3 queries total)."""
         query = (
             select(DeviceGroup)
-            .options(
-                selectinload(DeviceGroup.group_items)
-                .selectinload(DeviceGroupItem.device),
-                selectinload(DeviceGroup.group_items)
-                .selectinload(DeviceGroupItem.child_device)
-            )
+            .options(*self._item_device_loaders(selectinload(DeviceGroup.group_items)))
             .where(DeviceGroup.id == group_id)
+            # Items may have been added/removed earlier in this session
+            .execution_options(populate_existing=True)
         )
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
     
+    async def get_group_owner(self, group_id: int):
+        """Get a group's id, user_id and name without loading its items."""
+        result = await self.session.execute(
+            select(DeviceGroup.id, DeviceGroup.user_id, DeviceGroup.name)
+            .where(DeviceGroup.id == group_id)
+        )
+        return result.one_or_none()
+    
     async def get_user_groups(
         self, 
         user_id: int, 
@@ -155,10 +176,7 @@ class DeviceGroupRepository:
         """Get all devices in a group with full details."""
         query = (
             select(DeviceGroupItem)
-            .options(
-                selectinload(DeviceGroupItem.device),
-                selectinload(DeviceGroupItem.child_device)
-            )
+            .options(*self._item_device_loaders())
             .where(DeviceGroupItem.group_id == group_id)
             .order_by(DeviceGroupItem.added_at)
         )
@@ -167,27 +185,40 @@ class DeviceGroupRepository:
         return list(result.scalars().all())
     
     async def check_group_devices_availability(self, group_id: int) -> Dict[str, Any]:
-        """Check if all devices in a group are available."""
-        items = await self.get_group_devices(group_id)
+        """Check if all devices in a group are available (one query, no ORM loading)."""
+        parent_rows = (
+            select(
+                Device.id, Device.device_name, Device.device_code, Device.device_status,
+                literal(False).label("is_child"), DeviceGroupItem.added_at
+            )
+            .join(DeviceGroupItem, DeviceGroupItem.device_id == Device.id)
+            .where(DeviceGroupItem.group_id == group_id)
+        )
+        child_rows = (
+            select(
+                DeviceChild.id, DeviceChild.device_name, DeviceChild.device_code, DeviceChild.device_status,
+                literal(True).label("is_child"), DeviceGroupItem.added_at
+            )
+            .join(DeviceGroupItem, DeviceGroupItem.child_device_id == DeviceChild.id)
+            .where(DeviceGroupItem.group_id == group_id, DeviceGroupItem.device_id.is_(None))
+        )
+        rows = union_all(parent_rows, child_rows).subquery()
+        result = await self.session.execute(select(rows).order_by(rows.c.added_at))
         
         all_available = True
         unavailable = []
         device_details = []
         
-        for item in items:
-            device = item.device if item.device_id else item.child_device
-            if not device:
-                continue
-            
-            is_available = device.device_status == DeviceStatus.TERSEDIA
+        for row in result.all():
+            is_available = row.device_status == DeviceStatus.TERSEDIA
             
             device_info = {
-                "id": device.id,
-                "name": device.device_name,
-                "code": device.device_code,
-                "status": device.device_status.value if isinstance(device.device_status, DeviceStatus) else device.device_status,
+                "id": row.id,
+                "name": row.device_name,
+                "code": row.device_code,
+                "status": row.device_status.value if isinstance(row.device_status, DeviceStatus) else row.device_status,
                 "is_available": is_available,
-                "is_child": item.child_device_id is not None
+                "is_child": row.is_child
             }
             
             device_details.append(device_info)
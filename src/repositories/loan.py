@@ -1,8 +1,9 @@
 """Loan repository for database operations."""
 import logging
-from typing import List, Optional, Dict, Tuple
+from typing import AsyncIterator, List, Optional, Dict, Tuple
 from datetime import datetime, date, timedelta
 from sqlalchemy import select, and_, or_, update, func, join
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -513,14 +514,10 @@ class LoanRepository:
         
         return loans, total
 
-    async def get_all(self, filters: DeviceLoanFilter) -> Tuple[List[DeviceLoan], int]:
-        """Get all loans with filtering and pagination."""
-        # Base query
-        query = select(DeviceLoan).where(DeviceLoan.deleted_at.is_(None))
-        count_query = select(func.count(DeviceLoan.id)).where(DeviceLoan.deleted_at.is_(None))
-        
-        # Apply filters
-        conditions = []
+    @staticmethod
+    def _filter_conditions(filters: DeviceLoanFilter) -> list:
+        """WHERE conditions for a loan filter (soft-deleted loans always excluded)."""
+        conditions = [DeviceLoan.deleted_at.is_(None)]
         
         if filters.status:
             conditions.append(DeviceLoan.status == filters.status)
@@ -550,28 +547,32 @@ class LoanRepository:
             conditions.append(DeviceLoan.loan_end_date <= filters.loan_end_date_to)
         
         if filters.device_id:
-            # Join with loan items to filter by device
-            query = query.join(DeviceLoanItem).where(DeviceLoanItem.device_id == filters.device_id)
-            count_query = count_query.join(DeviceLoanItem).where(DeviceLoanItem.device_id == filters.device_id)
+            # Semi-join: a loan listing the device twice still matches once
+            conditions.append(DeviceLoan.id.in_(
+                select(DeviceLoanItem.loan_id).where(DeviceLoanItem.device_id == filters.device_id)
+            ))
         
-        if conditions:
-            query = query.where(and_(*conditions))
-            count_query = count_query.where(and_(*conditions))
+        return conditions
+
+    @staticmethod
+    def _apply_sort(query, filters: DeviceLoanFilter):
+        """Order by filters.sort_by when it names a DeviceLoan column."""
+        if filters.sort_by and hasattr(DeviceLoan, filters.sort_by):
+            column = getattr(DeviceLoan, filters.sort_by)
+            query = query.order_by(column.desc() if filters.sort_order == "desc" else column)
+        return query
+
+    async def get_all(self, filters: DeviceLoanFilter) -> Tuple[List[DeviceLoan], int]:
+        """Get all loans with filtering and pagination."""
+        conditions = self._filter_conditions(filters)
         
         # Get total count
-        count_result = await self.session.execute(count_query)
+        count_result = await self.session.execute(select(func.count(DeviceLoan.id)).where(*conditions))
         total = count_result.scalar()
         
-        # Apply sorting
-        if hasattr(DeviceLoan, filters.sort_by):
-            if filters.sort_order == "desc":
-                query = query.order_by(getattr(DeviceLoan, filters.sort_by).desc())
-            else:
-                query = query.order_by(getattr(DeviceLoan, filters.sort_by))
-        
         # Add relationships and pagination
         query = (
-            query
+            self._apply_sort(select(DeviceLoan).where(*conditions), filters)
             .options(
                 selectinload(DeviceLoan.loan_items).selectinload(DeviceLoanItem.device),
                 selectinload(DeviceLoan.borrower)
@@ -585,6 +586,41 @@ class LoanRepository:
         
         return loans, total
 
+    async def stream_summaries(self, filters: DeviceLoanFilter, batch_size: int = 200) -> AsyncIterator:
+        """
+        Stream every loan matching filters (no pagination) as flat summary rows.
+        
+        Device names and item counts are aggregated in SQL and rows arrive
+        through a server-side cursor, batch_size at a time, so no ORM loans or
+        items are materialized.
+        """
+        device_names = func.array_remove(
+            func.array_agg(aggregate_order_by(Device.device_name, DeviceLoanItem.id)), None
+        )
+        query = self._apply_sort(
+            select(
+                DeviceLoan.id,
+                DeviceLoan.loan_number,
+                DeviceLoan.assignment_letter_number,
+                DeviceLoan.borrower_name,
+                DeviceLoan.activity_name,
+                DeviceLoan.loan_start_date,
+                DeviceLoan.loan_end_date,
+                DeviceLoan.status,
+                func.count(DeviceLoanItem.id).label("total_devices"),
+                device_names.label("device_names"),
+            )
+            .outerjoin(DeviceLoanItem, DeviceLoanItem.loan_id == DeviceLoan.id)
+            .outerjoin(Device, DeviceLoanItem.device_id == Device.id)
+            .where(*self._filter_conditions(filters))
+            .group_by(DeviceLoan.id),
+            filters
+        )
+        
+        result = await self.session.stream(query.execution_options(yield_per=batch_size))
+        async for row in result:
+            yield row
+
     async def get_overdue_loans(self) -> List[DeviceLoan]:
         """Get all overdue loans."""
         query = (
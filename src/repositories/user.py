@@ -3,7 +3,7 @@
 from typing import List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy import select, and_, update, delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 
 from src.models.user import User, Role, UserRole, PasswordResetToken, MFABackupCode
 from src.schemas.user import UserCreate, UserUpdate
@@ -21,6 +21,17 @@ class UserRepository:
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_by_id_with_roles(self, user_id: int) -> Optional[User]:
+        """Get user by ID with roles eager-loaded in the same query."""
+        query = (
+            select(User)
+            .where(and_(User.id == user_id, User.deleted_at.is_(None)))
+            # Single row, so a JOIN beats extra selectin round-trips
+            .options(joinedload(User.roles).joinedload(UserRole.role))
+        )
+        result = await self.session.execute(query)
+        return result.unique().scalar_one_or_none()
+
     async def get_by_email(self, email: str) -> Optional[User]:
         """Get user by email."""
         query = select(User).where(
@@ -79,6 +90,16 @@ class UserRepository:
         await self.session.refresh(user)
         return user
 
+    async def rehash_password(self, user_id: int, new_hashed_password: str) -> None:
+        """Replace the stored hash for the same password (no history entry)."""
+        query = (
+            update(User)
+            .where(User.id == user_id)
+            .values(hashed_password=new_hashed_password)
+        )
+        await self.session.execute(query)
+        await self.session.commit()
+
     async def increment_failed_login_attempts(self, user_id: int) -> User:
         """Increment failed login attempts counter with progressive lockout."""
         user = await self.get_by_id(user_id)
@@ -45,6 +45,16 @@ class DeviceChildUpdate(BaseModel):
     photos_url: Optional[List[str]] = None
 
 
+class DeviceChildFilters(BaseModel):
+    """Query filters for listing child devices (use with Depends())."""
+    parent_id: Optional[int] = None
+    device_name: Optional[str] = None
+    device_code: Optional[str] = None
+    nup_device: Optional[str] = None
+    device_status: Optional[str] = None
+    device_condition: Optional[str] = None
+
+
 class DeviceChildResponse(DeviceChildBase):
     """Response schema for a child device."""
     id: int
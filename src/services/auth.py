@@ -7,6 +7,7 @@ from typing import Optional
 from src.services.user import UserService
 from src.schemas.user import UserLogin, Token, PasswordReset, PasswordResetConfirm
 from src.auth.jwt import create_access_token, create_refresh_token
+from src.auth.permissions import invalidate_user_cache
 from src.auth.mfa import MFAService
 from src.core.config import settings
 from src.utils.password import generate_password_reset_token
@@ -17,7 +18,14 @@ class AuthService:
     def __init__(self, user_service: UserService, session):
         self.user_service = user_service
         self.session = session
-        self.mfa_service = MFAService(session)
+        self._mfa_service: Optional[MFAService] = None
+
+    @property
+    def mfa_service(self) -> MFAService:
+        """MFA service, built on first use (only MFA logins need it)."""
+        if self._mfa_service is None:
+            self._mfa_service = MFAService(self.session)
+        return self._mfa_service
 
     async def login(self, login_data: UserLogin, request: Optional[Request] = None) -> Token:
         """Login user and return tokens with security checks and MFA support."""
@@ -67,19 +75,6 @@ class AuthService:
                     detail="Invalid MFA code"
                 )
 
-        # Create token data with MFA verification status
-        token_data = {"sub": str(user.id)}
-        if user.mfa_enabled:
-            token_data["mfa_verified"] = mfa_verified
-
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data=token_data, 
-            expires_delta=access_token_expires
-        )
-        
-        refresh_token = create_refresh_token(data=token_data)
-
         # Create session with device tracking
         session_info = None
         if request:
@@ -97,6 +92,21 @@ class AuthService:
                 }
             )
 
+        # Create token data with MFA verification status and the session it belongs to
+        token_data = {"sub": str(user.id)}
+        if user.mfa_enabled:
+            token_data["mfa_verified"] = mfa_verified
+        if session_info:
+            token_data["sid"] = session_info["session_id"]
+
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        access_token = create_access_token(
+            data=token_data, 
+            expires_delta=access_token_expires
+        )
+        
+        refresh_token = create_refresh_token(data=token_data)
+
         return Token(
             access_token=access_token,
             refresh_token=refresh_token,
@@ -108,74 +118,67 @@ class AuthService:
 
     async def request_password_reset(self, reset_data: PasswordReset) -> dict:
         """Request password reset token."""
-        from src.repositories.user import UserRepository
-        from src.core.database import get_db
+        # Reuse the request-scoped repository instead of checking out a second session
+        user_repo = self.user_service.user_repo
         
-        # Get database session (this would be injected in real implementation)
-        async for session in get_db():
-            user_repo = UserRepository(session)
-            
-            user = await user_repo.get_by_email(reset_data.email)
-            if not user:
-                # Don't reveal if email exists or not
-                return {"message": "If the email exists, a reset link has been sent"}
-
-            # Generate reset token
-            token = generate_password_reset_token()
-            expires_at = datetime.utcnow() + timedelta(hours=1)  # 1 hour expiry
-            
-            # Save token to database
-            await user_repo.create_password_reset_token(user.id, token, expires_at)
-            
-            # TODO: Send email with reset link (Step 5 implementation)
-            # For now, we'll just return the token (remove this in production)
-            return {
-                "message": "Password reset token generated",
-                "token": token  # Remove this in production
-            }
+        user = await user_repo.get_by_email(reset_data.email)
+        if not user:
+            # Don't reveal if email exists or not
+            return {"message": "If the email exists, a reset link has been sent"}
+
+        # Generate reset token
+        token = generate_password_reset_token()
+        expires_at = datetime.utcnow() + timedelta(hours=1)  # 1 hour expiry
+        
+        # Save token to database
+        await user_repo.create_password_reset_token(user.id, token, expires_at)
+        
+        # TODO: Send email with reset link (Step 5 implementation)
+        # For now, we'll just return the token (remove this in production)
+        return {
+            "message": "Password reset token generated",
+            "token": token  # Remove this in production
+        }
 
     async def confirm_password_reset(self, reset_data: PasswordResetConfirm) -> dict:
         """Confirm password reset with token."""
-        from src.repositories.user import UserRepository
-        from src.core.database import get_db
-        from src.auth.jwt import get_password_hash
+        from src.auth.jwt import get_password_hash_async
         
-        # Get database session (this would be injected in real implementation)
-        async for session in get_db():
-            user_repo = UserRepository(session)
-            
-            # Get and validate token
-            reset_token = await user_repo.get_password_reset_token(reset_data.token)
-            if not reset_token or not reset_token.is_valid():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid or expired reset token"
-                )
+        user_repo = self.user_service.user_repo
+        
+        # Get and validate token
+        reset_token = await user_repo.get_password_reset_token(reset_data.token)
+        if not reset_token or not reset_token.is_valid():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid or expired reset token"
+            )
 
-            # Get user
-            user = await user_repo.get_by_id(reset_token.user_id)
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="User not found"
-                )
+        # Get user
+        user = await user_repo.get_by_id(reset_token.user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
 
-            # Check password history
-            from src.utils.validators import validate_password_history
-            if not validate_password_history(reset_data.new_password, user.password_history):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Cannot reuse any of your last 5 passwords"
-                )
+        # Check password history
+        from src.utils.validators import validate_password_history_async
+        if not await validate_password_history_async(reset_data.new_password, user.password_history):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot reuse any of your last 5 passwords"
+            )
 
-            # Update password
-            new_hashed_password = get_password_hash(reset_data.new_password)
-            await user_repo.update_password(user.id, new_hashed_password)
-            
-            # Mark token as used
-            await user_repo.use_password_reset_token(reset_data.token)
-            
-            return {"message": "Password reset successful"}
+        # Update password
+        new_hashed_password = await get_password_hash_async(reset_data.new_password)
+        await user_repo.update_password(user.id, new_hashed_password)
+        await invalidate_user_cache(user.id)
+        
+        # Mark token as used
+        await user_repo.use_password_reset_token(reset_data.token)
+        
+        return {"message": "Password reset successful"}
     
     def _get_client_ip(self, request: Request) -> str:
         """Extract client IP address from request."""
@@ -201,11 +204,16 @@ class AuthService:
     async def logout_all_devices(self, user_id: int) -> dict:
         """Logout user from all devices."""
         deleted_count = await device_session_manager.delete_user_sessions(user_id)
+        await invalidate_user_cache(user_id)
         return {
             "message": f"Logged out from {deleted_count} devices successfully",
             "sessions_terminated": deleted_count
         }
     
+    async def user_owns_session(self, user_id: int, session_id: str) -> bool:
+        """Check that a session belongs to the given user."""
+        return session_id in await device_session_manager.get_user_sessions(user_id)
+    
     async def revoke_session(self, session_id: str, reason: str = "manual_revocation") -> dict:
         """Revoke a specific session."""
         success = await device_session_manager.revoke_session(session_id, reason)
@@ -1,22 +1,43 @@
 """Device service for business logic."""
 
-from typing import Optional
+from typing import AsyncIterator, Optional
 from fastapi import UploadFile, HTTPException, status
 from datetime import datetime
+import asyncio
 import os
 
+from src.core.database import async_session
 from src.repositories.device import DeviceRepository
 from src.schemas.device import (
     DeviceCreate, DeviceUpdate, DeviceResponse, DeviceListResponse,
     DeviceConditionUpdate, DeviceStatusUpdate, DeviceUsageStatistics,
     DeviceUsageFilter, DeviceUsageListResponse, DeviceUsageSummary
 )
+from src.utils.cache import CacheManager, cache_key
+from src.utils.files import save_upload_file
 
 # ✅ Tambahkan ini di atas
 # BASE_DIR mengarah ke root folder project (bukan src)
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 UPLOAD_DIR = os.path.join(BASE_DIR, "static", "uploads", "devices")
 
+# Columns the single-field device lists may filter on
+DEVICE_FIELD_FILTERS = frozenset({"device_condition", "device_status", "device_room", "device_type"})
+
+# Dashboard aggregates and list totals: short TTL, dropped on device mutations
+device_cache = CacheManager(prefix="device")
+STATS_CACHE_TTL = 60  # seconds
+USAGE_CACHE_TTL = 120  # seconds
+COUNT_CACHE_TTL = 60  # seconds
+LIST_CACHE_TTL = 60  # seconds
+
+
+async def invalidate_device_caches() -> None:
+    """Drop cached device stats, usage aggregates, lists and totals, and bump the ETag version."""
+    await device_cache.invalidate("stats", patterns=("usage:*", "count:*", "list:*"))
+    await device_cache.increment("version")
+
+
 class DeviceService:
     def __init__(self, device_repo: DeviceRepository):
         self.device_repo = device_repo
@@ -42,17 +63,22 @@ class DeviceService:
         
         # Create device
         device = await self.device_repo.create(device_data)
+        await self._invalidate_aggregates()
         return DeviceResponse.model_validate(device)
 
     async def get_device(self, device_id: int) -> Optional[DeviceResponse]:
         """Get device by ID."""
         device = await self.device_repo.get_by_id(device_id)
-        print("DEBUG DEVICE PHOTOS_URL:", device.photos_url)
         if not device:
             return None
         
         return DeviceResponse.model_validate(device)
 
+    async def get_devices_by_ids(self, device_ids: list[int]) -> list[DeviceResponse]:
+        """Get several devices in the order requested; unknown IDs are skipped."""
+        devices = {device.id: device for device in await self.device_repo.get_many(list(set(device_ids)))}
+        return [DeviceResponse.model_validate(devices[device_id]) for device_id in device_ids if device_id in devices]
+
     async def get_device_by_code(self, device_code: str) -> Optional[DeviceResponse]:
         """Get device by code."""
         device = await self.device_repo.get_by_code(device_code)
@@ -70,22 +96,29 @@ class DeviceService:
         return DeviceResponse.model_validate(device)
 
     async def get_all_devices(self, skip: int = 0, limit: int = 10, filters: dict = None, sort_by: str = "created_at", sort_order: str = "desc") -> DeviceListResponse:
-        """Get all devices with pagination and filtering."""
+        """Get all devices with pagination and filtering (pages cached briefly per query)."""
+        key = f"list:{cache_key(skip, limit, filters or {}, sort_by, sort_order)}"
+        cached = await device_cache.get(key)
+        if cached is not None:
+            return DeviceListResponse.model_validate(cached)
+        
         devices = await self.device_repo.get_all(skip, limit, filters, sort_by, sort_order)
-        total = await self.device_repo.count(filters)
+        total = await self._count_devices(filters)
         
         device_responses = [DeviceResponse.model_validate(device) for device in devices]
         
         total_pages = (total + limit - 1) // limit
         page = (skip // limit) + 1
         
-        return DeviceListResponse(
+        response = DeviceListResponse(
             devices=device_responses,
             total=total,
             page=page,
             page_size=limit,
             total_pages=total_pages
         )
+        await device_cache.set(key, response.model_dump(mode="json"), LIST_CACHE_TTL)
+        return response
 
     async def update_device(self, device_id: int, device_data: DeviceUpdate) -> DeviceResponse:
         """Update device information."""
@@ -121,6 +154,7 @@ class DeviceService:
                 detail="Device not found"
             )
         
+        await self._invalidate_aggregates()
         return DeviceResponse.model_validate(device)
 
     async def delete_device(self, device_id: int) -> bool:
@@ -131,12 +165,19 @@ class DeviceService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Device not found"
             )
+        await self._invalidate_aggregates()
         return success
 
 
     async def get_device_stats(self) -> dict:
         """Get device statistics."""
-        return await self.device_repo.get_stats()
+        cached = await device_cache.get("stats")
+        if cached is not None:
+            return cached
+        
+        stats = await self.device_repo.get_stats()
+        await device_cache.set("stats", stats, STATS_CACHE_TTL)
+        return stats
 
     async def update_device_condition(self, device_id: int, condition_data: DeviceConditionUpdate) -> DeviceResponse:
         """Update device condition."""
@@ -147,6 +188,7 @@ class DeviceService:
                 detail="Device not found"
             )
         
+        await self._invalidate_aggregates()
         return DeviceResponse.model_validate(device)
 
     async def update_device_status(self, device_id: int, status_data: DeviceStatusUpdate) -> DeviceResponse:
@@ -158,6 +200,7 @@ class DeviceService:
                 detail="Device not found"
             )
         
+        await self._invalidate_aggregates()
         return DeviceResponse.model_validate(device)
 
     async def search_devices(self, search_term: str, limit: int = 10) -> list[DeviceResponse]:
@@ -165,56 +208,77 @@ class DeviceService:
         devices = await self.device_repo.search_devices(search_term, limit)
         return [DeviceResponse.model_validate(device) for device in devices]
 
+    async def get_devices_by_field(self, field: str, value: str, skip: int = 0, limit: int = 10) -> DeviceListResponse:
+        """Get devices where one of DEVICE_FIELD_FILTERS matches value."""
+        if field not in DEVICE_FIELD_FILTERS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported filter field: {field}"
+            )
+        return await self.get_all_devices(skip, limit, {field: value})
+
     async def get_devices_by_condition(self, condition: str, skip: int = 0, limit: int = 10) -> DeviceListResponse:
         """Get devices by condition."""
-        filters = {"device_condition": condition}
-        return await self.get_all_devices(skip, limit, filters)
+        return await self.get_devices_by_field("device_condition", condition, skip, limit)
 
     async def get_devices_by_status(self, status: str, skip: int = 0, limit: int = 10) -> DeviceListResponse:
         """Get devices by status."""
-        filters = {"device_status": status}
-        return await self.get_all_devices(skip, limit, filters)
+        return await self.get_devices_by_field("device_status", status, skip, limit)
 
     async def get_devices_by_room(self, room: str, skip: int = 0, limit: int = 10) -> DeviceListResponse:
         """Get devices by room."""
-        filters = {"device_room": room}
-        return await self.get_all_devices(skip, limit, filters)
+        return await self.get_devices_by_field("device_room", room, skip, limit)
 
     async def get_devices_by_type(self, device_type: str, skip: int = 0, limit: int = 10) -> DeviceListResponse:
         """Get devices by type."""
-        filters = {"device_type": device_type}
-        return await self.get_all_devices(skip, limit, filters)
+        return await self.get_devices_by_field("device_type", device_type, skip, limit)
+
+    @staticmethod
+    def _usage_row_to_stats(row) -> DeviceUsageStatistics:
+        """Build a DeviceUsageStatistics from a repository usage row (row[0]..row[13])."""
+        return DeviceUsageStatistics(
+            device_id=row[0],
+            nup_device=row[1],
+            device_name=row[2],
+            device_brand=row[3],
+            device_year=row[4],
+            device_condition=row[5],
+            device_status=row[6],
+            total_usage_days=row[7],
+            total_loans=row[8],
+            last_used_date=row[9],
+            last_borrower=row[10],
+            last_activity=row[11],
+            average_usage_per_loan=float(row[12]) if row[12] else 0.0,
+            usage_frequency_score=float(row[13]) if row[13] else 0.0
+        )
+
+    async def get_device_usage(self, device_id: int) -> Optional[DeviceUsageStatistics]:
+        """Get usage statistics for a single device (zeros if it was never loaned)."""
+        row = await self.device_repo.get_device_usage_for(device_id)
+        return self._usage_row_to_stats(row) if row else None
+
+    async def get_device_with_usage(self, device_id: int) -> tuple[Optional[DeviceResponse], Optional[DeviceUsageStatistics]]:
+        """
+        Fetch a device and its usage statistics concurrently.
+        
+        An AsyncSession can't run two queries at once, so each lookup gets its
+        own short-lived session from the pool.
+        """
+        async def _on_own_session(lookup):
+            async with async_session() as session:
+                return await lookup(DeviceService(DeviceRepository(session)), device_id)
+        
+        return await asyncio.gather(
+            _on_own_session(DeviceService.get_device),
+            _on_own_session(DeviceService.get_device_usage),
+        )
 
     async def get_device_usage_statistics(self, usage_filter: DeviceUsageFilter) -> DeviceUsageListResponse:
         """Get device usage statistics with filtering and pagination."""
         
-        # Convert filter object to dict for repository
-        filters = {}
-        if usage_filter.device_name:
-            filters["device_name"] = usage_filter.device_name
-        if usage_filter.nup_device:
-            filters["nup_device"] = usage_filter.nup_device
-        if usage_filter.device_brand:
-            filters["device_brand"] = usage_filter.device_brand
-        if usage_filter.device_year:
-            filters["device_year"] = usage_filter.device_year
-        if usage_filter.device_condition:
-            filters["device_condition"] = usage_filter.device_condition
-        if usage_filter.device_status:
-            filters["device_status"] = usage_filter.device_status
-        if usage_filter.min_usage_days is not None:
-            filters["min_usage_days"] = usage_filter.min_usage_days
-        if usage_filter.max_usage_days is not None:
-            filters["max_usage_days"] = usage_filter.max_usage_days
-        if usage_filter.min_loans is not None:
-            filters["min_loans"] = usage_filter.min_loans
-        if usage_filter.last_used_from:
-            filters["last_used_from"] = usage_filter.last_used_from
-        if usage_filter.last_used_to:
-            filters["last_used_to"] = usage_filter.last_used_to
-        
-        filters["sort_by"] = usage_filter.sort_by
-        filters["sort_order"] = usage_filter.sort_order
+        # Convert filter object to dict for repository (unset filters dropped)
+        filters = usage_filter.model_dump(exclude_none=True, exclude={"page", "page_size"})
         
         # Calculate skip
         skip = (usage_filter.page - 1) * usage_filter.page_size
@@ -227,25 +291,7 @@ class DeviceService:
         )
         
         # Convert to response objects
-        devices_stats = []
-        for row in devices_data:
-            device_stat = DeviceUsageStatistics(
-                device_id=row[0],
-                nup_device=row[1],
-                device_name=row[2],
-                device_brand=row[3],
-                device_year=row[4],
-                device_condition=row[5],
-                device_status=row[6],
-                total_usage_days=row[7],
-                total_loans=row[8],
-                last_used_date=row[9],
-                last_borrower=row[10],
-                last_activity=row[11],
-                average_usage_per_loan=float(row[12]) if row[12] else 0.0,
-                usage_frequency_score=float(row[13]) if row[13] else 0.0
-            )
-            devices_stats.append(device_stat)
+        devices_stats = [self._usage_row_to_stats(row) for row in devices_data]
         
         # Get summary statistics
         summary = await self.device_repo.get_device_usage_summary()
@@ -262,11 +308,21 @@ class DeviceService:
             summary=summary
         )
 
+    async def iter_device_usage_statistics(self, usage_filter: DeviceUsageFilter) -> AsyncIterator[DeviceUsageStatistics]:
+        """Yield usage statistics for every device matching the filter (pagination ignored), as rows stream in."""
+        filters = usage_filter.model_dump(exclude_none=True, exclude={"page", "page_size"})
+        async for row in self.device_repo.stream_device_usage_statistics(filters):
+            yield self._usage_row_to_stats(row)
+
     async def get_device_usage_summary(self) -> DeviceUsageSummary:
         """Get device usage summary statistics."""
+        cached = await device_cache.get("usage:summary")
+        if cached is not None:
+            return DeviceUsageSummary.model_validate(cached)
+        
         summary_data = await self.device_repo.get_device_usage_summary()
         
-        return DeviceUsageSummary(
+        summary = DeviceUsageSummary(
             total_devices=summary_data["total_devices"],
             devices_with_usage=summary_data["devices_with_usage"],
             devices_never_used=summary_data["devices_never_used"],
@@ -278,27 +334,30 @@ class DeviceService:
             devices_by_status=summary_data["devices_by_status"],
             usage_by_year=summary_data["usage_by_year"]
         )
+        await device_cache.set("usage:summary", summary.model_dump(mode="json"), USAGE_CACHE_TTL)
+        return summary
 
     async def get_never_used_devices(self) -> list[DeviceResponse]:
         """Get list of devices that have never been used in loans."""
-        filters = {"min_loans": 0, "max_loans": 0}
-        devices_data, _ = await self.device_repo.get_device_usage_statistics(
-            filters=filters, 
-            skip=0, 
-            limit=1000
-        )
+        cached = await device_cache.get("usage:never_used")
+        if cached is not None:
+            return [DeviceResponse.model_validate(item) for item in cached]
         
-        never_used_devices = []
-        for row in devices_data:
-            if row[8] == 0:  # total_loans is 0
-                device = await self.device_repo.get_by_id(row[0])
-                if device:
-                    never_used_devices.append(DeviceResponse.model_validate(device))
+        devices = await self.device_repo.get_never_used()
+        never_used_devices = [DeviceResponse.model_validate(device) for device in devices]
         
+        await device_cache.set(
+            "usage:never_used", [item.model_dump(mode="json") for item in never_used_devices], USAGE_CACHE_TTL
+        )
         return never_used_devices
 
     async def get_most_used_devices(self, limit: int = 10) -> list[DeviceUsageStatistics]:
         """Get most used devices based on total usage days."""
+        key = f"usage:most_used:{limit}"
+        cached = await device_cache.get(key)
+        if cached is not None:
+            return [DeviceUsageStatistics.model_validate(item) for item in cached]
+        
         filters = {"sort_by": "total_usage_days", "sort_order": "desc"}
         devices_data, _ = await self.device_repo.get_device_usage_statistics(
             filters=filters, 
@@ -306,26 +365,13 @@ class DeviceService:
             limit=limit
         )
         
-        most_used = []
-        for row in devices_data:
-            if row[7] > 0:  # total_usage_days > 0
-                device_stat = DeviceUsageStatistics(
-                    device_id=row[0],
-                    nup_device=row[1],
-                    device_name=row[2],
-                    device_brand=row[3],
-                    device_year=row[4],
-                    device_condition=row[5],
-                    device_status=row[6],
-                    total_usage_days=row[7],
-                    total_loans=row[8],
-                    last_used_date=row[9],
-                    last_borrower=row[10],
-                    last_activity=row[11],
-                    average_usage_per_loan=float(row[12]) if row[12] else 0.0,
-                    usage_frequency_score=float(row[13]) if row[13] else 0.0
-                )
-                most_used.append(device_stat)
+        most_used = [
+            self._usage_row_to_stats(row)
+            for row in devices_data
+            if row[7] > 0  # total_usage_days > 0
+        ]
+        
+        await device_cache.set(key, [item.model_dump(mode="json") for item in most_used], USAGE_CACHE_TTL)
         return most_used
     
     async def upload_device_photo(self, device_id: int, file: UploadFile):
@@ -353,9 +399,7 @@ class DeviceService:
         filename = f"{device.device_code}_{int(datetime.utcnow().timestamp())}{file_ext}"
         file_path = os.path.join(UPLOAD_DIR, filename)
     
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        await save_upload_file(file, file_path)
     
         # 🔁 Ganti dengan foto baru
         rel_path = f"/static/uploads/devices/{filename}"
@@ -367,6 +411,7 @@ class DeviceService:
     
         # Ambil ulang device terbaru agar data return sudah update
         updated_device = await self.device_repo.get_by_id(device_id)
+        await self._invalidate_aggregates()
         return updated_device
 
 
@@ -404,10 +449,30 @@ class DeviceService:
 
         # ✅ Muat ulang device terbaru dari database agar response up to date
         updated_device = await self.device_repo.get_by_id(device_id)
+        await self._invalidate_aggregates()
 
         return updated_device
 
 
+    async def _count_devices(self, filters: Optional[dict]) -> int:
+        """Total for a device list, cached per filter set so paging skips the COUNT query."""
+        key = f"count:{cache_key(filters or {})}"
+        cached = await device_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        total = await self.device_repo.count(filters)
+        await device_cache.set(key, total, COUNT_CACHE_TTL)
+        return total
+
+    async def get_cache_version(self) -> int:
+        """Counter bumped on every device change, for conditional GETs (0 before the first bump or without Redis)."""
+        return await device_cache.get("version") or 0
+
+    async def _invalidate_aggregates(self) -> None:
+        """Drop cached stats, usage aggregates, lists and totals after a device change."""
+        await invalidate_device_caches()
+
     async def get_device_photos(self, device_id: int):
         """Ambil semua foto dari perangkat tertentu."""
         device = await self.device_repo.get_by_id(device_id)
@@ -1,23 +1,60 @@
 """Service layer for DeviceChild (child devices management)."""
 
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
 from fastapi import UploadFile, HTTPException, status
 from datetime import datetime
 import os
 
 from src.repositories.device_child import DeviceChildRepository
 from src.repositories.device import DeviceRepository  # untuk validasi parent
+from src.services.device import invalidate_device_caches
 from src.schemas.device_child import (
     DeviceChildCreate,
     DeviceChildUpdate,
     DeviceChildResponse,
     DeviceChildListResponse,
 )
+from redis.exceptions import LockError
+
+from src.core.redis import redis_delete, redis_get, redis_lock, redis_set
+from src.utils.cache import CacheManager, cache_key
+from src.utils.files import save_upload_file
 
 # Folder upload untuk child devices
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 CHILD_UPLOAD_DIR = os.path.join(BASE_DIR, "static", "uploads", "device_children")
 
+# Read cache for child device GETs; cleared on every child mutation
+device_child_cache = CacheManager(prefix="device-child")
+CHILD_CACHE_TTL = 60  # seconds
+
+
+async def invalidate_device_child_cache() -> None:
+    """Drop every cached child GET response (detail, per-device and list)."""
+    await device_child_cache.invalidate(patterns=("*",))
+
+# Photo paths per child as an ordered JSON list (stored photos_url order), kept in
+# sync by upload/delete instead of being dropped with the read cache above
+PHOTOS_CACHE_TTL = 3600  # seconds
+
+
+def _photos_key(child_id: int) -> str:
+    return f"device-child-photos:{child_id}"
+
+
+@asynccontextmanager
+async def _photo_lock(child_id: int) -> AsyncIterator[None]:
+    """Serialize photo changes for one child across workers (Redis lock, not a DB row lock)."""
+    try:
+        async with redis_lock(f"device-child-photo-lock:{child_id}", timeout=10):
+            yield
+    except LockError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another photo change for this device child is in progress, please retry"
+        )
+
 
 class DeviceChildService:
     def __init__(self, device_child_repo: DeviceChildRepository, device_repo: DeviceRepository):
@@ -37,6 +74,7 @@ class DeviceChildService:
 
         # ⚠️ Hapus pengecekan duplikat
         new_child = await self.device_child_repo.create(data)
+        await self._invalidate_cache()
         return DeviceChildResponse.model_validate(new_child)
 
 
@@ -44,10 +82,17 @@ class DeviceChildService:
     # 📌 GET ONE
     # -----------------------------------------------------------
     async def get_child(self, child_id: int) -> Optional[DeviceChildResponse]:
+        cached = await device_child_cache.get(f"child:{child_id}")
+        if cached is not None:
+            return DeviceChildResponse.model_validate(cached)
+
         child = await self.device_child_repo.get_by_id(child_id)
         if not child:
             raise HTTPException(status_code=404, detail="Device child not found")
-        return DeviceChildResponse.model_validate(child)
+
+        response = DeviceChildResponse.model_validate(child)
+        await device_child_cache.set(f"child:{child_id}", response.model_dump(mode="json"), CHILD_CACHE_TTL)
+        return response
 
     # -----------------------------------------------------------
     # 📌 GET ALL
@@ -56,17 +101,44 @@ class DeviceChildService:
         self,
         skip: int = 0,
         limit: int = 10,
-        parent_id: Optional[int] = None
+        filters: Optional[Dict[str, Any]] = None
     ) -> DeviceChildListResponse:
-        children, total = await self.device_child_repo.get_all(skip, limit, parent_id)
+        key = f"list:{cache_key(skip, limit, filters)}"
+        cached = await device_child_cache.get(key)
+        if cached is not None:
+            return DeviceChildListResponse.model_validate(cached)
+
+        children, total = await self.device_child_repo.get_all(skip, limit, filters)
 
-        return DeviceChildListResponse(
+        response = DeviceChildListResponse(
             children=[DeviceChildResponse.model_validate(child) for child in children],
             total=total,
             page=(skip // limit) + 1,
             page_size=limit,
             total_pages=(total + limit - 1) // limit
         )
+        await device_child_cache.set(key, response.model_dump(mode="json"), CHILD_CACHE_TTL)
+        return response
+
+    # -----------------------------------------------------------
+    # 🔍 SEARCH
+    # -----------------------------------------------------------
+    async def search_children(self, search_term: str, limit: int = 10) -> DeviceChildListResponse:
+        key = f"search:{cache_key(search_term, limit)}"
+        cached = await device_child_cache.get(key)
+        if cached is not None:
+            return DeviceChildListResponse.model_validate(cached)
+
+        children = await self.device_child_repo.search(search_term, limit)
+
+        response = DeviceChildListResponse(
+            children=[DeviceChildResponse.model_validate(child) for child in children],
+            total=len(children),
+            page=1,
+            page_size=limit
+        )
+        await device_child_cache.set(key, response.model_dump(mode="json"), CHILD_CACHE_TTL)
+        return response
 
     # -----------------------------------------------------------
     # 📌 UPDATE
@@ -78,6 +150,9 @@ class DeviceChildService:
     
         # ⚠️ Hapus pengecekan duplikat juga
         updated = await self.device_child_repo.update(child_id, updates)
+        await self._invalidate_cache()
+        if "photos_url" in updates.model_fields_set:
+            await redis_delete(_photos_key(child_id))
         return DeviceChildResponse.model_validate(updated)
 
 
@@ -88,6 +163,8 @@ class DeviceChildService:
         deleted = await self.device_child_repo.delete(child_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Device child not found")
+        await self._invalidate_cache()
+        await redis_delete(_photos_key(child_id))
         return deleted
 
     # -----------------------------------------------------------
@@ -95,35 +172,38 @@ class DeviceChildService:
     # -----------------------------------------------------------
     async def upload_child_photo(self, child_id: int, file: UploadFile):
         """Upload foto perangkat anak dan ganti foto lama sepenuhnya."""
-        child = await self.device_child_repo.get_by_id(child_id)
-        if not child:
-            raise HTTPException(status_code=404, detail="Device child not found")
-
-        os.makedirs(CHILD_UPLOAD_DIR, exist_ok=True)
-
         allowed_exts = [".jpg", ".jpeg", ".png", ".webp"]
         file_ext = os.path.splitext(file.filename)[1].lower()
         if file_ext not in allowed_exts:
             raise HTTPException(status_code=400, detail="Only JPG, PNG, and WEBP formats are allowed")
 
-        # Hapus foto lama
-        if child.photos_url:
-            for old_path in child.photos_url:
-                abs_old_path = os.path.join(BASE_DIR, old_path.lstrip("/"))
-                if os.path.exists(abs_old_path):
-                    os.remove(abs_old_path)
+        async with _photo_lock(child_id):
+            child = await self.device_child_repo.get_by_id(child_id)
+            if not child:
+                raise HTTPException(status_code=404, detail="Device child not found")
+
+            os.makedirs(CHILD_UPLOAD_DIR, exist_ok=True)
 
-        filename = f"{child.device_code}_{int(datetime.utcnow().timestamp())}{file_ext}"
-        file_path = os.path.join(CHILD_UPLOAD_DIR, filename)
+            # Hapus foto lama
+            if child.photos_url:
+                for old_path in child.photos_url:
+                    abs_old_path = os.path.join(BASE_DIR, old_path.lstrip("/"))
+                    if os.path.exists(abs_old_path):
+                        os.remove(abs_old_path)
 
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+            filename = f"{child.device_code}_{int(datetime.utcnow().timestamp())}{file_ext}"
+            file_path = os.path.join(CHILD_UPLOAD_DIR, filename)
 
-        rel_path = f"/static/uploads/device_children/{filename}"
-        child.photos_url = [rel_path]
+            await save_upload_file(file, file_path)
 
-        await self.device_child_repo.update(child_id, DeviceChildUpdate(photos_url=child.photos_url))
+            rel_path = f"/static/uploads/device_children/{filename}"
+            child.photos_url = [rel_path]
+
+            await self.device_child_repo.update(child_id, DeviceChildUpdate(photos_url=child.photos_url))
+            await self._invalidate_cache()
+
+            # Upload replaces all photos: the cached list is just the new path
+            await redis_set(_photos_key(child_id), child.photos_url, PHOTOS_CACHE_TTL)
 
         updated_child = await self.device_child_repo.get_by_id(child_id)
         return updated_child
@@ -133,30 +213,33 @@ class DeviceChildService:
     # -----------------------------------------------------------
     async def delete_child_photo(self, child_id: int, filename: str):
         """Hapus satu foto perangkat anak berdasarkan filename."""
-        child = await self.device_child_repo.get_by_id(child_id)
-        if not child:
-            raise HTTPException(status_code=404, detail="Device child not found")
+        async with _photo_lock(child_id):
+            child = await self.device_child_repo.get_by_id(child_id)
+            if not child:
+                raise HTTPException(status_code=404, detail="Device child not found")
 
-        if not child.photos_url:
-            raise HTTPException(status_code=404, detail="No photos to delete")
+            if not child.photos_url:
+                raise HTTPException(status_code=404, detail="No photos to delete")
 
-        new_photos = []
-        deleted_path = None
-        for path in child.photos_url:
-            if filename in path:
-                deleted_path = path
-            else:
-                new_photos.append(path)
+            new_photos = []
+            deleted_path = None
+            for path in child.photos_url:
+                if filename in path:
+                    deleted_path = path
+                else:
+                    new_photos.append(path)
 
-        if not deleted_path:
-            raise HTTPException(status_code=404, detail="Photo not found")
+            if not deleted_path:
+                raise HTTPException(status_code=404, detail="Photo not found")
 
-        abs_path = os.path.join(BASE_DIR, deleted_path.lstrip("/"))
-        if os.path.exists(abs_path):
-            os.remove(abs_path)
+            abs_path = os.path.join(BASE_DIR, deleted_path.lstrip("/"))
+            if os.path.exists(abs_path):
+                os.remove(abs_path)
 
-        child.photos_url = new_photos
-        await self.device_child_repo.update(child_id, DeviceChildUpdate(photos_url=child.photos_url))
+            child.photos_url = new_photos
+            await self.device_child_repo.update(child_id, DeviceChildUpdate(photos_url=child.photos_url))
+            await self._invalidate_cache()
+            await redis_set(_photos_key(child_id), new_photos, PHOTOS_CACHE_TTL)
 
         updated_child = await self.device_child_repo.get_by_id(child_id)
         return updated_child
@@ -166,7 +249,20 @@ class DeviceChildService:
     # -----------------------------------------------------------
     async def get_child_photos(self, child_id: int):
         """Ambil semua foto dari perangkat anak tertentu."""
+        cached = await redis_get(_photos_key(child_id))
+        if cached is not None:
+            return cached
+
         child = await self.device_child_repo.get_by_id(child_id)
         if not child:
             raise HTTPException(status_code=404, detail="Device child not found")
-        return child.photos_url or []
+
+        photos = child.photos_url or []
+        await redis_set(_photos_key(child_id), photos, PHOTOS_CACHE_TTL)
+        return photos
+
+    async def _invalidate_cache(self) -> None:
+        """Drop cached child GET responses after a mutation, plus the device views that embed children."""
+        await invalidate_device_child_cache()
+        # Child changes can flip the parent's status and show up in its embedded children
+        await invalidate_device_caches()
@@ -1,6 +1,7 @@
 """
 Device Export Service - WITH USAGE STATISTICS
 """
+import asyncio
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,6 +14,31 @@ from io import BytesIO
 from src.models.perangkat import Device, DeviceStatus
 from src.models.device_child import DeviceChild
 from src.models.loan import DeviceLoan, DeviceLoanItem, LoanStatus
+from src.utils.process_pool import get_export_executor
+
+
+def _render_usage_workbook(
+    devices_data: List[Dict[str, Any]],
+    monthly_stats: List[Dict],
+    yearly_stats: List[Dict],
+    usage_details: List[Dict]
+) -> bytes:
+    """Build the usage workbook and return the .xlsx bytes (runs in a worker process)."""
+    wb = Workbook()
+    
+    # Remove default sheet
+    if "Sheet" in wb.sheetnames:
+        wb.remove(wb["Sheet"])
+    
+    DeviceExportService._create_device_summary_sheet(wb, devices_data)
+    DeviceExportService._create_monthly_stats_sheet(wb, monthly_stats)
+    DeviceExportService._create_yearly_stats_sheet(wb, yearly_stats)
+    DeviceExportService._create_usage_details_sheet(wb, usage_details)
+    DeviceExportService._create_dashboard_sheet(wb, devices_data, monthly_stats, yearly_stats)
+    
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
 
 
 class DeviceExportService:
@@ -31,13 +57,6 @@ class DeviceExportService:
         print("🔍 Starting export with usage statistics...")
         
         try:
-            # Create workbook
-            wb = Workbook()
-            
-            # Remove default sheet
-            if "Sheet" in wb.sheetnames:
-                wb.remove(wb["Sheet"])
-            
             print("📊 Getting devices data with usage...")
             devices_data = await self._get_devices_with_usage(year, month, device_ids)
             print(f"✅ Found {len(devices_data)} devices")
@@ -47,22 +66,16 @@ class DeviceExportService:
             yearly_stats = await self._get_yearly_stats(device_ids)
             usage_details = await self._get_usage_details(year, month, device_ids)
             
-            print("📋 Creating sheets...")
-            self._create_device_summary_sheet(wb, devices_data)
-            self._create_monthly_stats_sheet(wb, monthly_stats)
-            self._create_yearly_stats_sheet(wb, yearly_stats)
-            self._create_usage_details_sheet(wb, usage_details)
-            self._create_dashboard_sheet(wb, devices_data, monthly_stats, yearly_stats)
-            print("✅ All sheets created")
-            
-            # Save to buffer
-            print("💾 Saving to buffer...")
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
+            print("📋 Rendering workbook...")
+            loop = asyncio.get_running_loop()
+            excel_bytes = await loop.run_in_executor(
+                get_export_executor(),
+                _render_usage_workbook,
+                devices_data, monthly_stats, yearly_stats, usage_details
+            )
             print("✅ Export complete!")
             
-            return buffer
+            return BytesIO(excel_bytes)
             
         except Exception as e:
             print(f"❌ Error in export: {str(e)}")
@@ -350,7 +363,8 @@ class DeviceExportService:
             print(f"  ❌ Error getting usage details: {str(e)}")
             return []
 
-    def _create_device_summary_sheet(self, wb: Workbook, devices_data: List[Dict[str, Any]]):
+    @staticmethod
+    def _create_device_summary_sheet(wb: Workbook, devices_data: List[Dict[str, Any]]):
         """Create device summary sheet with usage statistics"""
         try:
             print("  📄 Creating Device Summary sheet...")
@@ -436,7 +450,8 @@ class DeviceExportService:
             traceback.print_exc()
             raise
 
-    def _create_monthly_stats_sheet(self, wb: Workbook, monthly_stats: List[Dict]):
+    @staticmethod
+    def _create_monthly_stats_sheet(wb: Workbook, monthly_stats: List[Dict]):
         """Create monthly statistics sheet"""
         try:
             print("  📄 Creating Monthly Statistics sheet...")
@@ -473,7 +488,8 @@ class DeviceExportService:
         except Exception as e:
             print(f"  ❌ Error creating monthly stats sheet: {str(e)}")
 
-    def _create_yearly_stats_sheet(self, wb: Workbook, yearly_stats: List[Dict]):
+    @staticmethod
+    def _create_yearly_stats_sheet(wb: Workbook, yearly_stats: List[Dict]):
         """Create yearly statistics sheet"""
         try:
             print("  📄 Creating Yearly Statistics sheet...")
@@ -505,7 +521,8 @@ class DeviceExportService:
         except Exception as e:
             print(f"  ❌ Error creating yearly stats sheet: {str(e)}")
 
-    def _create_usage_details_sheet(self, wb: Workbook, usage_records: List[Dict]):
+    @staticmethod
+    def _create_usage_details_sheet(wb: Workbook, usage_records: List[Dict]):
         """Create detailed usage records sheet"""
         try:
             print("  📄 Creating Usage Details sheet...")
@@ -547,8 +564,8 @@ class DeviceExportService:
         except Exception as e:
             print(f"  ❌ Error creating usage details sheet: {str(e)}")
 
+    @staticmethod
     def _create_dashboard_sheet(
-        self, 
         wb: Workbook, 
         devices_data: List[Dict], 
         monthly_stats: List[Dict],
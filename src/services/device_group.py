@@ -17,6 +17,12 @@ from src.schemas.device_group import (
 from src.schemas.loan import DeviceLoanCreate, DeviceLoanItemBase, DeviceCondition
 from src.models.perangkat import DeviceStatus
 from src.models.loan import DeviceLoanItem
+from src.utils.cache import CacheManager
+
+# Per-user cache of group list pages; keys are scoped by user ID so one
+# user's groups are never served to another
+device_group_cache = CacheManager(prefix="device-group")
+GROUP_CACHE_TTL = 60  # seconds
 
 
 class DeviceGroupService:
@@ -76,6 +82,8 @@ class DeviceGroupService:
                 if item:
                     added_devices.append(self._build_device_item_response(item, child))
         
+        await self._invalidate_user_cache(user_id)
+        
         # Check availability
         availability = await self.device_group_repo.check_group_devices_availability(group.id)
         
@@ -109,17 +117,15 @@ class DeviceGroupService:
                 detail="Access denied"
             )
         
-        # Get devices with details
-        items = await self.device_group_repo.get_group_devices(group_id)
+        # Devices are already eager-loaded with the group
         device_responses = []
         
-        for item in items:
+        for item in sorted(group.group_items, key=lambda i: i.added_at):
             device = item.device if item.device_id else item.child_device
             if device:
                 device_responses.append(self._build_device_item_response(item, device))
         
-        # Check availability
-        availability = await self.device_group_repo.check_group_devices_availability(group_id)
+        unavailable = [d.device_name for d in device_responses if not d.is_available]
         
         return DeviceGroupDetailResponse(
             id=group.id,
@@ -130,8 +136,8 @@ class DeviceGroupService:
             updated_at=group.updated_at,
             device_count=len(device_responses),
             devices=device_responses,
-            all_available=availability["all_available"],
-            unavailable_devices=[d["name"] for d in availability["unavailable_devices"]]
+            all_available=not unavailable,
+            unavailable_devices=unavailable
         )
     
     async def get_user_groups(
@@ -142,6 +148,11 @@ class DeviceGroupService:
         name_filter: Optional[str] = None
     ) -> DeviceGroupListResponse:
         """Get all groups for a user."""
+        key = f"user:{user_id}:list:{page}:{page_size}:{name_filter or ''}"
+        cached = await device_group_cache.get(key)
+        if cached is not None:
+            return DeviceGroupListResponse.model_validate(cached)
+        
         skip = (page - 1) * page_size
         filters = {"name": name_filter} if name_filter else None
         
@@ -166,13 +177,15 @@ class DeviceGroupService:
         
         total_pages = (total + page_size - 1) // page_size
         
-        return DeviceGroupListResponse(
+        response = DeviceGroupListResponse(
             groups=group_responses,
             total=total,
             page=page,
             page_size=page_size,
             total_pages=total_pages
         )
+        await device_group_cache.set(key, response.model_dump(mode="json"), GROUP_CACHE_TTL)
+        return response
     
     async def update_group(
         self, 
@@ -199,6 +212,7 @@ class DeviceGroupService:
         # Update
         update_dict = update_data.model_dump(exclude_unset=True)
         updated_group = await self.device_group_repo.update_group(group_id, update_dict)
+        await self._invalidate_user_cache(user_id)
         
         device_count = len(updated_group.group_items) if updated_group.group_items else 0
         
@@ -229,7 +243,9 @@ class DeviceGroupService:
                 detail="Access denied"
             )
         
-        return await self.device_group_repo.delete_group(group_id)
+        deleted = await self.device_group_repo.delete_group(group_id)
+        await self._invalidate_user_cache(user_id)
+        return deleted
     
     async def add_devices_to_group(
         self, 
@@ -238,7 +254,7 @@ class DeviceGroupService:
         user_id: int
     ) -> DeviceGroupDetailResponse:
         """Add devices to a group."""
-        group = await self.device_group_repo.get_group(group_id)
+        group = await self.device_group_repo.get_group_owner(group_id)
         
         if not group:
             raise HTTPException(
@@ -271,6 +287,8 @@ class DeviceGroupService:
                         group_id, child_device_id=child_id
                     )
         
+        await self._invalidate_user_cache(user_id)
+        
         # Return updated group
         return await self.get_group(group_id, user_id)
     
@@ -281,7 +299,7 @@ class DeviceGroupService:
         user_id: int
     ) -> DeviceGroupDetailResponse:
         """Remove devices from a group."""
-        group = await self.device_group_repo.get_group(group_id)
+        group = await self.device_group_repo.get_group_owner(group_id)
         
         if not group:
             raise HTTPException(
@@ -310,6 +328,8 @@ class DeviceGroupService:
                     group_id, child_device_id=child_id
                 )
         
+        await self._invalidate_user_cache(user_id)
+        
         # Return updated group
         return await self.get_group(group_id, user_id)
     
@@ -326,8 +346,8 @@ class DeviceGroupService:
                 detail="Loan service not available"
             )
         
-        # Get group
-        group = await self.device_group_repo.get_group(group_id)
+        # Get group (ownership only - availability is checked in one query below)
+        group = await self.device_group_repo.get_group_owner(group_id)
         
         if not group:
             raise HTTPException(
@@ -345,15 +365,6 @@ class DeviceGroupService:
         # Check device availability
         availability = await self.device_group_repo.check_group_devices_availability(group_id)
         
-        print("=" * 60)
-        print(f"🔍 [DeviceGroupService] Group {group_id} availability check:")
-        print(f"  all_available: {availability['all_available']}")
-        print(f"  total_devices: {availability.get('total_devices', 0)}")
-        print(f"  device_details count: {len(availability.get('device_details', []))}")
-        for i, dev in enumerate(availability.get('device_details', [])):
-            print(f"    Device {i+1}: id={dev.get('id')}, name={dev.get('name')}, is_child={dev.get('is_child')}")
-        print("=" * 60)
-        
         if not availability["all_available"]:
             unavailable_list = []
             for device in availability["unavailable_devices"]:
@@ -372,15 +383,8 @@ class DeviceGroupService:
         loan_items = []
         borrowed_device_names = []
         
-        print("🔧 [DeviceGroupService] Building loan items:")
-        
         # ✅ IMPORTANT: Loop through ALL device_details
         for i, device_info in enumerate(availability["device_details"]):
-            print(f"  Processing device {i+1}/{len(availability['device_details'])}:")
-            print(f"    id: {device_info.get('id')}")
-            print(f"    name: {device_info.get('name')}")
-            print(f"    is_child: {device_info.get('is_child')}")
-            
             # Create loan item dict
             loan_item_dict = {
                 "device_id": None if device_info["is_child"] else device_info["id"],
@@ -390,15 +394,9 @@ class DeviceGroupService:
                 "condition_notes": None
             }
             
-            print(f"    → Created loan_item: device_id={loan_item_dict['device_id']}, child_device_id={loan_item_dict['child_device_id']}")
-            
             loan_items.append(loan_item_dict)
             borrowed_device_names.append(device_info["name"])
         
-        print(f"✅ [DeviceGroupService] Total loan items created: {len(loan_items)}")
-        print(f"   Loan items list: {loan_items}")
-        print("=" * 60)
-        
         # ✅ VERIFY loan_items is not empty
         if not loan_items:
             raise HTTPException(
@@ -421,13 +419,9 @@ class DeviceGroupService:
             "loan_items": loan_items  # ← Should have 3 items
         }
         
-        print(f"🚀 [DeviceGroupService] Creating loan with {len(loan_items)} items")
-        
         # Convert to Pydantic model
         loan_create_data = DeviceLoanCreate(**loan_create_dict)
         
-        print(f"✅ [DeviceGroupService] DeviceLoanCreate validated with {len(loan_create_data.loan_items)} items")
-        
         try:
             # Import the service here to avoid circular import
             from src.services.loan import LoanService
@@ -452,6 +446,10 @@ class DeviceGroupService:
                 detail=f"Gagal membuat peminjaman: {str(e)}"
             )
     
+    async def _invalidate_user_cache(self, user_id: int) -> None:
+        """Drop a user's cached group list pages after a change to their groups."""
+        await device_group_cache.invalidate(patterns=(f"user:{user_id}:*",))
+    
     def _build_device_item_response(
         self, 
         item: Any, 
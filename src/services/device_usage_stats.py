@@ -0,0 +1,49 @@
+"""Background refresh of the device usage statistics materialized view."""
+
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+
+from src.core.database import engine
+from src.models.device_usage_stats import REFRESH_DEVICE_USAGE_MONTHLY, REFRESH_DEVICE_USAGE_STATS
+from src.services.device import device_cache
+
+logger = logging.getLogger(__name__)
+
+_refresh_task: Optional[asyncio.Task] = None
+_refresh_pending = False
+
+
+async def refresh_device_usage_stats() -> None:
+    """Rebuild the usage materialized views without blocking readers, then drop cached usage aggregates and bump the device version."""
+    async with engine.begin() as conn:
+        await conn.execute(text(REFRESH_DEVICE_USAGE_STATS))
+        await conn.execute(text(REFRESH_DEVICE_USAGE_MONTHLY))
+    await device_cache.invalidate(patterns=("usage:*",))
+    await device_cache.increment("version")
+
+
+async def _refresh_loop() -> None:
+    """Keep refreshing while loan changes arrived during the previous refresh."""
+    global _refresh_pending
+    while _refresh_pending:
+        _refresh_pending = False
+        try:
+            await refresh_device_usage_stats()
+        except Exception as e:
+            logger.error("❌ Device usage stats refresh failed: %s", e)
+
+
+def schedule_device_usage_refresh() -> None:
+    """
+    Request a refresh after a loan change.
+
+    Runs in the background on its own connection; bursts of loan changes
+    collapse into at most one extra refresh.
+    """
+    global _refresh_task, _refresh_pending
+    _refresh_pending = True
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_loop())
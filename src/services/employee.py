@@ -2,7 +2,12 @@ from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.models.employee import Employee
 from src.repositories.employee import EmployeeRepository
-from src.schemas.employee import EmployeeCreate, EmployeeUpdate
+from src.schemas.employee import EmployeeCreate, EmployeeUpdate, EmployeeResponse
+from src.utils.cache import CacheManager
+
+# Employee list is read on every loan form; dropped on any employee change
+employee_cache = CacheManager(prefix="employee")
+EMPLOYEE_LIST_CACHE_TTL = 600  # seconds
 
 
 class EmployeeService:
@@ -11,10 +16,18 @@ class EmployeeService:
 
     async def create_employee(self, data: EmployeeCreate) -> Employee:
         employee = Employee(**data.model_dump())
-        return await self.repo.create(employee)
+        employee = await self.repo.create(employee)
+        await employee_cache.delete("all")
+        return employee
 
-    async def get_employees(self) -> List[Employee]:
-        return await self.repo.get_all()
+    async def get_employees(self) -> List[EmployeeResponse]:
+        cached = await employee_cache.get("all")
+        if cached is not None:
+            return [EmployeeResponse.model_validate(item) for item in cached]
+        
+        employees = [EmployeeResponse.model_validate(employee) for employee in await self.repo.get_all()]
+        await employee_cache.set("all", [item.model_dump(mode="json") for item in employees], EMPLOYEE_LIST_CACHE_TTL)
+        return employees
 
     async def get_employee(self, employee_id: int) -> Employee:
         return await self.repo.get_by_id(employee_id)
@@ -23,11 +36,14 @@ class EmployeeService:
         employee = await self.repo.get_by_id(employee_id)
         if not employee:
             return None
-        return await self.repo.update(employee, data.model_dump(exclude_unset=True))
+        employee = await self.repo.update(employee, data.model_dump(exclude_unset=True))
+        await employee_cache.delete("all")
+        return employee
 
     async def delete_employee(self, employee_id: int) -> bool:
         employee = await self.repo.get_by_id(employee_id)
         if not employee:
             return False
         await self.repo.delete(employee)
+        await employee_cache.delete("all")
         return True
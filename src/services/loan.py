@@ -1,6 +1,6 @@
 """Loan service for business logic."""
 
-from typing import Optional, List, Dict, Tuple
+from typing import AsyncIterator, Optional, List, Dict, Tuple
 from datetime import datetime, timedelta, date
 from fastapi import HTTPException, status
 from sqlalchemy.future import select
@@ -18,6 +18,9 @@ from ..schemas.loan import (
 from ..models.loan import DeviceLoan, DeviceLoanItem ,LoanStatus, DeviceCondition, DeviceConditionChangeRequest, ConditionChangeStatus
 from ..models.perangkat import Device, DeviceStatus
 from ..models.device_child import DeviceChild
+from .device import invalidate_device_caches
+from .device_child import invalidate_device_child_cache
+from .device_usage_stats import schedule_device_usage_refresh
 
 
 class LoanService:
@@ -133,6 +136,10 @@ class LoanService:
 
         # ✅ Create the loan
         loan = await self.loan_repo.create(loan_data, borrower_user_id)
+        schedule_device_usage_refresh()
+        # Borrowed devices changed status
+        await invalidate_device_caches()
+        await invalidate_device_child_cache()
 
         print(f"✅ [LoanService] Loan created successfully: {loan.loan_number}")
 
@@ -211,6 +218,10 @@ class LoanService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Failed to update loan"
             )
+        schedule_device_usage_refresh()
+        # Device and child statuses are reset and reapplied for the new items
+        await invalidate_device_caches()
+        await invalidate_device_child_cache()
         
         return DeviceLoanResponse.model_validate(updated_loan)
 
@@ -259,6 +270,8 @@ class LoanService:
     
         if not returned_loan:
             raise HTTPException(status_code=400, detail="Failed to process loan return")
+        await invalidate_device_caches()
+        await invalidate_device_child_cache()
     
         # CREATE CONDITION CHANGE REQUEST
         session: AsyncSession = self.loan_repo.session
@@ -343,6 +356,8 @@ class LoanService:
             raise HTTPException(status_code=404, detail="Device not found")
     
         await session.commit()
+        await invalidate_device_caches()
+        await invalidate_device_child_cache()
         await session.refresh(req)
         return req
 
@@ -393,6 +408,9 @@ class LoanService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Failed to cancel loan"
             )
+        schedule_device_usage_refresh()
+        await invalidate_device_caches()
+        await invalidate_device_child_cache()
         
         return DeviceLoanResponse.model_validate(cancelled_loan)
 
@@ -490,29 +508,14 @@ class LoanService:
         """Check if a device is available for a given period."""
         return await self.loan_repo.check_device_availability(device_id, start_date, end_date, exclude_loan_id)
 
+    async def iter_loans_summary(self, filters: DeviceLoanFilter) -> AsyncIterator[DeviceLoanSummary]:
+        """Yield a summary for every loan matching filters (pagination ignored), as rows stream in."""
+        async for row in self.loan_repo.stream_summaries(filters):
+            yield DeviceLoanSummary(**row._mapping)
+
     async def get_loans_summary_for_export(self, filters: DeviceLoanFilter) -> List[DeviceLoanSummary]:
-        """Get loan summaries for export purposes."""
-        loans, _ = await self.loan_repo.get_all(filters)
-        
-        summaries = []
-        for loan in loans:
-            device_names = [item.device.device_name for item in loan.loan_items if item.device]
-            
-            summary = DeviceLoanSummary(
-                id=loan.id,
-                loan_number=loan.loan_number,
-                assignment_letter_number=loan.assignment_letter_number,
-                borrower_name=loan.borrower_name,
-                activity_name=loan.activity_name,
-                loan_start_date=loan.loan_start_date,
-                loan_end_date=loan.loan_end_date,
-                status=loan.status,
-                total_devices=len(loan.loan_items),
-                device_names=device_names
-            )
-            summaries.append(summary)
-        
-        return summaries
+        """Get summaries of all loans matching filters for export purposes."""
+        return [summary async for summary in self.iter_loans_summary(filters)]
 
     async def mark_overdue_loans(self) -> int:
         """Mark loans as overdue (for scheduled tasks)."""
@@ -527,5 +530,11 @@ class LoanService:
                 detail="Loan not found"
             )
         
-        return await self.loan_repo.soft_delete(loan_id, deleted_by)
+        deleted = await self.loan_repo.soft_delete(loan_id, deleted_by)
+        if deleted:
+            schedule_device_usage_refresh()
+            # Devices held by the deleted loan are released
+            await invalidate_device_caches()
+            await invalidate_device_child_cache()
+        return deleted
     
\ No newline at end of file
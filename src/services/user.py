@@ -7,8 +7,9 @@ from fastapi import HTTPException, status
 from src.models.user import User
 from src.repositories.user import UserRepository
 from src.schemas.user import UserCreate, UserUpdate, UserResponse, PasswordChange
-from src.auth.jwt import get_password_hash, verify_password
-from src.utils.validators import validate_password_history, validate_password_strength
+from src.auth.jwt import get_password_hash_async, verify_password_async, verify_and_update_password
+from src.auth.permissions import invalidate_user_cache
+from src.utils.validators import validate_password_history_async, validate_password_strength
 
 
 class UserService:
@@ -24,7 +25,7 @@ class UserService:
                 detail="Email already registered"
             )
 
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         user = await self.user_repo.create(user_data, hashed_password)
 
         # pastikan user baru belum aktif dan belum diverifikasi
@@ -58,7 +59,8 @@ class UserService:
                 detail="Account is temporarily locked due to too many failed login attempts"
             )
         
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = await verify_and_update_password(password, user.hashed_password)
+        if not verified:
             updated_user = await self.user_repo.increment_failed_login_attempts(user.id)
             if updated_user and updated_user.is_locked():
                 raise HTTPException(
@@ -67,6 +69,10 @@ class UserService:
                 )
             return None
         
+        # Upgrade legacy bcrypt hashes to argon2 now that we know the password
+        if new_hash:
+            await self.user_repo.rehash_password(user.id, new_hash)
+        
         await self.user_repo.reset_failed_login_attempts(user.id)
         return UserResponse.model_validate(user)
 
@@ -88,24 +94,25 @@ class UserService:
             )
 
         # Verify current password
-        if not verify_password(password_data.current_password, user.hashed_password):
+        if not await verify_password_async(password_data.current_password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
 
         # Check password history
-        if not validate_password_history(password_data.new_password, user.password_history):
+        if not await validate_password_history_async(password_data.new_password, user.password_history):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cannot reuse any of your last 5 passwords"
             )
 
         # Hash new password
-        new_hashed_password = get_password_hash(password_data.new_password)
+        new_hashed_password = await get_password_hash_async(password_data.new_password)
         
         # Update password
         updated_user = await self.user_repo.update_password(user_id, new_hashed_password)
+        await invalidate_user_cache(user_id)
         
         return UserResponse.model_validate(updated_user)
 
@@ -182,6 +189,7 @@ class UserService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        await invalidate_user_cache(user_id)
         
         return UserResponse.model_validate(user)
     
@@ -193,6 +201,7 @@ class UserService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        await invalidate_user_cache(user_id)
         return success
     
     async def get_user_stats(self) -> dict:
@@ -233,6 +242,7 @@ class UserService:
             )
         
         await self.user_repo.set_user_roles(user_id, role_ids)
+        await invalidate_user_cache(user_id)
         
         updated_user = await self.user_repo.get_by_id(user_id)
         return UserResponse.model_validate(updated_user)
@@ -283,6 +293,7 @@ class UserService:
             raise HTTPException(status_code=404, detail="User not found")
 
         await self.user_repo.delete_user(user.id)
+        await invalidate_user_cache(user.id)
         return {"message": "User rejected and deleted permanently"}
 
 
@@ -294,5 +305,6 @@ class UserService:
 
         await self.user_repo.session.delete(user)
         await self.user_repo.session.commit()
+        await invalidate_user_cache(user_id)
         return True
 
@@ -5,7 +5,7 @@ import hashlib
 import json
 from typing import Any, Callable, Optional
 import logging
-from src.core.redis import redis_get, redis_set, redis_delete, redis_exists
+from src.core.redis import redis_get, redis_set, redis_delete, redis_exists, redis_unlink, redis_increment
 
 logger = logging.getLogger(__name__)
 
@@ -87,16 +87,22 @@ class CacheManager:
         full_key = f"{self.prefix}:{key}"
         return await redis_delete(full_key)
     
+    async def increment(self, key: str, amount: int = 1) -> Optional[int]:
+        """Increment a counter in cache."""
+        full_key = f"{self.prefix}:{key}"
+        return await redis_increment(full_key, amount)
+    
     async def exists(self, key: str) -> bool:
         """Check if key exists in cache."""
         full_key = f"{self.prefix}:{key}"
         return await redis_exists(full_key)
     
-    async def clear_pattern(self, pattern: str) -> int:
-        """Clear all keys matching pattern."""
-        from src.core.redis import redis_flush_pattern
-        full_pattern = f"{self.prefix}:{pattern}"
-        return await redis_flush_pattern(full_pattern)
+    async def invalidate(self, *keys: str, patterns: tuple = ()) -> int:
+        """Drop several keys and key patterns in one non-blocking UNLINK."""
+        return await redis_unlink(
+            *(f"{self.prefix}:{key}" for key in keys),
+            patterns=tuple(f"{self.prefix}:{pattern}" for pattern in patterns)
+        )
 
 
 # Global cache manager instance
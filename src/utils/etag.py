@@ -0,0 +1,32 @@
+"""HTTP ETag / If-None-Match helpers for conditional GETs."""
+
+import zlib
+from typing import Any
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from version parts, e.g. W/"12-1709280000.123456"."""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def checksum(*parts: Any) -> int:
+    """Stable (cross-process) checksum of plain values, for ETags without a single version column."""
+    return zlib.crc32(repr(parts).encode())
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the current ETag."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
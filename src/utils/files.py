@@ -0,0 +1,48 @@
+"""File upload and download helpers."""
+
+import asyncio
+import shutil
+from io import BytesIO
+from typing import AsyncIterator
+
+from fastapi import UploadFile
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # 64KB
+
+
+def _copy_upload(source, destination: str, chunk_size: int) -> int:
+    """Copy a spooled upload to disk chunk by chunk and return bytes written."""
+    source.seek(0)
+    with open(destination, "wb") as out:
+        shutil.copyfileobj(source, out, chunk_size)
+        return out.tell()
+
+
+async def save_upload_file(file: UploadFile, destination: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+    """
+    Stream an uploaded file to disk without loading it into memory.
+
+    The copy runs in a worker thread so disk I/O never blocks the event loop.
+
+    Returns:
+        Number of bytes written
+    """
+    return await asyncio.to_thread(_copy_upload, file.file, destination, chunk_size)
+
+
+async def iter_buffer(buffer: BytesIO, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Yield a rendered file buffer in fixed-size chunks for StreamingResponse.
+
+    Iterating a BytesIO directly splits on newline bytes, which for binary
+    formats (xlsx, pdf) produces many tiny, irregular chunks. Async so
+    Starlette consumes it on the event loop instead of hopping to the
+    threadpool for every chunk; slicing an in-memory buffer never blocks.
+    """
+    view = buffer.getbuffer()
+    try:
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start + chunk_size])
+    finally:
+        view.release()
@@ -1,10 +1,13 @@
 """Logging configuration utilities."""
 
+import atexit
 import logging
 import logging.handlers
 import json
 import os
+import queue
 from datetime import datetime
+from typing import Optional
 
 from src.core.config import settings
 
@@ -35,6 +38,55 @@ class JSONFormatter(logging.Formatter):
         return json.dumps(log_entry)
 
 
+class HealthCheckFilter(logging.Filter):
+    """Drop access-log lines for health probes."""
+    
+    def __init__(self, path: str = "/health"):
+        super().__init__()
+        self.path = path
+
+    def filter(self, record):
+        # uvicorn.access args: (client_addr, method, full_path, http_version, status_code)
+        args = record.args
+        if isinstance(args, tuple) and len(args) >= 3:
+            return args[2] != self.path
+        return True
+
+
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the background logging thread."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+def _start_queue_listener() -> None:
+    """Hand formatting and console/file I/O to a background QueueListener thread."""
+    global _queue_listener
+    stop_logging()
+    
+    root_logger = logging.getLogger()
+    handlers = list(root_logger.handlers)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    
+    # Loggers configured above all share the same console/file handlers
+    for name in ('', 'uvicorn', 'uvicorn.access'):
+        logging.getLogger(name).handlers = [queue_handler]
+    
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _queue_listener.start()
+
+
+atexit.register(stop_logging)
+
+
 def setup_logging():
     """Setup application logging."""
     import logging.config
@@ -60,6 +112,11 @@ def setup_logging():
                 'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             },
         },
+        'filters': {
+            'health_check': {
+                '()': 'src.utils.logging.HealthCheckFilter',
+            },
+        },
         'handlers': {
             'console': {
                 'class': 'logging.StreamHandler',
@@ -91,6 +148,7 @@ def setup_logging():
             'uvicorn.access': {
                 'level': 'INFO',
                 'handlers': ['console', 'file'],
+                'filters': ['health_check'],
                 'propagate': False,
             },
         },
@@ -98,6 +156,7 @@ def setup_logging():
     
     try:
         logging.config.dictConfig(LOGGING_CONFIG)
+        _start_queue_listener()
     except Exception as e:
         print(f"Error setting up logging configuration: {e}")
         # Fallback to basic config
@@ -1,5 +1,6 @@
 """PDF generation utilities for loan documents and reports."""
 
+import asyncio
 from typing import List, Dict, Any, Optional
 from datetime import datetime, date
 from io import BytesIO
@@ -17,8 +18,22 @@ from reportlab.platypus import (
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
-from ..schemas.loan import DeviceLoanResponse, DeviceLoanSummary
+from ..schemas.loan import DeviceLoanResponse, DeviceLoanStats, DeviceLoanSummary
 from ..models.loan import LoanStatus
+from .process_pool import get_export_executor
+
+
+# Loan statistics layout; TableStyle parses its commands once here
+_STATS_DOC_OPTIONS = dict(pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+_STATS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
 
 
 class PDFGenerator:
@@ -590,4 +605,93 @@ class PDFGenerator:
         
         doc.build(story)
         buffer.seek(0)
-        return buffer
\ No newline at end of file
+        return buffer
+
+    def generate_loan_statistics_report(self, stats: DeviceLoanStats) -> BytesIO:
+        """Generate loan statistics report (totals, most borrowed devices, top borrowers)."""
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, **_STATS_DOC_OPTIONS)
+        
+        story = []
+        
+        # Header
+        story.append(Paragraph("STATISTIK PEMINJAMAN PERANGKAT", self.styles['CustomTitle']))
+        story.append(Paragraph(f"Per Tanggal: {datetime.now().strftime('%d %B %Y')}", self.styles['SubHeader']))
+        story.append(Spacer(1, 20))
+        
+        # Overall statistics
+        overall_stats = [
+            ["Metrik", "Jumlah"],
+            ["Total Peminjaman", stats.total_loans],
+            ["Peminjaman Aktif", stats.active_loans],
+            ["Peminjaman Selesai", stats.returned_loans],
+            ["Peminjaman Terlambat", stats.overdue_loans],
+            ["Peminjaman Dibatalkan", stats.cancelled_loans],
+            ["Peminjaman Bulan Ini", stats.loans_this_month],
+            ["Peminjaman Minggu Ini", stats.loans_this_week]
+        ]
+        
+        stats_table = Table(overall_stats, colWidths=[8*cm, 4*cm])
+        stats_table.setStyle(_STATS_TABLE_STYLE)
+        
+        story.append(stats_table)
+        story.append(Spacer(1, 20))
+        
+        # Most borrowed devices
+        if stats.most_borrowed_devices:
+            story.append(Paragraph("PERANGKAT PALING SERING DIPINJAM", self.styles['Header']))
+            
+            devices_data = [["No", "Nama Perangkat", "Jumlah Peminjaman"]]
+            for i, device in enumerate(stats.most_borrowed_devices, 1):
+                devices_data.append([str(i), device['device_name'], str(device['loan_count'])])
+            
+            devices_table = Table(devices_data, colWidths=[2*cm, 8*cm, 4*cm])
+            devices_table.setStyle(_STATS_TABLE_STYLE)
+            
+            story.append(devices_table)
+            story.append(Spacer(1, 20))
+        
+        # Top borrowers
+        if stats.top_borrowers:
+            story.append(Paragraph("PEMINJAM PALING AKTIF", self.styles['Header']))
+            
+            borrowers_data = [["No", "Nama Peminjam", "Jumlah Peminjaman"]]
+            for i, borrower in enumerate(stats.top_borrowers, 1):
+                borrowers_data.append([str(i), borrower['borrower_name'], str(borrower['loan_count'])])
+            
+            borrowers_table = Table(borrowers_data, colWidths=[2*cm, 8*cm, 4*cm])
+            borrowers_table.setStyle(_STATS_TABLE_STYLE)
+            
+            story.append(borrowers_table)
+        
+        story.append(Spacer(1, 30))
+        
+        # Footer
+        footer_text = f"Laporan statistik dibuat pada {datetime.now().strftime('%d %B %Y, %H:%M:%S')}"
+        story.append(Paragraph(footer_text, self.styles['RightAlign']))
+        
+        doc.build(story)
+        buffer.seek(0)
+        return buffer
+
+
+_worker_generator: Optional[PDFGenerator] = None  # one per export worker process
+
+
+def _render_in_worker(report: str, args: tuple) -> bytes:
+    """Render one report with this process's generator and return the PDF bytes."""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = PDFGenerator()
+    return getattr(_worker_generator, report)(*args).getvalue()
+
+
+async def render_pdf(report: str, *args) -> BytesIO:
+    """
+    Run a PDFGenerator report method (e.g. "generate_loan_report") in the shared export pool.
+
+    Arguments cross the process boundary by pickling, so pass schemas and plain data.
+    """
+    loop = asyncio.get_running_loop()
+    pdf_bytes = await loop.run_in_executor(get_export_executor(), _render_in_worker, report, args)
+    return BytesIO(pdf_bytes)
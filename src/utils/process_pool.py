@@ -0,0 +1,27 @@
+"""Process pool shared by the CPU-bound report exports (Excel and PDF)."""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from src.core.config import settings
+
+# openpyxl and reportlab rendering run here so they neither block the event loop
+# nor serialize on the GIL. One pool for both, sized per web worker: with N
+# gunicorn workers the host runs N * EXPORT_POOL_WORKERS render processes.
+_export_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_export_executor() -> ProcessPoolExecutor:
+    """Create the export process pool on first use."""
+    global _export_executor
+    if _export_executor is None:
+        _export_executor = ProcessPoolExecutor(max_workers=settings.EXPORT_POOL_WORKERS)
+    return _export_executor
+
+
+def shutdown_export_executor() -> None:
+    """Stop the export worker processes (called on application shutdown)."""
+    global _export_executor
+    if _export_executor is not None:
+        _export_executor.shutdown(wait=False, cancel_futures=True)
+        _export_executor = None
@@ -4,9 +4,9 @@ import json
 import uuid
 import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List
 import logging
-from src.core.redis import redis_set, redis_get, redis_delete, redis_exists, redis_get_pattern, redis_flush_pattern
+from src.core.redis import redis_set, redis_get, redis_mget, redis_delete, redis_exists, redis_get_pattern, redis_unlink
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -165,23 +165,27 @@ class DeviceSessionManager:
     
     async def get_user_session_details(self, user_id: int) -> List[Dict[str, Any]]:
         """Get detailed information about all user sessions."""
+        return [details async for details in self.iter_user_session_details(user_id)]
+    
+    async def iter_user_session_details(self, user_id: int, batch_size: int = 50) -> AsyncIterator[Dict[str, Any]]:
+        """Yield session details as each MGET batch arrives; listing does not count as activity."""
         sessions = await self.get_user_sessions(user_id)
-        session_details = []
         
-        for session_id in sessions:
-            session_data = await self.get_session(session_id)
-            if session_data:
-                session_details.append({
-                    "session_id": session_id,
-                    "device_fingerprint": session_data.get("device_fingerprint"),
-                    "user_agent": session_data.get("user_agent"),
-                    "ip_address": session_data.get("ip_address"),
-                    "created_at": session_data.get("created_at"),
-                    "last_activity": session_data.get("last_activity"),
-                    "status": session_data.get("status", "active")
-                })
-        
-        return session_details
+        for start in range(0, len(sessions), batch_size):
+            batch = sessions[start:start + batch_size]
+            session_values = await redis_mget([self._session_key(session_id) for session_id in batch])
+            
+            for session_id, session_data in zip(batch, session_values):
+                if session_data:
+                    yield {
+                        "session_id": session_id,
+                        "device_fingerprint": session_data.get("device_fingerprint"),
+                        "user_agent": session_data.get("user_agent"),
+                        "ip_address": session_data.get("ip_address"),
+                        "created_at": session_data.get("created_at"),
+                        "last_activity": session_data.get("last_activity"),
+                        "status": session_data.get("status", "active")
+                    }
     
     async def delete_device_sessions(self, user_id: int, device_fingerprint: str) -> int:
         """Delete all sessions for a specific device."""
@@ -277,7 +281,7 @@ class DeviceSessionManager:
     async def _clear_user_device_sessions(self, user_id: int) -> None:
         """Clear all device session tracking for a user."""
         pattern = f"{self.prefix}:device:{user_id}:*"
-        await redis_flush_pattern(pattern)
+        await redis_unlink(patterns=(pattern,))
     
     async def cleanup_expired_sessions(self) -> int:
         """Clean up expired sessions (run periodically)."""
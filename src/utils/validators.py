@@ -168,6 +168,13 @@ def validate_password_history(new_password: str, password_history: List[str]) ->
     return True
 
 
+async def validate_password_history_async(new_password: str, password_history: List[str]) -> bool:
+    """Run validate_password_history in a worker thread (up to 5 hash checks)."""
+    import asyncio
+    
+    return await asyncio.to_thread(validate_password_history, new_password, password_history)
+
+
 def validate_upload_file(file: UploadFile, allowed_types: List[str] = None, max_size: int = None) -> None:
     """Validate uploaded file."""
     if max_size is None:
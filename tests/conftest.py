@@ -0,0 +1,16 @@
+"""Shared test setup."""
+
+import os
+import sys
+
+# Settings are read at import time; give the required ones harmless values
+os.environ.setdefault("PROJECT_NAME", "im-balmon-be-test")
+os.environ.setdefault("SERVICE_NAME", "im-balmon-be-test")
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("JWT_REFRESH_SECRET_KEY", "test-refresh-secret")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,67 @@
+"""Tests that device and loan mutations drop the caches their reads depend on."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import src.services.loan as loan_service
+import src.utils.cache as cache_module
+from src.services.device import DeviceService
+from src.services.loan import LoanService
+
+
+@pytest.fixture
+def redis_calls(monkeypatch):
+    """Record UNLINK and INCR calls instead of talking to Redis."""
+    calls = {"unlink": [], "increment": []}
+
+    async def fake_unlink(*keys, patterns=()):
+        calls["unlink"].append((keys, patterns))
+        return 0
+
+    async def fake_increment(key, amount=1):
+        calls["increment"].append(key)
+        return 1
+
+    monkeypatch.setattr(cache_module, "redis_unlink", fake_unlink)
+    monkeypatch.setattr(cache_module, "redis_increment", fake_increment)
+    return calls
+
+
+def _unlinked_patterns(calls) -> set:
+    return {pattern for _, patterns in calls["unlink"] for pattern in patterns}
+
+
+class _DeviceRepo:
+    async def delete(self, device_id):
+        return True
+
+
+class _LoanRepo:
+    async def get_by_id(self, loan_id):
+        return SimpleNamespace(id=loan_id)
+
+    async def soft_delete(self, loan_id, deleted_by):
+        return True
+
+
+def test_delete_device_invalidates_device_caches(redis_calls):
+    asyncio.run(DeviceService(_DeviceRepo()).delete_device(1))
+
+    assert {"device:usage:*", "device:count:*", "device:list:*"} <= _unlinked_patterns(redis_calls)
+    assert "device:version" in redis_calls["increment"]
+
+
+def test_delete_loan_invalidates_device_and_child_caches(redis_calls, monkeypatch):
+    refreshes = []
+    monkeypatch.setattr(loan_service, "schedule_device_usage_refresh", lambda: refreshes.append(True))
+
+    deleted = asyncio.run(LoanService(_LoanRepo(), _DeviceRepo()).delete_loan(1, deleted_by=2))
+
+    assert deleted
+    assert refreshes
+    patterns = _unlinked_patterns(redis_calls)
+    assert "device:list:*" in patterns
+    assert "device-child:*" in patterns
+    assert "device:version" in redis_calls["increment"]
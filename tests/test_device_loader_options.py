@@ -0,0 +1,27 @@
+"""Tests that device list responses only read what the list queries eager-load."""
+
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects import postgresql
+
+from src.models.device_child import DeviceChild
+from src.models.perangkat import Device
+from src.repositories.device import _LIST_LOADER_OPTIONS
+from src.schemas.device import DeviceResponse
+from src.schemas.device_child import DeviceChildResponse
+
+
+def test_device_response_reads_only_children_relationship():
+    # Anything else would hit raiseload("*") when a list page is serialized
+    relationships = set(inspect(Device).relationships.keys())
+    assert set(DeviceResponse.model_fields) & relationships == {"children"}
+
+
+def test_child_response_reads_no_relationship():
+    # Children are loaded with .raiseload("*") on their own relationships
+    relationships = set(inspect(DeviceChild).relationships.keys())
+    assert not set(DeviceChildResponse.model_fields) & relationships
+
+
+def test_list_loader_options_compile():
+    query = select(Device).options(*_LIST_LOADER_OPTIONS)
+    assert "FROM devices" in str(query.compile(dialect=postgresql.dialect()))
@@ -0,0 +1,47 @@
+"""Tests for the ETag / If-None-Match helpers."""
+
+from starlette.requests import Request
+
+from src.utils.etag import etag_matches, make_etag, not_modified
+
+
+def _request(if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_make_etag_is_weak():
+    assert make_etag(12, "abc") == 'W/"12-abc"'
+
+
+def test_etag_matches_without_header():
+    assert not etag_matches(_request(), make_etag(1))
+
+
+def test_etag_matches_same_tag():
+    etag = make_etag(3, 4)
+    assert etag_matches(_request(etag), etag)
+
+
+def test_etag_matches_weak_against_strong():
+    assert etag_matches(_request('"3-4"'), make_etag(3, 4))
+
+
+def test_etag_matches_in_list():
+    assert etag_matches(_request('"old", W/"3-4"'), make_etag(3, 4))
+
+
+def test_etag_matches_wildcard():
+    assert etag_matches(_request("*"), make_etag(1))
+
+
+def test_etag_mismatch():
+    assert not etag_matches(_request(make_etag(3, 5)), make_etag(3, 4))
+
+
+def test_not_modified_response():
+    etag = make_etag(7)
+    response = not_modified(etag)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.body == b""
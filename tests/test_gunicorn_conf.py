@@ -0,0 +1,15 @@
+"""Tests for the gunicorn production config."""
+
+import os
+import runpy
+
+from src.core.config import settings
+
+CONF_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+def test_workers_follow_settings():
+    # Not 2 * cpu + 1: each worker holds its own DB pool
+    conf = runpy.run_path(CONF_PATH)
+    assert conf["workers"] == settings.WEB_CONCURRENCY
+    assert conf["worker_class"] == "src.core.workers.UvloopWorker"
@@ -0,0 +1,21 @@
+"""Tests for the device usage report's period window."""
+
+from datetime import date
+
+import pytest
+
+from src.api.endpoints.export import _usage_window_start
+
+
+@pytest.mark.parametrize(
+    "today, period_months, expected",
+    [
+        (date(2026, 10, 16), 1, date(2026, 10, 1)),
+        (date(2026, 10, 1), 3, date(2026, 8, 1)),
+        (date(2026, 2, 28), 3, date(2025, 12, 1)),
+        (date(2026, 1, 31), 1, date(2026, 1, 1)),
+        (date(2026, 10, 16), 12, date(2025, 11, 1)),
+    ],
+)
+def test_usage_window_covers_period_months_buckets(today, period_months, expected):
+    assert _usage_window_start(today, period_months) == expected